@@ -1,9 +1,11 @@
-from flask import Flask
+from flask import Flask, request
 from flask_pymongo import PyMongo
 from flasgger import Swagger
 import os
 from dotenv import load_dotenv
 from flask_cors import CORS  # Import CORS
+import config
+from services.response_shaping import compressible, encode_response
 
 load_dotenv()
 
@@ -18,17 +20,35 @@ swagger = Swagger(app)
 
 CORS(app, resources={r"/*": {"origins": "*"}})  # Allow all origins (adjust as needed)
 
+@app.after_request
+def compress_response(response):
+    # gzip/brotli for JSON and text bodies; streamed exports are left alone
+    if response.direct_passthrough or response.is_streamed or not compressible(response):
+        return response
+    return encode_response(response, response.get_data(), request.headers.get('Accept-Encoding'))
+
 def create_app():
     # Import blueprints inside the function to avoid circular imports
     from routes.user_routes import bp as user_bp
     from routes.admin_routes import bp as admin_bp
-    from routes.anime_routes import anime_bp  
+    from routes.anime_routes import anime_bp, snapshot_scheduler, search_indexer
     from routes.share_routes import share_bp  
 
     app.register_blueprint(user_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(anime_bp, url_prefix='/api')
     app.register_blueprint(share_bp, url_prefix='/api')
+
+    if config.INDEX_BOOTSTRAP_ON_STARTUP:
+        from services.indexes import bootstrap_indexes
+        bootstrap_indexes(mongo.db)
+
+    # Rebuild the popular ranking/season listings in the background
+    if config.SNAPSHOT_SCHEDULER_ENABLED:
+        snapshot_scheduler.start()
+    # Build the in-process title search index from the catalog mirror
+    if config.SEARCH_INDEX_ENABLED and config.CATALOG_READS_ENABLED:
+        search_indexer.start()
     return app
 
 
@@ -0,0 +1,69 @@
+# asgi.py
+"""ASGI entry point.
+
+The MyAnimeList proxy routes (search, detail, batch, ranking, season) are
+served by the async blueprint in routes/anime_async_routes.py; every other
+request is handed to the regular Flask app. Run with:
+
+    hypercorn asgi:application --bind 0.0.0.0:5000 --workers 4
+"""
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, request
+from werkzeug.exceptions import HTTPException
+
+from app import create_app
+from routes.anime_async_routes import anime_async_bp
+from services.mal_async_client import mal_async_client
+from services.response_shaping import compressible, encode_response
+
+flask_app = create_app()
+
+async_app = Quart(__name__)
+async_app.register_blueprint(anime_async_bp, url_prefix='/api')
+
+
+@async_app.before_serving
+async def start_mal_client():
+    await mal_async_client.start()
+
+
+@async_app.after_serving
+async def close_mal_client():
+    await mal_async_client.close()
+
+
+@async_app.after_request
+async def allow_all_origins(response):
+    # Same policy as CORS(app, resources={r"/*": {"origins": "*"}}) in app.py
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Allow-Headers'] = request.headers.get('Access-Control-Request-Headers', '*')
+        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+@async_app.after_request
+async def compress_response(response):
+    # Same negotiation as the Flask app's after_request hook
+    if not compressible(response):
+        return response
+    return encode_response(response, await response.get_data(), request.headers.get('Accept-Encoding'))
+
+
+wsgi_app = WsgiToAsgi(flask_app)
+async_urls = async_app.url_map.bind('')
+
+
+def _is_async_route(scope):
+    try:
+        async_urls.match(scope['path'], method=scope['method'])
+        return True
+    except HTTPException:
+        return False
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan' or (scope['type'] == 'http' and _is_async_route(scope)):
+        await async_app(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
@@ -0,0 +1,157 @@
+# benchmarks/bench_async_proxy.py
+"""Compare requests/second of the WSGI (Flask) and ASGI (async) anime proxy.
+
+Starts a stub MyAnimeList server that answers every request after --delay
+seconds, the Flask app under gunicorn and the ASGI app under hypercorn,
+then drives GET /api/anime/<id> at both with --concurrency clients for
+--duration seconds. Every request uses a fresh anime ID so neither the
+detail cache nor request coalescing can hide the upstream latency.
+
+    python benchmarks/bench_async_proxy.py --delay 0.2 --concurrency 200 --duration 15
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def serve_stub(port, delay):
+    class StubMAL(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            anime_id = self.path.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+            body = json.dumps({
+                'id': int(anime_id) if anime_id.isdigit() else 0,
+                'title': f'Stub anime {anime_id}',
+                'main_picture': {'medium': '', 'large': ''},
+                'mean': 7.5,
+                'num_episodes': 12,
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer(('127.0.0.1', port), StubMAL).serve_forever()
+
+
+def server_env(stub_port):
+    return {
+        **os.environ,
+        'MYANIMELIST_API_URL': f'http://127.0.0.1:{stub_port}/v2/anime',
+        'MONGO_URL_ONLINE_ANIMESAVER': os.environ.get(
+            'MONGO_URL_ONLINE_ANIMESAVER', 'mongodb://127.0.0.1:27017/animesaver-bench'
+        ),
+        'CATALOG_READS_ENABLED': 'false',
+        'SNAPSHOT_SCHEDULER_ENABLED': 'false',
+        'ANIME_CACHE_TTL': '0',
+        'ANIME_CACHE_STALE_TTL': '0',
+        'MAL_POOL_MAXSIZE': '1000',
+    }
+
+
+async def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up')
+
+
+async def drive(base_url, concurrency, duration):
+    ids = itertools.count(1)
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    response = await client.get(f'/api/anime/{next(ids)}', params={'fields': 'mean'})
+                    response.raise_for_status()
+                    latencies.append(time.monotonic() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--delay', type=float, default=0.2, help='stub upstream latency in seconds')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=1, help='server worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--stub', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stub:
+        serve_stub(args.stub, args.delay)
+        return
+
+    stub_port, wsgi_port, asgi_port = 8900, 8901, 8902
+    env = server_env(stub_port)
+    servers = {
+        'wsgi (gunicorn)': (wsgi_port, [
+            'gunicorn', '-w', str(args.workers), '--threads', str(args.threads),
+            '-b', f'127.0.0.1:{wsgi_port}', 'app:create_app()',
+        ]),
+        'asgi (hypercorn)': (asgi_port, [
+            'hypercorn', '-w', str(args.workers), '-b', f'127.0.0.1:{asgi_port}', 'asgi:application',
+        ]),
+    }
+
+    processes = [subprocess.Popen([sys.executable, __file__, '--stub', str(stub_port), '--delay', str(args.delay)])]
+    try:
+        for name, (port, command) in servers.items():
+            processes.append(subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            asyncio.run(wait_until_up(f'http://127.0.0.1:{port}/'))
+
+        print(f'upstream delay {args.delay}s, {args.concurrency} clients, {args.duration}s per run, '
+              f'{args.workers} worker(s), {args.threads} gunicorn thread(s)')
+        for name, (port, _) in servers.items():
+            result = asyncio.run(drive(f'http://127.0.0.1:{port}', args.concurrency, args.duration))
+            print(f'{name:18} {result}')
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_password_pool.py
+"""Login throughput and read latency with inline vs pooled bcrypt.
+
+Seeds one user into a local MongoDB, then runs the Flask app under
+gunicorn twice: once hashing on the request threads
+(PASSWORD_HASH_WORKERS=0) and once on the bounded process pool. Each run
+drives POST /login with --logins clients while --readers clients hit a
+cheap read route, and reports login throughput, 503 rejections and the
+read latency the login burst causes.
+
+    python benchmarks/bench_password_pool.py --logins 32 --readers 32 --duration 15 --pool-workers 2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import time
+
+import httpx
+from pymongo import MongoClient
+
+from bench_async_proxy import BACKEND_DIR, wait_until_up
+
+EMAIL = 'bench@example.com'
+PASSWORD = 'benchmark-password'
+
+
+def seed(mongo_url, rounds):
+    import bcrypt
+    client = MongoClient(mongo_url)
+    db = client.get_default_database()
+    db.users.delete_many({"userEmail": EMAIL})
+    db.users.insert_one({
+        "userName": "bench",
+        "userEmail": EMAIL,
+        "userPassword": bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds)),
+        "savedList": [],
+        "isAdmin": False,
+    })
+    client.close()
+
+
+def percentile(values, fraction):
+    return round(values[max(0, int(len(values) * fraction) - 1)] * 1000, 1) if values else None
+
+
+async def drive(base_url, logins, readers, duration):
+    deadline = time.monotonic() + duration
+    counts = {'login_ok': 0, 'login_busy': 0, 'login_error': 0}
+    read_latencies = []
+    limits = httpx.Limits(max_connections=logins + readers)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def login_worker():
+            while time.monotonic() < deadline:
+                try:
+                    response = await client.post('/login', json={"userEmail": EMAIL, "userPassword": PASSWORD})
+                    key = {200: 'login_ok', 503: 'login_busy'}.get(response.status_code, 'login_error')
+                except httpx.HTTPError:
+                    key = 'login_error'
+                counts[key] += 1
+
+        async def read_worker():
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    (await client.get('/api/anime/cache/stats')).raise_for_status()
+                    read_latencies.append(time.monotonic() - started)
+                except httpx.HTTPError:
+                    pass
+
+        started = time.monotonic()
+        await asyncio.gather(*[login_worker() for _ in range(logins)], *[read_worker() for _ in range(readers)])
+        elapsed = time.monotonic() - started
+
+    read_latencies.sort()
+    return {
+        'login_rps': round(counts['login_ok'] / elapsed, 1),
+        'login_503': counts['login_busy'],
+        'login_errors': counts['login_error'],
+        'read_rps': round(len(read_latencies) / elapsed, 1),
+        'read_p50_ms': round(statistics.median(read_latencies) * 1000, 1) if read_latencies else None,
+        'read_p99_ms': percentile(read_latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--readers', type=int, default=32, help='concurrent read clients')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt work factor')
+    parser.add_argument('--pool-workers', type=int, default=2, help='PASSWORD_HASH_WORKERS for the pooled run')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=16, help='gunicorn threads per worker')
+    args = parser.parse_args()
+
+    mongo_url = os.environ.get('MONGO_BENCH_URL', 'mongodb://127.0.0.1:27017/animesaver-bench')
+    seed(mongo_url, args.rounds)
+    port = 8910
+    base_env = {
+        **os.environ,
+        'MONGO_URL_ONLINE_ANIMESAVER': mongo_url,
+        'BCRYPT_ROUNDS': str(args.rounds),
+        'SNAPSHOT_SCHEDULER_ENABLED': 'false',
+        'AUTH_SECRET_KEY': 'benchmark',
+    }
+
+    print(f'{args.logins} login + {args.readers} read clients, {args.duration}s per run, '
+          f'bcrypt cost {args.rounds}, {args.workers} worker(s) x {args.threads} threads')
+    for name, hash_workers in (('inline', 0), (f'pool ({args.pool_workers})', args.pool_workers)):
+        env = {**base_env, 'PASSWORD_HASH_WORKERS': str(hash_workers)}
+        server = subprocess.Popen([
+            'gunicorn', '-w', str(args.workers), '--threads', str(args.threads),
+            '-b', f'127.0.0.1:{port}', 'app:create_app()',
+        ], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_until_up(f'http://127.0.0.1:{port}/'))
+            result = asyncio.run(drive(f'http://127.0.0.1:{port}', args.logins, args.readers, args.duration))
+            print(f'{name:10} {result}')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
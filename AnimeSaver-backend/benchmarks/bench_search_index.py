@@ -0,0 +1,103 @@
+# benchmarks/bench_search_index.py
+"""Query latency of the in-process search index as the catalog grows.
+
+Builds a SearchIndex over --sizes synthetic anime (random multi-word titles
+plus English titles and synonyms) and times the first page (10 results) of
+exact, prefix and misspelled queries against it, next to a linear substring
+scan over every name (what a naive local search would do), plus typeahead
+suggestions for 1 to 6 typed characters. No database or network is needed.
+
+    python benchmarks/bench_search_index.py --sizes 1000,10000,100000 --queries 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search_index import SearchIndex, anime_names, normalize  # noqa: E402
+
+SYLLABLES = ('ka', 'shi', 'to', 'na', 'ru', 'mi', 'ko', 'no', 'sa', 'ki', 'yo', 'ha', 'ra', 'ta', 'ne', 'so', 'ri', 'mu')
+WORDS = ('attack', 'titan', 'hunter', 'sword', 'online', 'academy', 'hero', 'ghost', 'shell', 'dragon',
+         'ball', 'spirit', 'steel', 'alchemist', 'death', 'note', 'piece', 'slayer', 'kingdom', 'dream')
+
+
+def word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def catalog(size, seed=7):
+    rng = random.Random(seed)
+    docs = []
+    for anime_id in range(1, size + 1):
+        title = ' '.join(word(rng) for _ in range(rng.randint(1, 4)))
+        english = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        docs.append({
+            'id': anime_id,
+            'title': title.title(),
+            'alternative_titles': {'en': english.title(), 'synonyms': [word(rng).upper()]},
+            'popularity': rng.randint(1, size),
+            'mean': round(rng.uniform(5, 9.5), 2),
+        })
+    return docs
+
+
+def typo(text, rng):
+    if len(text) < 4:
+        return text
+    position = rng.randrange(1, len(text) - 1)
+    return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+
+def queries(docs, count, seed=11):
+    rng = random.Random(seed)
+    picked = [rng.choice(docs) for _ in range(count)]
+    return {
+        'exact': [doc['title'] for doc in picked],
+        'prefix': [doc['title'].split()[0][:3] for doc in picked],
+        'typo': [typo(doc['title'].split()[0].lower(), rng) for doc in picked],
+    }
+
+
+def timed(search, batch):
+    latencies = []
+    for query in batch:
+        started = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p99_ms': round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated catalog sizes')
+    parser.add_argument('--queries', type=int, default=500, help='queries per kind and size')
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        docs = catalog(size)
+        started = time.perf_counter()
+        index = SearchIndex(docs)
+        build = time.perf_counter() - started
+        names = [(doc['id'], normalize(name)) for doc in docs for name in anime_names(doc)]
+
+        def scan(query):
+            query = normalize(query)
+            return [anime_id for anime_id, name in names if query in name]
+
+        print(f'{size} anime, {len(index.terms)} terms, built in {build:.2f}s')
+        for kind, batch in queries(docs, args.queries).items():
+            print(f'  {kind:7} index {timed(lambda query: index.search(query, 10), batch)}  scan {timed(scan, batch)}')
+        prefixes = [query[:length] for query in queries(docs, args.queries)['exact'] for length in (1, 2, 4, 6)]
+        print(f'  suggest {timed(lambda prefix: index.suggest(prefix, 8), prefixes)}')
+
+
+if __name__ == '__main__':
+    main()
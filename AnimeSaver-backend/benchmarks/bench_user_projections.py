@@ -0,0 +1,96 @@
+# benchmarks/bench_user_projections.py
+"""Bytes transferred and latency of user queries with and without projections.
+
+Seeds --users users with --entries embedded watchlist entries each into a
+local MongoDB database, then runs the query each route issues twice: once
+fetching whole documents (the old behaviour) and once with the route's
+projection from services/user_projections.py.
+
+    python benchmarks/bench_user_projections.py --users 200 --entries 2000 --repeat 50
+
+The target database (MONGO_BENCH_URL) is dropped and re-seeded on every run.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import bcrypt
+import bson
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import user_projections  # noqa: E402
+from services.indexes import ensure_user_indexes  # noqa: E402
+from services.watchlist_store import EmbeddedWatchlist  # noqa: E402
+
+
+def seed(db, users, entries):
+    db.users.drop()
+    password = bcrypt.hashpw(b'benchmark', bcrypt.gensalt(4))
+    db.users.insert_many([
+        {
+            "userName": f"user{n}",
+            "userEmail": f"user{n}@example.com",
+            "userPassword": password,
+            "isAdmin": n == 0,
+            "savedList": [{"id": anime_id, "watched": anime_id % 3 == 0} for anime_id in range(1, entries + 1)],
+        }
+        for n in range(users)
+    ])
+    ensure_user_indexes(db)
+
+
+def measure(run, repeat):
+    timings = []
+    transferred = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        docs = run()
+        timings.append(time.perf_counter() - started)
+        transferred = sum(len(bson.encode(doc)) for doc in docs)
+    return transferred, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--entries', type=int, default=2000, help='watchlist entries per user')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ.get('MONGO_BENCH_URL', 'mongodb://127.0.0.1:27017/animesaver-bench'))
+    db = client.get_default_database()
+    seed(db, args.users, args.entries)
+    user = db.users.find_one({"userEmail": "user1@example.com"}, {"_id": 1})
+    users = db.users
+    watchlist = EmbeddedWatchlist(db)
+    profile = user_projections.with_watchlist(user_projections.PROFILE_FIELDS, watchlist)
+    listing = user_projections.with_watchlist(user_projections.LISTING_FIELDS, watchlist)
+
+    def one(query, projection=None):
+        return lambda: [users.find_one(query, projection)]
+
+    routes = {
+        'login': (one({"userEmail": "user1@example.com"}),
+                  one({"userEmail": "user1@example.com"}, user_projections.LOGIN)),
+        'admin_required': (one({"userEmail": "user0@example.com"}),
+                           one({"userEmail": "user0@example.com"}, user_projections.ADMIN_CHECK)),
+        'get_user': (one({"_id": user['_id']}), one({"_id": user['_id']}, profile)),
+        'get_all_users': (lambda: list(users.find()), lambda: list(users.find({}, listing))),
+        'watchlist': (one({"_id": user['_id']}), one({"_id": user['_id']}, {"savedList": 1})),
+    }
+
+    print(f'{args.users} users x {args.entries} entries, median of {args.repeat} runs')
+    print(f'{"route":16} {"full bytes":>12} {"full ms":>9} {"proj bytes":>12} {"proj ms":>9}')
+    for name, (full, projected) in routes.items():
+        full_bytes, full_ms = measure(full, args.repeat)
+        proj_bytes, proj_ms = measure(projected, args.repeat)
+        print(f'{name:16} {full_bytes:>12,} {full_ms:>9.2f} {proj_bytes:>12,} {proj_ms:>9.2f}')
+    client.drop_database(db.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# bootstrap_indexes.py
+"""Create the users and watchlist indexes and verify route query plans.
+
+Usage:
+    python bootstrap_indexes.py           # create indexes
+    python bootstrap_indexes.py --check   # also explain every route query; exit 1 on a COLLSCAN
+
+The app creates the same indexes on startup (INDEX_BOOTSTRAP_ON_STARTUP);
+run this by hand to see why a unique index could not be built, e.g. when
+existing users share an email address.
+"""
+import argparse
+import sys
+
+import config
+from app import mongo
+from services.indexes import ensure_indexes, check_query_plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create MongoDB indexes and check route query plans.')
+    parser.add_argument('--check', action='store_true', help='explain route queries and flag collection scans')
+    args = parser.parse_args()
+
+    db = mongo.db
+    ensure_indexes(db)
+    print('indexes ready')
+    if not args.check:
+        return
+
+    report = check_query_plans(db, config.WATCHLIST_BACKEND)
+    for entry in report:
+        flag = 'COLLSCAN' if entry['collscan'] else 'ok'
+        print(f"{entry['route']:16} {flag:9} {', '.join(entry['stages'])}")
+    if any(entry['collscan'] for entry in report):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
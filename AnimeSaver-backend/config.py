@@ -4,3 +4,125 @@ from dotenv import load_dotenv
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URL_ONLINE_ANIMESAVER")
+
+# MyAnimeList upstream HTTP client
+MAL_POOL_CONNECTIONS = int(os.getenv("MAL_POOL_CONNECTIONS", 4))
+MAL_POOL_MAXSIZE = int(os.getenv("MAL_POOL_MAXSIZE", 32))
+MAL_POOL_BLOCK = os.getenv("MAL_POOL_BLOCK", "false").lower() == "true"
+MAL_CONNECT_TIMEOUT = float(os.getenv("MAL_CONNECT_TIMEOUT", 3.05))
+MAL_READ_TIMEOUT = float(os.getenv("MAL_READ_TIMEOUT", 10))
+MAL_KEEP_ALIVE = os.getenv("MAL_KEEP_ALIVE", "true").lower() == "true"
+MAL_MAX_RETRIES = int(os.getenv("MAL_MAX_RETRIES", 2))
+
+# Anime detail response cache
+ANIME_CACHE_MAX_ENTRIES = int(os.getenv("ANIME_CACHE_MAX_ENTRIES", 5000))
+ANIME_CACHE_TTL = int(os.getenv("ANIME_CACHE_TTL", 6 * 60 * 60))
+ANIME_CACHE_STALE_TTL = int(os.getenv("ANIME_CACHE_STALE_TTL", 18 * 60 * 60))
+
+# Batch anime detail endpoint
+ANIME_BATCH_MAX_IDS = int(os.getenv("ANIME_BATCH_MAX_IDS", 500))
+ANIME_BATCH_WORKERS = int(os.getenv("ANIME_BATCH_WORKERS", 8))
+
+# Local anime catalog mirror
+CATALOG_READS_ENABLED = os.getenv("CATALOG_READS_ENABLED", "true").lower() == "true"
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", 24 * 60 * 60))
+CATALOG_SYNC_INTERVAL = int(os.getenv("CATALOG_SYNC_INTERVAL", 60 * 60))
+CATALOG_SYNC_PAGE_SIZE = int(os.getenv("CATALOG_SYNC_PAGE_SIZE", 500))
+CATALOG_RANKING_DEPTH = int(os.getenv("CATALOG_RANKING_DEPTH", 1000))
+CATALOG_SEASON_DEPTH = int(os.getenv("CATALOG_SEASON_DEPTH", 1000))
+CATALOG_REFRESH_BATCH = int(os.getenv("CATALOG_REFRESH_BATCH", 200))
+CATALOG_RANKING_TYPES = os.getenv("CATALOG_RANKING_TYPES", "all,airing,upcoming,bypopularity").split(",")
+
+# Whole-season listings used for filtered seasonal pagination
+SEASON_MAX_ITEMS = int(os.getenv("SEASON_MAX_ITEMS", 2000))
+SEASON_CACHE_MAX_ENTRIES = int(os.getenv("SEASON_CACHE_MAX_ENTRIES", 64))
+SEASON_CACHE_TTL = int(os.getenv("SEASON_CACHE_TTL", 60 * 60))
+SEASON_CACHE_STALE_TTL = int(os.getenv("SEASON_CACHE_STALE_TTL", 6 * 60 * 60))
+
+# Precomputed ranking/season snapshots
+SNAPSHOT_SCHEDULER_ENABLED = os.getenv("SNAPSHOT_SCHEDULER_ENABLED", "true").lower() == "true"
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", 15 * 60))
+SNAPSHOT_RANKING_DEPTH = int(os.getenv("SNAPSHOT_RANKING_DEPTH", 500))
+SNAPSHOT_RANKING_TYPES = os.getenv("SNAPSHOT_RANKING_TYPES", "all,airing,upcoming").split(",")
+# With a shared cache, one lease holder builds and the other workers poll for its snapshots
+SNAPSHOT_LEASE_TTL = int(os.getenv("SNAPSHOT_LEASE_TTL", 5 * 60))
+SNAPSHOT_POLL_INTERVAL = int(os.getenv("SNAPSHOT_POLL_INTERVAL", 30))
+
+# In-process title search index built from the catalog mirror
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+SEARCH_INDEX_INTERVAL = int(os.getenv("SEARCH_INDEX_INTERVAL", 10 * 60))
+# Minimum trigram (Dice) similarity for a misspelled term to match
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", 0.5))
+# Typeahead suggestions: hot-prefix cache and browser cache lifetime
+SUGGEST_CACHE_MAX_ENTRIES = int(os.getenv("SUGGEST_CACHE_MAX_ENTRIES", 4096))
+SUGGEST_CACHE_TTL = int(os.getenv("SUGGEST_CACHE_TTL", 5 * 60))
+SUGGEST_MAX_AGE = int(os.getenv("SUGGEST_MAX_AGE", 5 * 60))
+
+# Response compression (gzip or brotli, whichever the client prefers)
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() == "true"
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+# HTTP caching (Cache-Control max-age per route group, in seconds)
+HTTP_CACHE_LISTING_MAX_AGE = int(os.getenv("HTTP_CACHE_LISTING_MAX_AGE", 5 * 60))
+HTTP_CACHE_SEARCH_MAX_AGE = int(os.getenv("HTTP_CACHE_SEARCH_MAX_AGE", 10 * 60))
+HTTP_CACHE_DETAIL_MAX_AGE = int(os.getenv("HTTP_CACHE_DETAIL_MAX_AGE", 60 * 60))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", 60 * 60))
+
+# Outbound MAL rate limiting and circuit breaking
+MAL_RATE_PER_SECOND = float(os.getenv("MAL_RATE_PER_SECOND", 10))
+MAL_RATE_BURST = int(os.getenv("MAL_RATE_BURST", 20))
+# Longest a call may queue for a token, indexed by priority lane (interactive, background)
+MAL_RATE_MAX_WAIT = (
+    float(os.getenv("MAL_RATE_MAX_WAIT_INTERACTIVE", 2)),
+    float(os.getenv("MAL_RATE_MAX_WAIT_BACKGROUND", 30)),
+)
+MAL_BREAKER_FAILURES = int(os.getenv("MAL_BREAKER_FAILURES", 5))
+MAL_BREAKER_RESET = float(os.getenv("MAL_BREAKER_RESET", 30))
+
+# Watchlist bulk import/export
+WATCHLIST_BULK_MAX_ITEMS = int(os.getenv("WATCHLIST_BULK_MAX_ITEMS", 5000))
+
+# Where watchlist entries are stored: "embedded" (users.savedList) or
+# "collection" (one document per entry in the watchlist collection; run
+# migrate_watchlist.py first)
+WATCHLIST_BACKEND = os.getenv("WATCHLIST_BACKEND", "embedded")
+
+# Create the users/watchlist indexes when the app starts
+INDEX_BOOTSTRAP_ON_STARTUP = os.getenv("INDEX_BOOTSTRAP_ON_STARTUP", "true").lower() == "true"
+
+# Session tokens. AUTH_SECRET_KEY is required so every worker signs with the
+# same key; AUTH_DEV_MODE=true allows a random per-process key for local runs.
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY")
+AUTH_DEV_MODE = os.getenv("AUTH_DEV_MODE", "false").lower() == "true"
+ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL", 15 * 60))
+REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_TTL", 30 * 24 * 60 * 60))
+ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", 60))
+ROLE_CACHE_MAX_ENTRIES = int(os.getenv("ROLE_CACHE_MAX_ENTRIES", 10000))
+
+# Password hashing: bcrypt work factor and the bounded hashing process pool
+# (PASSWORD_HASH_WORKERS=0 hashes inline on the request thread)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 16))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+# Shared lists: "mongo" (persistent, shared by all workers) or "memory"
+SHARE_STORE = os.getenv("SHARE_STORE", "mongo")
+SHARE_TTL = int(os.getenv("SHARE_TTL", 30 * 24 * 60 * 60))
+SHARE_CACHE_MAX_ENTRIES = int(os.getenv("SHARE_CACHE_MAX_ENTRIES", 1000))
+SHARE_CACHE_TTL = int(os.getenv("SHARE_CACHE_TTL", 5 * 60))
+SHARE_MEMORY_MAX_ENTRIES = int(os.getenv("SHARE_MEMORY_MAX_ENTRIES", 10000))
+SHARE_LINK_BASE_URL = os.getenv("SHARE_LINK_BASE_URL", "http://localhost:5173/shared-list")
+SHARE_RENDER_MAX_ENTRIES = int(os.getenv("SHARE_RENDER_MAX_ENTRIES", 500))
+SHARE_RENDER_TTL = int(os.getenv("SHARE_RENDER_TTL", 10 * 60))
+
+# Shared cache tier behind the per-process caches: "local" (none), "redis" or
+# "memory" (in-process fake for tests)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "animesaver")
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "animesaver:invalidate")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
+CACHE_STORE_TIMEOUT = float(os.getenv("CACHE_STORE_TIMEOUT", 0.25))
@@ -0,0 +1,76 @@
+# migrate_watchlist.py
+"""Copy embedded `users.savedList` entries into the `watchlist` collection.
+
+Usage:
+    python migrate_watchlist.py           # copy entries, leave savedList in place
+    python migrate_watchlist.py --unset   # copy entries, then drop savedList from each user
+
+The copy is idempotent: entries that already exist in the collection are
+left untouched, so the script can be re-run until WATCHLIST_BACKEND is
+switched to "collection". --unset is refused until then, since the
+embedded backend still reads savedList. A user whose savedList changed
+while it was being copied keeps it, and is reported so the script can be
+run again.
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+
+import config
+from services.watchlist_store import CollectionWatchlist, anime_key
+
+
+def migrate(db, unset=False, batch_size=500):
+    store = CollectionWatchlist(db)
+    store.ensure_indexes()
+    migrated_users = copied = 0
+    unset_skipped = []
+    users = db['users'].find({"savedList.0": {"$exists": True}}, {"savedList": 1}).batch_size(batch_size)
+    for user in users:
+        saved_list = user['savedList']
+        started = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                {"userId": user['_id'], "animeId": anime_key(entry['id'])},
+                {"$setOnInsert": {
+                    "watched": entry.get('watched', False),
+                    "progress": entry.get('progress', 0),
+                    # Keeps the original list order for the "added" sort
+                    "added_at": started - timedelta(milliseconds=len(saved_list) - position),
+                }},
+                upsert=True,
+            )
+            for position, entry in enumerate(saved_list)
+            if entry.get('id') is not None
+        ]
+        if operations:
+            copied += store.watchlist.bulk_write(operations, ordered=False).upserted_count
+        if unset:
+            # Only drop the list that was copied; a concurrent change leaves it in place
+            result = db['users'].update_one(
+                {"_id": user['_id'], "savedList": saved_list}, {"$unset": {"savedList": ""}}
+            )
+            if not result.modified_count:
+                unset_skipped.append(str(user['_id']))
+        migrated_users += 1
+    report = {'users': migrated_users, 'entries_copied': copied}
+    if unset:
+        report['unset_skipped'] = unset_skipped
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move embedded watchlists into the watchlist collection.')
+    parser.add_argument('--unset', action='store_true', help='remove savedList from users once copied')
+    parser.add_argument('--batch-size', type=int, default=500, help='users fetched per cursor batch')
+    args = parser.parse_args()
+    if args.unset and config.WATCHLIST_BACKEND != 'collection':
+        parser.error('--unset needs WATCHLIST_BACKEND=collection; the embedded backend still reads savedList')
+
+    from app import mongo
+    print(migrate(mongo.db, unset=args.unset, batch_size=args.batch_size))
+
+
+if __name__ == '__main__':
+    main()
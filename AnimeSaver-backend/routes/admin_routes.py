@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from functools import wraps
+from services import user_projections
+from services.auth_tokens import bearer_token, verify, cached_is_admin, TokenError
 
 bp = Blueprint('admin_routes', __name__)
 
@@ -10,14 +12,26 @@ def get_mongo():
 def admin_required(f):
     @wraps(f)
     def decorator(*args, **kwargs):
-        user_email = request.headers.get('User-Email')
-        mongo = get_mongo()
-        user = mongo.db.users.find_one({"userEmail": user_email})
-        if not user or not user.get('isAdmin', False):
+        token = bearer_token(request.headers)
+        if token is not None:
+            # The admin claim is signed into the access token: no database lookup
+            try:
+                is_admin = verify(token).get('adm', False)
+            except TokenError as e:
+                return jsonify({"message": str(e)}), 401
+        else:
+            user_email = request.headers.get('User-Email')
+            is_admin = cached_is_admin(('email', user_email), lambda: load_admin_flag(user_email)) if user_email else None
+        if not is_admin:
             return jsonify({"message": "Admin access required!"}), 403
         return f(*args, **kwargs)
     return decorator
 
+def load_admin_flag(user_email):
+    mongo = get_mongo()
+    user = mongo.db.users.find_one({"userEmail": user_email}, user_projections.ADMIN_CHECK)
+    return bool(user.get('isAdmin', False)) if user else None
+
 @bp.route('/admin/data', methods=['GET'])
 @admin_required
 def admin_data():
@@ -0,0 +1,278 @@
+# routes/anime_async_routes.py
+# asyncio versions of the MyAnimeList proxy routes in anime_routes.py, served
+# by the ASGI app in asgi.py. They share the same caches, catalog mirror and
+# snapshots; only the upstream I/O is async.
+import asyncio
+
+from quart import Blueprint, Response, jsonify, request
+
+import config
+from routes.anime_routes import (
+    CLIENT_ID, MYANIMELIST_API_URL, anime_catalog, read_catalog, mal_detail_fetcher, load_full_season,
+    parse_batch_ids, ranking_snapshot, ranking_snapshot_body, season_snapshot, season_page_body, with_snapshot_headers,
+    search_index_page, suggestions, with_suggest_headers, shaped_body,
+)
+from services.anime_cache import anime_detail_cache, parse_fields, format_fields
+from services.catalog import SEASON_SORTS
+from services.response_shaping import get_profile, dumps
+from services.http_caching import finalize, is_fresh, not_modified
+from services.mal_async_client import mal_async_client
+from services.season_listing import season_listings, decode_cursor, CursorError
+from services.singleflight import AsyncSingleFlight, request_key
+from services.resilience import mal_limiter, mal_breaker, upstream_error, UpstreamUnavailable, INTERACTIVE
+
+anime_async_bp = Blueprint('anime_async_routes', __name__)
+
+mal_async_flight = AsyncSingleFlight()
+
+
+async def make_mal_request_async(endpoint, params=None, priority=INTERACTIVE):
+    return await mal_async_flight.do(request_key(endpoint, params), lambda: _mal_get_async(endpoint, params, priority))
+
+
+async def _mal_get_async(endpoint, params, priority):
+    try:
+        # Check the breaker first so an open circuit fails fast without spending a token
+        mal_breaker.before_call()
+        if not mal_limiter.try_acquire():
+            # Only queue on a worker thread when no token is free right away
+            await asyncio.to_thread(mal_limiter.acquire, priority)
+    except UpstreamUnavailable as e:
+        return upstream_error(str(e), 503, e.retry_after)
+
+    headers = {
+        'X-MAL-CLIENT-ID': CLIENT_ID
+    }
+    return await mal_async_client.get_json(endpoint, headers=headers, params=params)
+
+
+def mal_response(result):
+    if isinstance(result, tuple):
+        body, status, headers = result
+        return jsonify(body), status, headers
+    return jsonify(result)
+
+
+def shaped_response(result, profile, listing=True):
+    if isinstance(result, tuple):
+        return mal_response(result)
+    return Response(dumps(shaped_body(result, profile, listing)), mimetype='application/json')
+
+
+async def http_cached(response, policy):
+    if isinstance(response, tuple):
+        return response
+    return finalize(response, policy, request.if_none_match, await response.get_data())
+
+
+async def read_catalog_async(method, *args):
+    # pymongo is blocking, so mirror reads run off the event loop
+    if not config.CATALOG_READS_ENABLED:
+        return None
+    return await asyncio.to_thread(read_catalog, method, *args)
+
+
+async def fetch_anime_details_async(anime_id, fields, use_catalog=True):
+    if use_catalog:
+        result = await read_catalog_async(anime_catalog.get, anime_id, fields)
+        if result is not None:
+            return result
+    cached = anime_detail_cache.get_cached(anime_id, fields, mal_detail_fetcher(anime_id))
+    if cached is not None:
+        return cached
+    normalized = parse_fields(fields)
+    params = {
+        'fields': format_fields(normalized)
+    }
+    result = await make_mal_request_async(f'{MYANIMELIST_API_URL}/{anime_id}', params)
+    if not isinstance(result, tuple):
+        anime_detail_cache.store(anime_id, normalized, result)
+    return result
+
+
+async def _load_listing(endpoint, params, max_items):
+    items = []
+    while len(items) < max_items:
+        page_params = {**params, 'limit': min(500, max_items - len(items)), 'offset': len(items)}
+        result = await make_mal_request_async(endpoint, page_params)
+        if isinstance(result, tuple):
+            return result
+        data = result.get('data', [])
+        items.extend(data)
+        if not data or 'next' not in result.get('paging', {}):
+            break
+    return items
+
+
+@anime_async_bp.route('/anime/search', methods=['GET'])
+async def search_anime():
+    query = request.args.get('q')
+    limit = request.args.get('limit', 10)
+    offset = request.args.get('offset', 0)
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'id,title,mean,num_episodes,genres,synopsis,start_date,end_date,status')
+
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+
+    result = await read_catalog_async(search_index_page, query, limit, offset, fields, MYANIMELIST_API_URL)
+    if result is None:
+        result = await read_catalog_async(anime_catalog.search, query, limit, offset, fields, MYANIMELIST_API_URL)
+    if result is not None:
+        return await http_cached(shaped_response(result, profile), 'search')
+
+    params = {
+        'q': query,
+        'limit': limit,
+        'offset': offset,
+        'fields': fields
+    }
+    result = await make_mal_request_async(MYANIMELIST_API_URL, params)
+    return await http_cached(shaped_response(result, profile), 'search')
+
+
+@anime_async_bp.route('/anime/suggest', methods=['GET'])
+async def suggest_anime():
+    # Answered from memory; registered here so /anime/<anime_id> does not capture it
+    data = suggestions(request.args.get('q', ''), request.args.get('limit', 8, type=int))
+    return with_suggest_headers(jsonify({"data": data}))
+
+
+@anime_async_bp.route('/anime/<anime_id>', methods=['GET'])
+async def get_anime_by_id(anime_id):
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'title,mean,num_episodes,genres,synopsis,start_date,end_date,status')
+    result = await fetch_anime_details_async(anime_id, fields)
+    return await http_cached(shaped_response(result, profile, listing=False), 'detail')
+
+
+@anime_async_bp.route('/anime/batch', methods=['GET', 'POST'])
+async def get_anime_batch():
+    default_fields = 'title,mean,num_episodes,genres,synopsis,start_date,end_date,status'
+    if request.method == 'POST':
+        data = await request.get_json(silent=True) or {}
+        ids = data.get('ids') or []
+        fields = data.get('fields', default_fields)
+    else:
+        ids = request.args.get('ids', '').split(',')
+        fields = request.args.get('fields', default_fields)
+
+    if isinstance(fields, list):
+        fields = ','.join(fields)
+    unique_ids, error = parse_batch_ids(ids)
+    if error:
+        return jsonify({"error": error}), 400
+
+    results = await read_catalog_async(anime_catalog.get_many, unique_ids, fields) or {}
+    semaphore = asyncio.Semaphore(config.ANIME_BATCH_WORKERS)
+
+    async def fetch(anime_id):
+        async with semaphore:
+            return anime_id, await fetch_anime_details_async(anime_id, fields, use_catalog=False)
+
+    errors = {}
+    missing = [anime_id for anime_id in unique_ids if anime_id not in results]
+    for anime_id, result in await asyncio.gather(*(fetch(anime_id) for anime_id in missing)):
+        if isinstance(result, tuple):
+            errors[anime_id] = result[0].get('error')
+        else:
+            results[anime_id] = result
+    response = jsonify({"data": results, "errors": errors})
+    return await http_cached(response, 'detail') if request.method == 'GET' and not errors else response
+
+
+@anime_async_bp.route('/anime/ranking', methods=['GET'])
+async def get_anime_ranking():
+    ranking_type = request.args.get('ranking_type', 'all')
+    limit = str(request.args.get('limit', 10))
+    offset = request.args.get('offset', 0)
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'id,title,mean,num_episodes,genres,status,rank')
+
+    endpoint = f'{MYANIMELIST_API_URL}/ranking'
+    snapshot = ranking_snapshot(ranking_type, limit, offset, fields)
+    if snapshot is not None:
+        etag_params = (fields, int(limit), int(offset), profile and profile.name)
+        etag = snapshot.etag_for(*etag_params)
+        if is_fresh(request.if_none_match, etag):
+            return not_modified(Response, 'listing', etag)
+        body = ranking_snapshot_body(snapshot, ranking_type, limit, offset, fields, endpoint)
+        response = with_snapshot_headers(shaped_response(body, profile), snapshot, *etag_params)
+        return await http_cached(response, 'listing')
+
+    result = await read_catalog_async(anime_catalog.ranking, ranking_type, limit, offset, fields, endpoint)
+    if result is not None:
+        return await http_cached(shaped_response(result, profile), 'listing')
+
+    params = {
+        'ranking_type': ranking_type,
+        'limit': limit,
+        'offset': offset,
+        'fields': fields
+    }
+    result = await make_mal_request_async(endpoint, params)
+    return await http_cached(shaped_response(result, profile), 'listing')
+
+
+@anime_async_bp.route('/anime/season/<int:year>/<season>', methods=['GET'])
+async def get_seasonal_anime(year, season):
+    sort = request.args.get('sort', 'anime_score')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 500))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    cursor = request.args.get('cursor')
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'id,title,mean,num_episodes,genres,status,start_date')
+    min_rating = request.args.get('min_rating', type=float)
+    max_rating = request.args.get('max_rating', type=float)
+    sort_order = request.args.get('sort_order', 'desc')
+
+    query = (year, season, sort, sort_order, min_rating, max_rating, fields)
+    if cursor:
+        try:
+            offset = decode_cursor(cursor, *query)
+        except CursorError as e:
+            return jsonify({"error": str(e)}), 400
+
+    upstream_sort = sort if sort in SEASON_SORTS else 'anime_score'
+    snapshot = season_snapshot(year, season, upstream_sort, fields)
+    etag_params = (*query, limit, offset, profile and profile.name)
+    if snapshot is not None:
+        etag = snapshot.etag_for(*etag_params)
+        if is_fresh(request.if_none_match, etag):
+            return not_modified(Response, 'listing', etag)
+        items = list(snapshot.items)
+    else:
+        load_fields = fields if 'mean' in parse_fields(fields) else f'{fields},mean'
+        # Stale entries are refreshed by the threaded loader, the same one the Flask route uses
+        items = season_listings.get_cached(
+            year, season, upstream_sort, load_fields,
+            lambda normalized_fields: load_full_season(year, season, upstream_sort, normalized_fields)
+        )
+        if items is None:
+            items = await load_full_season_async(year, season, upstream_sort, format_fields(parse_fields(load_fields)))
+            season_listings.store(year, season, upstream_sort, load_fields, items)
+    if not isinstance(items, list):
+        return mal_response(items)
+
+    response = shaped_response(season_page_body(items, query, limit, offset), profile)
+    if snapshot is not None:
+        response = with_snapshot_headers(response, snapshot, *etag_params)
+    return await http_cached(response, 'listing')
+
+
+async def load_full_season_async(year, season, sort, fields):
+    endpoint = f'{MYANIMELIST_API_URL}/season/{year}/{season}'
+    mirrored = await read_catalog_async(
+        anime_catalog.season, year, season, sort, config.SEASON_MAX_ITEMS, 0, fields, endpoint
+    )
+    if mirrored is not None:
+        return mirrored['data']
+    return await _load_listing(endpoint, {'sort': sort, 'fields': fields}, config.SEASON_MAX_ITEMS)
@@ -1,15 +1,34 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 import requests
 import os
 from flasgger import Swagger, swag_from
 import pymongo
+from concurrent.futures import ThreadPoolExecutor
+import config
+from services.mal_client import get_session, get_timeout
+from services.singleflight import SingleFlight, request_key
+from services.resilience import (
+    mal_limiter, mal_breaker, classify_response, upstream_error, UpstreamUnavailable, INTERACTIVE, BACKGROUND
+)
+from services.anime_cache import anime_detail_cache, parse_fields
+from services.catalog import AnimeCatalog, SEASON_SORTS, current_season, next_season
+from services.season_listing import (
+    season_listings, filter_and_sort, page, encode_cursor, decode_cursor, CursorError
+)
+from services.snapshots import snapshot_store, SnapshotLease, SnapshotScheduler, SharedSnapshots, SNAPSHOT_FIELDS
+from services.shared_cache import SharedNamespace, shared_store
+from services.search_index import SearchIndexer, normalize
+from services.response_shaping import PROFILES, get_profile, shape_listing, shape_item, dumps
+from services.http_caching import finalize, is_fresh, not_modified
+from services.cache import TTLCache
+from urllib.parse import urlencode
 
 # Define the Blueprint
 anime_bp = Blueprint('anime_routes', __name__)
 
 # API configuration
 CLIENT_ID = 'dfe48b7bb1e8af63efd5cd846dee89db'
-MYANIMELIST_API_URL = 'https://api.myanimelist.net/v2/anime'
+MYANIMELIST_API_URL = os.getenv('MYANIMELIST_API_URL', 'https://api.myanimelist.net/v2/anime')
 
 
 # Database configuration
@@ -17,18 +36,123 @@ MONGO_URI = os.getenv("MONGO_URL_ONLINE_ANIMESAVER")
 client = pymongo.MongoClient(MONGO_URI)
 db = client['Flask-API']
 users_collection = db['users']
+anime_catalog = AnimeCatalog(db)
+
+# Shared across requests so batch lookups never exceed this many upstream calls at once
+batch_executor = ThreadPoolExecutor(max_workers=config.ANIME_BATCH_WORKERS, thread_name_prefix='mal-batch')
+
+# Helper function to answer a request from the local catalog mirror.
+# Returns None when the mirror is disabled, unavailable or can't answer fully.
+def read_catalog(method, *args):
+    if not config.CATALOG_READS_ENABLED:
+        return None
+    try:
+        return method(*args)
+    except (pymongo.errors.PyMongoError, ValueError):
+        return None
+
+# Title search index over the mirror, rebuilt in the background (see create_app)
+search_indexer = SearchIndexer(anime_catalog.search_documents, config.SEARCH_INDEX_INTERVAL)
+# Suggestions for the hottest prefixes, keyed by index build so a rebuild starts afresh
+suggest_cache = TTLCache(config.SUGGEST_CACHE_MAX_ENTRIES, config.SUGGEST_CACHE_TTL)
+
+# Helper function to answer a search from the in-process index.
+# Any exact, prefix or typo match (trigram similarity of at least
+# SEARCH_FUZZY_THRESHOLD) is answered locally, ranked by match quality and
+# popularity, even when it fills less than a page; only queries with no
+# confident local hit fall back to $text and MAL.
+def search_index_page(query, limit, offset, fields, base_url):
+    limit, offset = int(limit), int(offset)
+    if not config.SEARCH_INDEX_ENABLED:
+        return None
+    end = offset + limit
+    result = search_indexer.index.search(query, end, config.SEARCH_FUZZY_THRESHOLD)
+    if not result.total:
+        return None
+    page_ids = result.ids[offset:end]
+    docs = anime_catalog.get_many(page_ids, fields)
+    if len(docs) < len(page_ids):
+        return None
+    params = {'q': query, 'limit': limit, 'fields': ','.join(sorted(parse_fields(fields)))}
+    paging = {}
+    if result.total > end:
+        paging['next'] = f'{base_url}?{urlencode({**params, "offset": end})}'
+    if offset > 0:
+        paging['previous'] = f'{base_url}?{urlencode({**params, "offset": max(offset - limit, 0)})}'
+    return {'data': [{'node': docs[str(anime_id)]} for anime_id in page_ids], 'paging': paging}
+
+# Concurrent identical upstream calls share one in-flight request
+mal_flight = SingleFlight()
+
+# Helper function to make a request to the MyAnimeList API.
+# Returns the decoded body, or a (body, status, headers) error tuple.
+def make_mal_request(endpoint, params=None, priority=INTERACTIVE):
+    return mal_flight.do(request_key(endpoint, params), lambda: _mal_get(endpoint, params, priority))
+
+def _mal_get(endpoint, params, priority):
+    try:
+        # Check the breaker first so an open circuit fails fast without spending a token
+        mal_breaker.before_call()
+        mal_limiter.acquire(priority)
+    except UpstreamUnavailable as e:
+        return upstream_error(str(e), 503, e.retry_after)
 
-# Helper function to make a request to the MyAnimeList API
-def make_mal_request(endpoint, params=None):
     headers = {
         'X-MAL-CLIENT-ID': CLIENT_ID
     }
     try:
-        response = requests.get(endpoint, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+        response = get_session().get(endpoint, headers=headers, params=params, timeout=get_timeout())
+    except requests.Timeout as e:
+        mal_breaker.record_failure()
+        return upstream_error(str(e), 504)
     except requests.RequestException as e:
-        return {"error": str(e)}, 500
+        mal_breaker.record_failure()
+        return upstream_error(str(e), 502)
+
+    error = classify_response(response.status_code, response.headers, mal_breaker)
+    if error:
+        return error
+    try:
+        return response.json()
+    except ValueError:
+        return upstream_error('MyAnimeList returned an invalid response', 502)
+
+# Helper function to turn a make_mal_request result into a Flask response
+def mal_response(result):
+    if isinstance(result, tuple):
+        body, status, headers = result
+        return jsonify(body), status, headers
+    return jsonify(result)
+
+# Helper function to shape a listing (or, with listing=False, one anime) to the
+# requested field profile; None leaves the MAL-shaped body as it is.
+def shaped_body(body, profile, listing=True):
+    if profile is None:
+        return body
+    return shape_listing(body, profile) if listing else shape_item(body, profile)
+
+# Helper function like mal_response, serializing successful bodies with orjson
+def shaped_response(result, profile, listing=True):
+    if isinstance(result, tuple):
+        return mal_response(result)
+    return Response(dumps(shaped_body(result, profile, listing)), mimetype='application/json')
+
+# Helper function to add Cache-Control and an ETag (a hash of the body unless one
+# is set already) to a successful response, answering 304 when the client's copy is current
+def http_cached(response, policy):
+    if isinstance(response, tuple):
+        return response
+    return finalize(response, policy, request.if_none_match, response.get_data())
+
+PROFILE_PARAMETER = {
+    'name': 'profile',
+    'in': 'query',
+    'type': 'string',
+    'enum': list(PROFILES),
+    'required': False,
+    'description': 'Named field set that replaces `fields` and returns flattened items '
+                   '(`picture` URL, genre names, `next_offset` paging)'
+}
 
 
 @anime_bp.route('/anime/search', methods=['GET'])
@@ -37,6 +161,7 @@ def make_mal_request(endpoint, params=None):
     'summary': 'Search for anime by query string',
     'description': 'Search for anime using a query string. Supports pagination and field selection.',
     'parameters': [
+        PROFILE_PARAMETER,
         {
             'name': 'q',
             'in': 'query',
@@ -88,6 +213,14 @@ def make_mal_request(endpoint, params=None):
         '500': {
             'description': 'Server error',
             'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '502': {
+            'description': 'MyAnimeList failed or timed out (504)',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '503': {
+            'description': 'MyAnimeList is rate limiting or unavailable; see the Retry-After header',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
         }
     }
 })
@@ -97,11 +230,20 @@ def search_anime():
     query = request.args.get('q')
     limit = request.args.get('limit', 10)
     offset = request.args.get('offset', 0)
-    fields = request.args.get('fields', 'id,title,mean,num_episodes,genres,synopsis,start_date,end_date,status')
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'id,title,mean,num_episodes,genres,synopsis,start_date,end_date,status')
 
     if not query:
         return jsonify({"error": "Query parameter 'q' is required"}), 400
 
+    result = read_catalog(search_index_page, query, limit, offset, fields, MYANIMELIST_API_URL)
+    if result is None:
+        result = read_catalog(anime_catalog.search, query, limit, offset, fields, MYANIMELIST_API_URL)
+    if result is not None:
+        return http_cached(shaped_response(result, profile), 'search')
+
     params = {
         'q': query,
         'limit': limit,
@@ -110,7 +252,78 @@ def search_anime():
     }
     endpoint = f'{MYANIMELIST_API_URL}'
     result = make_mal_request(endpoint, params)
-    return jsonify(result)
+    return http_cached(shaped_response(result, profile), 'search')
+
+
+@anime_bp.route('/anime/suggest', methods=['GET'])
+@swag_from({
+    'tags': ['Anime Search'],
+    'summary': 'Suggest anime titles for a typed prefix',
+    'description': 'Typeahead over the local catalog: the most popular anime with a title, alternative title or '
+                   'synonym word starting with the prefix. Answered from memory and never calls MyAnimeList, so '
+                   'results may be empty until the catalog is synced. Responses are cacheable for SUGGEST_MAX_AGE '
+                   'seconds.',
+    'parameters': [
+        {
+            'name': 'q',
+            'in': 'query',
+            'type': 'string',
+            'required': True,
+            'description': 'Prefix typed so far'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'default': 8,
+            'description': 'Number of suggestions (at most 20)'
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'Suggestions, most popular first',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'data': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'id': {'type': 'integer'},
+                                'title': {'type': 'string'},
+                                'main_picture': {
+                                    'type': 'object',
+                                    'properties': {'medium': {'type': 'string'}}
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+})
+def suggest_anime():
+    data = suggestions(request.args.get('q', ''), request.args.get('limit', 8, type=int))
+    return with_suggest_headers(jsonify({"data": data}))
+
+# Helper function shared with the async route: suggestions through the hot-prefix cache
+def suggestions(prefix, limit):
+    prefix = normalize(prefix)
+    limit = max(1, min(limit, 20))
+    index = search_indexer.index
+    key = (index.built_at, prefix, limit)
+    data = suggest_cache.get(key)
+    if data is None:
+        data = index.suggest(prefix, limit) if config.SEARCH_INDEX_ENABLED else []
+        suggest_cache.set(key, data)
+    return data
+
+def with_suggest_headers(response):
+    # Lets the browser answer repeated keystrokes (e.g. after a backspace) itself
+    response.headers['Cache-Control'] = f'public, max-age={config.SUGGEST_MAX_AGE}'
+    return response
 
 
 @anime_bp.route('/anime/<anime_id>', methods=['GET'])
@@ -119,6 +332,7 @@ def search_anime():
     'summary': 'Get anime details by ID',
     'description': 'Retrieve detailed information about a specific anime using its ID.',
     'parameters': [
+        PROFILE_PARAMETER,
         {
             'name': 'anime_id',
             'in': 'path',
@@ -162,17 +376,264 @@ def search_anime():
         '500': {
             'description': 'Server error',
             'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '502': {
+            'description': 'MyAnimeList failed or timed out (504)',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '503': {
+            'description': 'MyAnimeList is rate limiting or unavailable; see the Retry-After header',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
         }
     }
 })
 def get_anime_by_id(anime_id):
-    fields = request.args.get('fields', 'title,mean,num_episodes,genres,synopsis,start_date,end_date,status')
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'title,mean,num_episodes,genres,synopsis,start_date,end_date,status')
+    result = fetch_anime_details(anime_id, fields)
+    return http_cached(shaped_response(result, profile, listing=False), 'detail')
+
+
+def mal_detail_fetcher(anime_id):
     endpoint = f'{MYANIMELIST_API_URL}/{anime_id}'
-    params = {
-        'fields': fields
+
+    def fetch(normalized_fields):
+        params = {
+            'fields': normalized_fields
+        }
+        return make_mal_request(endpoint, params)
+
+    return fetch
+
+
+def fetch_anime_details(anime_id, fields):
+    """Return MAL details for one anime from the catalog mirror or the detail cache."""
+    result = read_catalog(anime_catalog.get, anime_id, fields)
+    if result is not None:
+        return result
+    return anime_detail_cache.get_or_fetch(anime_id, fields, mal_detail_fetcher(anime_id))
+
+
+def parse_batch_ids(ids):
+    """Validate and deduplicate batch IDs, keeping the caller's order. Returns ``(ids, error)``."""
+    if not isinstance(ids, list):
+        return None, "'ids' must be a list"
+    unique_ids = list(dict.fromkeys(str(anime_id).strip() for anime_id in ids if str(anime_id).strip()))
+    if not unique_ids:
+        return None, "At least one anime ID is required"
+    if not all(anime_id.isdigit() for anime_id in unique_ids):
+        return None, "Anime IDs must be integers"
+    if len(unique_ids) > config.ANIME_BATCH_MAX_IDS:
+        return None, f"At most {config.ANIME_BATCH_MAX_IDS} IDs can be requested at once"
+    return unique_ids, None
+
+
+def fetch_anime_details_many(anime_ids, fields):
+    """Return ``(results, errors)`` dicts keyed by anime ID.
+
+    Entries in the catalog mirror or the detail cache are answered inline;
+    misses are fetched concurrently on the shared batch executor.
+    """
+    results = read_catalog(anime_catalog.get_many, anime_ids, fields) or {}
+    errors = {}
+    futures = {}
+    for anime_id in anime_ids:
+        anime_id = str(anime_id)
+        if anime_id in results:
+            continue
+        fetch = mal_detail_fetcher(anime_id)
+        cached = anime_detail_cache.get_cached(anime_id, fields, fetch)
+        if cached is not None:
+            results[anime_id] = cached
+        else:
+            futures[anime_id] = batch_executor.submit(anime_detail_cache.fetch_and_store, anime_id, fields, fetch)
+
+    for anime_id, future in futures.items():
+        result = future.result()
+        if isinstance(result, tuple):
+            errors[anime_id] = result[0].get('error')
+        else:
+            results[anime_id] = result
+    return results, errors
+
+
+@anime_bp.route('/anime/batch', methods=['GET', 'POST'])
+@swag_from({
+    'tags': ['Anime Search'],
+    'summary': 'Get details for many anime at once',
+    'description': 'Retrieve details for a list of anime IDs in one request. IDs are deduplicated, '
+                   'served from cache where possible and fetched from MyAnimeList concurrently otherwise. '
+                   'Send a JSON body on POST, or use the `ids` and `fields` query parameters on GET.',
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': False,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'ids': {'type': 'array', 'items': {'type': 'integer'}},
+                    'fields': {
+                        'type': 'array',
+                        'items': {'type': 'string'},
+                        'description': 'Fields to include, as a list or a comma-separated string'
+                    }
+                },
+                'required': ['ids']
+            }
+        },
+        {
+            'name': 'ids',
+            'in': 'query',
+            'type': 'string',
+            'description': 'Comma-separated list of anime IDs (GET only)'
+        },
+        {
+            'name': 'fields',
+            'in': 'query',
+            'type': 'string',
+            'default': 'title,mean,num_episodes,genres,synopsis,start_date,end_date,status',
+            'description': 'Comma-separated list of fields to include in the response (GET only)'
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'Anime details keyed by ID, plus any per-ID errors',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'data': {'type': 'object'},
+                    'errors': {'type': 'object'}
+                }
+            }
+        },
+        '400': {
+            'description': 'Invalid input',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        }
     }
-    result = make_mal_request(endpoint, params)
-    return jsonify(result)
+})
+def get_anime_batch():
+    default_fields = 'title,mean,num_episodes,genres,synopsis,start_date,end_date,status'
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids') or []
+        fields = data.get('fields', default_fields)
+    else:
+        ids = request.args.get('ids', '').split(',')
+        fields = request.args.get('fields', default_fields)
+
+    if isinstance(fields, list):
+        fields = ','.join(fields)
+    unique_ids, error = parse_batch_ids(ids)
+    if error:
+        return jsonify({"error": error}), 400
+
+    results, errors = fetch_anime_details_many(unique_ids, fields)
+    response = jsonify({"data": results, "errors": errors})
+    # POST bodies and partial failures are not cacheable; a complete GET is cached like a detail lookup
+    return http_cached(response, 'detail') if request.method == 'GET' and not errors else response
+
+
+@anime_bp.route('/anime/cache/stats', methods=['GET'])
+@swag_from({
+    'tags': ['Anime Search'],
+    'summary': 'Get anime detail cache statistics',
+    'description': 'Return size, hit, stale hit, miss and eviction counters for the anime detail cache of this worker.',
+    'responses': {
+        '200': {
+            'description': 'Cache statistics',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'size': {'type': 'integer'},
+                    'max_entries': {'type': 'integer'},
+                    'hits': {'type': 'integer'},
+                    'stale_hits': {'type': 'integer'},
+                    'misses': {'type': 'integer'},
+                    'evictions': {'type': 'integer'}
+                }
+            }
+        }
+    }
+})
+def get_anime_cache_stats():
+    return jsonify(anime_detail_cache.stats())
+
+
+@anime_bp.route('/anime/search/stats', methods=['GET'])
+@swag_from({
+    'tags': ['Anime Search'],
+    'summary': 'Get search index statistics',
+    'description': 'Return the number of anime and terms in this worker\'s in-process title search index and its age in seconds.',
+    'responses': {
+        '200': {
+            'description': 'Search index statistics',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'anime': {'type': 'integer'},
+                    'terms': {'type': 'integer'},
+                    'age': {'type': 'number'}
+                }
+            }
+        }
+    }
+})
+def get_search_index_stats():
+    return jsonify(search_indexer.index.stats())
+
+
+@anime_bp.route('/anime/upstream/stats', methods=['GET'])
+@swag_from({
+    'tags': ['Anime Search'],
+    'summary': 'Get MyAnimeList upstream statistics',
+    'description': 'Return request coalescing, rate limiter and circuit breaker state for MyAnimeList calls made by this worker.',
+    'responses': {
+        '200': {
+            'description': 'Upstream statistics',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'coalescing': {
+                        'type': 'object',
+                        'properties': {
+                            'executed': {'type': 'integer'},
+                            'collapsed': {'type': 'integer'},
+                            'in_flight': {'type': 'integer'}
+                        }
+                    },
+                    'rate_limiter': {
+                        'type': 'object',
+                        'properties': {
+                            'tokens': {'type': 'number'},
+                            'waiting': {'type': 'integer'},
+                            'granted': {'type': 'integer'},
+                            'rejected': {'type': 'integer'}
+                        }
+                    },
+                    'circuit_breaker': {
+                        'type': 'object',
+                        'properties': {
+                            'state': {'type': 'string'},
+                            'consecutive_failures': {'type': 'integer'},
+                            'short_circuited': {'type': 'integer'},
+                            'retry_in': {'type': 'number'}
+                        }
+                    }
+                }
+            }
+        }
+    }
+})
+def get_upstream_stats():
+    return jsonify({
+        "coalescing": mal_flight.stats(),
+        "rate_limiter": mal_limiter.stats(),
+        "circuit_breaker": mal_breaker.stats()
+    })
 
 
 @anime_bp.route('/anime/ranking', methods=['GET'])
@@ -181,6 +642,7 @@ def get_anime_by_id(anime_id):
     'summary': 'Get anime ranking',
     'description': 'Retrieve a list of top-ranked anime based on the selected ranking type.',
     'parameters': [
+        PROFILE_PARAMETER,
         {
             'name': 'ranking_type',
             'in': 'query',
@@ -228,14 +690,41 @@ def get_anime_by_id(anime_id):
         '500': {
             'description': 'Server error',
             'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '502': {
+            'description': 'MyAnimeList failed or timed out (504)',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '503': {
+            'description': 'MyAnimeList is rate limiting or unavailable; see the Retry-After header',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
         }
     }
 })
 def get_anime_ranking():
     ranking_type = request.args.get('ranking_type', 'all')
-    limit = request.args.get('limit', 10)
+    limit = str(request.args.get('limit', 10))
     offset = request.args.get('offset', 0)
-    fields = request.args.get('fields', 'id,title,mean,num_episodes,genres,status,rank')
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'id,title,mean,num_episodes,genres,status,rank')
+
+    endpoint = f'{MYANIMELIST_API_URL}/ranking'
+    snapshot = ranking_snapshot(ranking_type, limit, offset, fields)
+    if snapshot is not None:
+        etag_params = (fields, int(limit), int(offset), profile and profile.name)
+        # The snapshot already identifies the page, so a current client copy skips building it
+        etag = snapshot.etag_for(*etag_params)
+        if is_fresh(request.if_none_match, etag):
+            return not_modified(Response, 'listing', etag)
+        body = ranking_snapshot_body(snapshot, ranking_type, limit, offset, fields, endpoint)
+        response = with_snapshot_headers(shaped_response(body, profile), snapshot, *etag_params)
+        return http_cached(response, 'listing')
+
+    result = read_catalog(anime_catalog.ranking, ranking_type, limit, offset, fields, endpoint)
+    if result is not None:
+        return http_cached(shaped_response(result, profile), 'listing')
 
     params = {
         'ranking_type': ranking_type,
@@ -243,9 +732,8 @@ def get_anime_ranking():
         'offset': offset,
         'fields': fields
     }
-    endpoint = f'{MYANIMELIST_API_URL}/ranking'
     result = make_mal_request(endpoint, params)
-    return jsonify(result)
+    return http_cached(shaped_response(result, profile), 'listing')
 
 @anime_bp.route('/anime/season/<int:year>/<season>', methods=['GET'])
 @swag_from({
@@ -253,6 +741,7 @@ def get_anime_ranking():
     'summary': 'Get seasonal anime',
     'description': 'Retrieve a list of anime released in a specific season and year.',
     'parameters': [
+        PROFILE_PARAMETER,
         {
             'name': 'year',
             'in': 'path',
@@ -302,6 +791,12 @@ def get_anime_ranking():
             'default': 'id,title,mean,num_episodes,genres,status,start_date',
             'description': 'Comma-separated list of fields to include in the response'
         },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'type': 'string',
+            'description': 'Opaque continuation cursor from paging.next_cursor; overrides offset'
+        },
         {
             'name': 'min_rating',
             'in': 'query',
@@ -328,49 +823,206 @@ def get_anime_ranking():
                         'items': {
                             'type': 'object'
                         }
+                    },
+                    'paging': {
+                        'type': 'object',
+                        'properties': {
+                            'total': {'type': 'integer'},
+                            'next_cursor': {'type': 'string'},
+                            'previous_cursor': {'type': 'string'}
+                        }
                     }
                 }
             }
         },
+        '400': {
+            'description': 'Invalid cursor',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
         '500': {
             'description': 'Server error',
             'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '502': {
+            'description': 'MyAnimeList failed or timed out (504)',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+        },
+        '503': {
+            'description': 'MyAnimeList is rate limiting or unavailable; see the Retry-After header',
+            'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
         }
     }
 })
 def get_seasonal_anime(year, season):
     sort = request.args.get('sort', 'anime_score')
-    limit = request.args.get('limit', 10)
-    offset = request.args.get('offset', 0)
-    fields = request.args.get('fields', 'id,title,mean,num_episodes,genres,status,start_date')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 500))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    cursor = request.args.get('cursor')
+    profile, error = get_profile(request.args.get('profile'))
+    if error:
+        return jsonify({"error": error}), 400
+    fields = profile.fields if profile else request.args.get('fields', 'id,title,mean,num_episodes,genres,status,start_date')
     min_rating = request.args.get('min_rating', type=float)
     max_rating = request.args.get('max_rating', type=float)
     sort_order = request.args.get('sort_order', 'desc')
 
-    params = {
-        'sort': sort,
-        'limit': limit,
-        'offset': offset,
-        'fields': fields
+    query = (year, season, sort, sort_order, min_rating, max_rating, fields)
+    if cursor:
+        try:
+            offset = decode_cursor(cursor, *query)
+        except CursorError as e:
+            return jsonify({"error": str(e)}), 400
+
+    # Pull the whole season once so filters and the mean re-sort see every
+    # title, not just the page MAL happened to return.
+    upstream_sort = sort if sort in SEASON_SORTS else 'anime_score'
+    snapshot = season_snapshot(year, season, upstream_sort, fields)
+    etag_params = (*query, limit, offset, profile and profile.name)
+    if snapshot is not None:
+        etag = snapshot.etag_for(*etag_params)
+        # Skip filtering, sorting and serializing when the client's page is current
+        if is_fresh(request.if_none_match, etag):
+            return not_modified(Response, 'listing', etag)
+        items = list(snapshot.items)
+    else:
+        load_fields = fields if 'mean' in parse_fields(fields) else f'{fields},mean'
+        items = season_listings.get(
+            year, season, upstream_sort, load_fields,
+            lambda normalized_fields: load_full_season(year, season, upstream_sort, normalized_fields)
+        )
+    if not isinstance(items, list):
+        return mal_response(items)
+
+    response = shaped_response(season_page_body(items, query, limit, offset), profile)
+    if snapshot is not None:
+        response = with_snapshot_headers(response, snapshot, *etag_params)
+    return http_cached(response, 'listing')
+
+
+def ranking_snapshot(ranking_type, limit, offset, fields):
+    """Return the ranking snapshot when it can answer the page, else None."""
+    snapshot = snapshot_store.get(('ranking', ranking_type))
+    if snapshot is None or not snapshot.covers(fields) or not str(limit).isdigit() or not str(offset).isdigit():
+        return None
+    limit, offset = int(limit), int(offset)
+    # A snapshot shorter than its depth holds the whole listing, so any page can be answered
+    if offset + limit > len(snapshot.items) and len(snapshot.items) >= config.SNAPSHOT_RANKING_DEPTH:
+        return None
+    return snapshot
+
+
+def ranking_snapshot_body(snapshot, ranking_type, limit, offset, fields, endpoint):
+    limit, offset = int(limit), int(offset)
+    paging = {}
+    if offset + limit < len(snapshot.items):
+        params = {'ranking_type': ranking_type, 'limit': limit, 'offset': offset + limit, 'fields': fields}
+        paging['next'] = f'{endpoint}?{urlencode(params)}'
+    return {'data': snapshot.page(fields, limit, offset), 'paging': paging}
+
+
+def season_snapshot(year, season, upstream_sort, fields):
+    snapshot = snapshot_store.get(('season', year, season))
+    if upstream_sort == 'anime_score' and snapshot is not None and snapshot.covers(fields):
+        return snapshot
+    return None
+
+
+def season_page_body(items, query, limit, offset):
+    """Filter and sort a whole season, then cut out one page with continuation cursors."""
+    year, season, sort, sort_order, min_rating, max_rating, fields = query
+    items = filter_and_sort(items, min_rating, max_rating, sort, sort_order)
+    paging = {'total': len(items)}
+    if offset + limit < len(items):
+        paging['next_cursor'] = encode_cursor(offset + limit, *query)
+    if offset > 0:
+        paging['previous_cursor'] = encode_cursor(max(offset - limit, 0), *query)
+    return {
+        'data': page(items, fields, limit, offset),
+        'paging': paging,
+        'season': {'year': year, 'season': season}
     }
-    
-    endpoint = f'{MYANIMELIST_API_URL}/season/{year}/{season}'
-    result = make_mal_request(endpoint, params)
 
-    # Filter results based on min_rating and max_rating if provided
-    if min_rating is not None or max_rating is not None:
-        filtered_data = []
-        for item in result.get('data', []):
-            rating = item.get('node', {}).get('mean', 0)
-            if (min_rating is None or rating >= min_rating) and (max_rating is None or rating <= max_rating):
-                filtered_data.append(item)
-        result['data'] = filtered_data
 
-    # Sort results based on sort_order if applicable
-    if sort == 'mean':
-        result['data'].sort(key=lambda x: x['node'].get('mean', 0), reverse=(sort_order == 'desc'))
+def load_ranking(ranking_type, max_items, fields, priority=INTERACTIVE):
+    """Return the top `max_items` of a MAL ranking, or the error tuple of the failing request."""
+    endpoint = f'{MYANIMELIST_API_URL}/ranking'
+    items = []
+    while len(items) < max_items:
+        params = {
+            'ranking_type': ranking_type,
+            'limit': min(500, max_items - len(items)),
+            'offset': len(items),
+            'fields': fields
+        }
+        result = make_mal_request(endpoint, params, priority)
+        if isinstance(result, tuple):
+            return result
+        data = result.get('data', [])
+        items.extend(data)
+        if not data or 'next' not in result.get('paging', {}):
+            break
+    return items
 
-    return jsonify(result)
+
+def with_snapshot_headers(response, snapshot, *params):
+    response.headers['ETag'] = f'"{snapshot.etag_for(*params)}"'
+    response.headers['X-Snapshot-Generation'] = str(snapshot.generation)
+    return response
+
+
+def snapshot_targets():
+    targets = {}
+    for ranking_type in config.SNAPSHOT_RANKING_TYPES:
+        targets[('ranking', ranking_type)] = (
+            lambda ranking_type=ranking_type: load_ranking(ranking_type, config.SNAPSHOT_RANKING_DEPTH, SNAPSHOT_FIELDS, BACKGROUND)
+        )
+    for year, season in (current_season(), next_season()):
+        targets[('season', year, season)] = (
+            lambda year=year, season=season: load_full_season(year, season, 'anime_score', SNAPSHOT_FIELDS, BACKGROUND)
+        )
+    return targets
+
+
+def snapshot_scheduler_for(store):
+    """One builder per deployment when `store` is shared across workers, else one per worker."""
+    if store is None:
+        return SnapshotScheduler(snapshot_store, snapshot_targets, config.SNAPSHOT_INTERVAL)
+    state = db['snapshot_state']
+    # Published snapshots outlive a lapsed lease long enough for the next holder to rebuild
+    shared = SharedNamespace('snapshots', 2 * config.SNAPSHOT_INTERVAL + config.SNAPSHOT_LEASE_TTL, store=store)
+    return SnapshotScheduler(
+        snapshot_store, snapshot_targets, config.SNAPSHOT_INTERVAL,
+        lease=SnapshotLease(state, config.SNAPSHOT_LEASE_TTL), shared=SharedSnapshots(shared, state),
+        poll_interval=config.SNAPSHOT_POLL_INTERVAL,
+    )
+
+
+snapshot_scheduler = snapshot_scheduler_for(shared_store())
+
+
+def load_full_season(year, season, sort, fields, priority=INTERACTIVE):
+    """Return every item MAL lists for a season, or the error tuple of the failing request."""
+    endpoint = f'{MYANIMELIST_API_URL}/season/{year}/{season}'
+    mirrored = read_catalog(anime_catalog.season, year, season, sort, config.SEASON_MAX_ITEMS, 0, fields, endpoint)
+    if mirrored is not None:
+        return mirrored['data']
+
+    items = []
+    while len(items) < config.SEASON_MAX_ITEMS:
+        params = {
+            'sort': sort,
+            'limit': 500,
+            'offset': len(items),
+            'fields': fields
+        }
+        result = make_mal_request(endpoint, params, priority)
+        if isinstance(result, tuple):
+            return result
+        data = result.get('data', [])
+        items.extend(data)
+        if not data or 'next' not in result.get('paging', {}):
+            break
+    return items
 
 # @anime_bp.route('/anime/suggestions', methods=['GET'])
 # @swag_from({
@@ -1,11 +1,58 @@
 # routes/share_routes.py
 from flask import Blueprint, request, jsonify
-import uuid
+from bson.objectid import ObjectId
+import config
+from routes.user_routes import get_watchlist, render_watchlist, WATCHLIST_SORT_FIELDS
+from services import user_projections
+from services.share_store import share_store, share_content, rendered_share_cache, LIVE
+from services.watchlist_store import VERSION_FIELD
 
 share_bp = Blueprint('share', __name__)
 
-# Example in-memory store (replace with database in production)
-shareable_links_db = {}
+# Anime fields hydrated into live shared lists
+SHARE_FIELDS = 'id,title,mean,num_episodes,genres,start_date,status'
+
+def get_mongo():
+    from app import mongo
+    return mongo
+
+def parse_share_spec(data):
+    """Validate the filter/sort spec of a live share. Returns ``(spec, error)``."""
+    spec = {
+        'status': data.get('status', 'all'),
+        'min_rating': data.get('min_rating'),
+        'sort': data.get('sort', 'added'),
+        'order': data.get('order', 'asc'),
+    }
+    if spec['status'] not in ('all', 'watched', 'unwatched'):
+        return None, "status must be all, watched or unwatched"
+    if spec['sort'] not in WATCHLIST_SORT_FIELDS:
+        return None, "sort must be one of " + ", ".join(WATCHLIST_SORT_FIELDS)
+    if spec['order'] not in ('asc', 'desc'):
+        return None, "order must be asc or desc"
+    if spec['min_rating'] in ('', None):
+        spec['min_rating'] = None
+    else:
+        try:
+            spec['min_rating'] = float(spec['min_rating'])
+        except (TypeError, ValueError):
+            return None, "min_rating must be a number"
+    return spec, None
+
+def render_live_share(link_id, share):
+    """Return ``(owner, version, items)`` for a live share, or None if the owner is gone."""
+    mongo = get_mongo()
+    owner = mongo.db.users.find_one({"_id": ObjectId(share['userId'])}, user_projections.SHARE_OWNER)
+    if owner is None:
+        return None
+    version = owner.get(VERSION_FIELD, 0)
+    key = (link_id, version)
+    items = rendered_share_cache.get(key)
+    if items is None:
+        entries = get_watchlist().entries(share['userId']) or []
+        items, _ = render_watchlist(entries, SHARE_FIELDS, **share['spec'])
+        rendered_share_cache.set(key, items)
+    return owner, version, items
 
 @share_bp.route('/share-list', methods=['POST'])
 def share_list():
@@ -13,23 +60,50 @@ def share_list():
     user_id = data.get('userId')
     anime_list = data.get('animeList')
 
-    # Generate a unique identifier for the shareable link
-    link_id = str(uuid.uuid4())
-    shareable_link = f"http://localhost:5173/shared-list/{link_id}"
+    if data.get('mode') == LIVE or anime_list is None:
+        # Live share: store a reference to the owner's watchlist, not a copy
+        if not user_id or not ObjectId.is_valid(user_id):
+            return jsonify({"error": "A valid userId is required"}), 400
+        spec, error = parse_share_spec(data)
+        if error:
+            return jsonify({"error": error}), 400
+        content = share_content(user_id, spec=spec)
+    else:
+        content = share_content(user_id, anime_list)
 
-    # Save the link_id and associated data
-    shareable_links_db[link_id] = {
-        'userId': user_id,
-        'animeList': anime_list
-    }
+    # Sharing the same list again returns the same link
+    link_id = share_store(get_mongo().db).create(content)
+    shareable_link = f"{config.SHARE_LINK_BASE_URL}/{link_id}"
 
     return jsonify({"link": shareable_link})
 
 @share_bp.route('/shared-list/<link_id>', methods=['GET'])
 def get_shared_list(link_id):
     # Retrieve the shared data from the store
-    data = shareable_links_db.get(link_id)
-    if data:
+    data = share_store(get_mongo().db).get(link_id)
+    if not data:
+        return jsonify({"error": "Link not found"}), 404
+    if data['kind'] != LIVE:
         return jsonify(data)
-    else:
+
+    page = max(1, request.args.get('page', 1, type=int))
+    limit = max(1, min(request.args.get('limit', 21, type=int), 100))
+    rendered = render_live_share(link_id, data)
+    if rendered is None:
         return jsonify({"error": "Link not found"}), 404
+    owner, version, items = rendered
+    offset = (page - 1) * limit
+    return jsonify({
+        "kind": LIVE,
+        "userId": data['userId'],
+        "userName": owner.get('userName'),
+        "spec": data['spec'],
+        "version": version,
+        "animeList": items[offset:offset + limit],
+        "paging": {
+            "page": page,
+            "limit": limit,
+            "total": len(items),
+            "total_pages": (len(items) + limit - 1) // limit
+        }
+    })
@@ -1,9 +1,22 @@
-from flask import Blueprint, jsonify, request
-import bcrypt
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 from flasgger import swag_from
 from app import mongo
 import requests
+import itertools
+import time
+import config
+from routes.anime_routes import fetch_anime_details_many
+from services.anime_cache import parse_fields, field_name
+from services.watchlist_io import (
+    BulkError, EXPORT_COLUMNS, parse_bulk_request, parse_mal_xml, export_ndjson, export_csv,
+)
+from services import user_projections
+from services.passwords import password_hasher, PasswordHasherBusy
+from services.auth_tokens import issue_tokens, verify, cached_is_admin, role_cache, TokenError, REFRESH
+from services.watchlist_store import watchlist_store, DUPLICATE, UPDATED, NO_USER, VERSION_FIELD
+from services.http_caching import finalize, is_fresh, not_modified, version_etag
 
 bp = Blueprint('user_routes', __name__)
 
@@ -11,6 +24,12 @@ def get_mongo():
     from app import mongo
     return mongo
 
+def get_watchlist():
+    return watchlist_store(get_mongo().db)
+
+USERS_PAGE_MAX_LIMIT = 1000
+USERS_STREAM_BATCH = 500
+
 # API configuration
 CLIENT_ID = 'dfe48b7bb1e8af63efd5cd846dee89db'
 MYANIMELIST_API_URL = 'https://api.myanimelist.net/v2/anime'
@@ -42,6 +61,10 @@ MYANIMELIST_API_URL = 'https://api.myanimelist.net/v2/anime'
         '400': {
             'description': 'Bad request',
             'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        },
+        '503': {
+            'description': 'Password hashing is saturated; retry after the Retry-After header',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
         }
     }
 })
@@ -59,16 +82,10 @@ def register():
         return jsonify({"message": "Missing required fields"}), 400
 
     mongo = get_mongo()
-    # Check if username or email already exists
-    existing_user = mongo.db.users.find_one({"$or": [{"userName": user_name}, {"userEmail": user_email}]})
-    if existing_user:
-        if existing_user.get('userName') == user_name:
-            return jsonify({"message": "Username already exists"}), 400
-        if existing_user.get('userEmail') == user_email:
-            return jsonify({"message": "Email already exists"}), 400
-
-    # If no existing user is found, proceed to create a new user
-    hashed_password = bcrypt.hashpw(user_password.encode('utf-8'), bcrypt.gensalt())
+    try:
+        hashed_password = password_hasher.hash(user_password)
+    except PasswordHasherBusy as e:
+        return password_busy(e)
     
     user = {
         "userName": user_name,
@@ -77,7 +94,11 @@ def register():
         "savedList": [],
         "isAdmin": is_admin
     }
-    mongo.db.users.insert_one(user)
+    # The unique userName/userEmail indexes reject taken names atomically
+    try:
+        mongo.db.users.insert_one(user)
+    except DuplicateKeyError as e:
+        return jsonify({"message": duplicate_user_message(e)}), 400
     return jsonify({"message": "User registered successfully!"}), 201
 
 @bp.route('/login', methods=['POST'])
@@ -100,11 +121,23 @@ def register():
     'responses': {
         '200': {
             'description': 'Login successful',
-            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}, 'isAdmin': {'type': 'boolean'}}}
+            'schema': {'type': 'object', 'properties': {
+                'message': {'type': 'string'},
+                'userId': {'type': 'string'},
+                'isAdmin': {'type': 'boolean'},
+                'access_token': {'type': 'string'},
+                'refresh_token': {'type': 'string'},
+                'token_type': {'type': 'string'},
+                'expires_in': {'type': 'integer'}
+            }}
         },
         '401': {
             'description': 'Invalid email or password',
             'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        },
+        '503': {
+            'description': 'Password hashing is saturated; retry after the Retry-After header',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
         }
     }
 })
@@ -114,11 +147,92 @@ def login():
     user_password = data.get('userPassword')
 
     mongo = get_mongo()
-    user = mongo.db.users.find_one({"userEmail": user_email})
-    if user and bcrypt.checkpw(user_password.encode('utf-8'), user['userPassword']):
-        return jsonify({"message": "Login successful!", "userId": str(user["_id"])}), 200
+    user = mongo.db.users.find_one({"userEmail": user_email}, user_projections.LOGIN)
+    if not user:
+        return jsonify({"message": "Invalid email or password!"}), 401
+    try:
+        valid = password_hasher.check(user_password, user['userPassword'])
+    except PasswordHasherBusy as e:
+        return password_busy(e)
+    if valid:
+        if password_hasher.needs_rehash(user['userPassword']):
+            # BCRYPT_ROUNDS changed since this hash was made; upgrade it unless it changed meanwhile
+            users, old_hash = mongo.db.users, user['userPassword']
+            password_hasher.rehash_later(user_password, lambda new_hash: users.update_one(
+                {"_id": user["_id"], "userPassword": old_hash}, {"$set": {"userPassword": new_hash}}
+            ))
+        is_admin = bool(user.get('isAdmin', False))
+        role_cache.set(('id', str(user["_id"])), is_admin)
+        return jsonify({
+            "message": "Login successful!",
+            "userId": str(user["_id"]),
+            "isAdmin": is_admin,
+            **issue_tokens(user["_id"], is_admin)
+        }), 200
     return jsonify({"message": "Invalid email or password!"}), 401
 
+@bp.route('/token/refresh', methods=['POST'])
+@swag_from({
+    'tags': ['User'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'refresh_token': {'type': 'string'}
+                },
+                'required': ['refresh_token']
+            }
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'A new access and refresh token pair',
+            'schema': {'type': 'object', 'properties': {
+                'access_token': {'type': 'string'},
+                'refresh_token': {'type': 'string'},
+                'token_type': {'type': 'string'},
+                'expires_in': {'type': 'integer'}
+            }}
+        },
+        '401': {
+            'description': 'Invalid or expired refresh token, or the user no longer exists',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        }
+    }
+})
+def refresh_token():
+    data = request.get_json(silent=True) or {}
+    try:
+        claims = verify(data.get('refresh_token') or '', REFRESH)
+    except TokenError as e:
+        return jsonify({"message": str(e)}), 401
+
+    user_id = claims['sub']
+    mongo = get_mongo()
+
+    def load_role():
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, user_projections.ADMIN_CHECK)
+        return bool(user.get('isAdmin', False)) if user else None
+
+    # Re-reading the role here is what lets admin changes reach new access tokens
+    is_admin = cached_is_admin(('id', user_id), load_role)
+    if is_admin is None:
+        return jsonify({"message": "User not found"}), 401
+    return jsonify(issue_tokens(user_id, is_admin)), 200
+
+def password_busy(error):
+    return jsonify({"message": str(error)}), 503, {"Retry-After": str(error.retry_after)}
+
+def duplicate_user_message(error):
+    """Name the field whose unique index rejected a user insert or update."""
+    key_pattern = (error.details or {}).get('keyPattern') or {}
+    if 'userName' in key_pattern or 'userName_unique' in str(error):
+        return "Username already exists"
+    return "Email already exists"
+
 def serialize_document(doc):
     """Helper function to serialize MongoDB documents."""
     doc["_id"] = str(doc["_id"])  # Ensure _id is serialized as a string
@@ -163,35 +277,88 @@ def serialize_document(doc):
 def get_user(user_id):
     try:
         mongo = get_mongo()
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-        if user:
-            return jsonify(serialize_document(user))
-        return jsonify({"message": "User not found!"}), 404
+        # Profile fields and the watchlist version decide the ETag, so an
+        # unchanged user is answered with a 304 before the watchlist is read
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, user_projections.PROFILE_VERSION)
+        if not user:
+            return jsonify({"message": "User not found!"}), 404
+        version = user.pop(VERSION_FIELD, 0)
+        etag = version_etag(serialize_document(user), version)
+        if is_fresh(request.if_none_match, etag):
+            return not_modified(Response, 'private', etag)
+        user["savedList"] = get_watchlist().entries(user_id) or []
+        return finalize(jsonify(user), 'private', request.if_none_match, etag=etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @bp.route('/users', methods=['GET'])
 @swag_from({
     'tags': ['User'],
+    'produces': ['application/json', 'application/x-ndjson'],
+    'parameters': [
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'default': 100,
+            'description': 'Users per page (max 1000); ignored for ndjson'
+        },
+        {
+            'name': 'after',
+            'in': 'query',
+            'type': 'string',
+            'description': 'Return users whose _id sorts after this one (paging.next_after of the previous page)'
+        },
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'default': 'json',
+            'description': 'json for one page, ndjson to stream every user from `after` onwards'
+        },
+        {
+            'name': 'watchlist',
+            'in': 'query',
+            'type': 'boolean',
+            'default': False,
+            'description': 'Include each user\'s savedList'
+        }
+    ],
     'responses': {
         '200': {
-            'description': 'List of all users',
+            'description': 'One page of users, ordered by _id',
             'schema': {
-                'type': 'array',
-                'items': {
-                    'type': 'object',
-                    'properties': {
-                        'userName': {'type': 'string'},
-                        'userEmail': {'type': 'string'},
-                        'savedList': {
-                            'type': 'array',
-                            'items': {'type': 'string'}
-                        },
-                        '_id': {'type': 'string'}
+                'type': 'object',
+                'properties': {
+                    'data': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'userName': {'type': 'string'},
+                                'userEmail': {'type': 'string'},
+                                'savedList': {
+                                    'type': 'array',
+                                    'items': {'type': 'string'}
+                                },
+                                '_id': {'type': 'string'}
+                            }
+                        }
+                    },
+                    'paging': {
+                        'type': 'object',
+                        'properties': {
+                            'limit': {'type': 'integer'},
+                            'next_after': {'type': 'string'}
+                        }
                     }
                 }
             }
         },
+        '400': {
+            'description': 'Bad request',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        },
         '500': {
             'description': 'Internal server error',
             'schema': {'type': 'object', 'properties': {'error': {'type': 'string'}}}
@@ -199,24 +366,65 @@ def get_user(user_id):
     }
 })
 def get_all_users():
+    limit = request.args.get('limit', 100, type=int)
+    after = request.args.get('after')
+    output_format = request.args.get('format', 'json')
+    include_watchlist = request.args.get('watchlist', 'false').lower() == 'true'
+
+    if not 1 <= limit <= USERS_PAGE_MAX_LIMIT:
+        return jsonify({"message": f"limit must be between 1 and {USERS_PAGE_MAX_LIMIT}"}), 400
+    if output_format not in ('json', 'ndjson'):
+        return jsonify({"message": "format must be json or ndjson"}), 400
+    query = {}
+    if after:
+        if not ObjectId.is_valid(after):
+            return jsonify({"message": "after must be a user ID"}), 400
+        query["_id"] = {"$gt": ObjectId(after)}
+
     try:
         mongo = get_mongo()
-        users = mongo.db.users.find()
-        users_list = []
+        watchlist = get_watchlist() if include_watchlist else None
+        if watchlist:
+            projection = user_projections.with_watchlist(user_projections.LISTING_FIELDS, watchlist)
+        else:
+            projection = {field: 1 for field in user_projections.LISTING_FIELDS}
+        # Keyset pagination on _id: every page is an index range scan, however deep
+        cursor = mongo.db.users.find(query, projection).sort("_id", 1)
+
+        if output_format == 'ndjson':
+            rows = listing_rows(cursor.batch_size(USERS_STREAM_BATCH), watchlist)
+            return Response(stream_with_context(export_ndjson(rows)), mimetype='application/x-ndjson')
+
+        users = list(listing_rows(cursor.limit(limit + 1), watchlist))
+        has_more = len(users) > limit
+        users = users[:limit]
+        return jsonify({
+            "data": users,
+            "paging": {
+                "limit": limit,
+                "next_after": users[-1]["_id"] if has_more else None
+            }
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        for user in users:
+def listing_rows(users, watchlist=None):
+    """Yield listing entries, loading watchlists one cursor batch at a time."""
+    users = iter(users)
+    while True:
+        chunk = list(itertools.islice(users, USERS_STREAM_BATCH))
+        if not chunk:
+            return
+        saved_lists = watchlist.saved_lists(chunk) if watchlist else {}
+        for user in chunk:
             user_doc = {
                 "userName": user.get("userName"),
                 "userEmail": user.get("userEmail"),
-                "userPassword": str(user.get("userPassword")),
-                "savedList": user.get("savedList", []),
-                "_id": str(user["_id"]) 
+                "_id": str(user["_id"])
             }
-            users_list.append(user_doc)
-
-        return jsonify(users_list)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+            if watchlist:
+                user_doc["savedList"] = saved_lists[user_doc["_id"]]
+            yield user_doc
 
 @bp.route('/user/<user_id>', methods=['PUT'])
 @swag_from({
@@ -255,6 +463,10 @@ def get_all_users():
         '404': {
             'description': 'User not found',
             'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        },
+        '503': {
+            'description': 'Password hashing is saturated; retry after the Retry-After header',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
         }
     }
 })
@@ -271,12 +483,27 @@ def update_user(user_id):
     if 'userEmail' in data:
         user_update['userEmail'] = data['userEmail']
     if 'userPassword' in data:
-        user_update['userPassword'] = bcrypt.hashpw(data['userPassword'].encode('utf-8'), bcrypt.gensalt())
+        try:
+            user_update['userPassword'] = password_hasher.hash(data['userPassword'])
+        except PasswordHasherBusy as e:
+            return password_busy(e)
     if 'isAdmin' in data:
         user_update['isAdmin'] = data['isAdmin']
 
-    result = mongo.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": user_update})
+    # The legacy User-Email path caches the admin flag under the (previous) email
+    previous = None
+    if 'isAdmin' in user_update or 'userEmail' in user_update:
+        previous = mongo.db.users.find_one({"_id": ObjectId(user_id)}, user_projections.EMAIL)
 
+    try:
+        result = mongo.db.users.update_one({"_id": ObjectId(user_id)}, {"$set": user_update})
+    except DuplicateKeyError as e:
+        return jsonify({"message": duplicate_user_message(e)}), 400
+
+    if 'isAdmin' in user_update:
+        role_cache.delete(('id', user_id))
+    if previous is not None:
+        role_cache.delete(('email', previous.get('userEmail')))
     if result.modified_count:
         return jsonify({"message": "User updated successfully!"}), 200
     return jsonify({"message": "User not found or no changes made!"}), 404
@@ -306,9 +533,12 @@ def update_user(user_id):
 })
 def delete_user(user_id):
     mongo = get_mongo()
-    result = mongo.db.users.delete_one({"_id": ObjectId(user_id)})
+    deleted = mongo.db.users.find_one_and_delete({"_id": ObjectId(user_id)}, projection=user_projections.EMAIL)
 
-    if result.deleted_count:
+    if deleted is not None:
+        get_watchlist().delete_user(user_id)
+        role_cache.delete(('id', user_id))
+        role_cache.delete(('email', deleted.get('userEmail')))
         return jsonify({"message": "User deleted successfully!"}), 200
     return jsonify({"message": "User not found!"}), 404
 
@@ -359,25 +589,12 @@ def add_anime_to_watchlist(user_id):
     if not anime_id:
         return jsonify({"message": "Anime ID not provided"}), 400
 
-    mongo = get_mongo()
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-
-    if not user:
+    result = get_watchlist().add(user_id, anime_id, watched)
+    if result == NO_USER:
         return jsonify({"message": "User not found"}), 404
-
-    if 'savedList' not in user:
-        user['savedList'] = []
-
-    # Check if the anime is already in the watchlist
-    if any(anime['id'] == anime_id for anime in user['savedList']):
+    if result == DUPLICATE:
         return jsonify({"message": "Anime already in watchlist"}), 400
 
-    # Add the anime to the watchlist with the watched status
-    mongo.db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$push": {"savedList": {"id": anime_id, "watched": watched}}}
-    )
-
     return jsonify({"message": "Anime added to watchlist"}), 200
 
 @bp.route('/user/<user_id>/update_anime', methods=['PUT'])
@@ -398,9 +615,10 @@ def add_anime_to_watchlist(user_id):
                 'type': 'object',
                 'properties': {
                     'anime_id': {'type': 'string'},
-                    'watched': {'type': 'boolean'}
+                    'watched': {'type': 'boolean'},
+                    'progress': {'type': 'integer', 'description': 'Episodes watched'}
                 },
-                'required': ['anime_id', 'watched']
+                'required': ['anime_id']
             }
         }
     ],
@@ -423,28 +641,25 @@ def update_anime_watched_status(user_id):
     data = request.get_json()
     anime_id = data.get('anime_id')
     watched = data.get('watched')  # Must be provided and boolean
+    progress = data.get('progress')  # Optional number of episodes watched
 
-    if not anime_id or watched is None:
-        return jsonify({"message": "Anime ID and watched status must be provided"}), 400
+    if not anime_id or (watched is None and progress is None):
+        return jsonify({"message": "Anime ID and watched status or progress must be provided"}), 400
+    if progress is not None and (not isinstance(progress, int) or isinstance(progress, bool) or progress < 0):
+        return jsonify({"message": "progress must be a non-negative integer"}), 400
 
-    mongo = get_mongo()
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+    changes = {}
+    if watched is not None:
+        changes['watched'] = watched
+    if progress is not None:
+        changes['progress'] = progress
 
-    if not user:
+    result = get_watchlist().update(user_id, anime_id, changes)
+    if result == NO_USER:
         return jsonify({"message": "User not found"}), 404
-
-    # Check if the anime is in the user's savedList
-    anime_entry = next((anime for anime in user.get('savedList', []) if anime['id'] == anime_id), None)
-
-    if not anime_entry:
+    if result != UPDATED:
         return jsonify({"message": "Anime not found in watchlist"}), 404
 
-    # Update the watched status
-    mongo.db.users.update_one(
-        {"_id": ObjectId(user_id), "savedList.id": anime_id},
-        {"$set": {"savedList.$.watched": watched}}
-    )
-
     return jsonify({"message": "Anime watched status updated"}), 200
 
 @bp.route('/user/<user_id>/remove_anime', methods=['DELETE'])
@@ -492,15 +707,363 @@ def remove_anime_from_watchlist(user_id):
     if not anime_id:
         return jsonify({"message": "Anime ID not provided"}), 400
 
-    mongo = get_mongo()
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+    if get_watchlist().remove(user_id, anime_id) == NO_USER:
+        return jsonify({"message": "User not found"}), 404
 
-    if not user:
+    return jsonify({"message": "Anime removed from watchlist"}), 200
+
+WATCHLIST_SORT_FIELDS = {
+    'added': None,
+    'mean': 'mean',
+    'title': 'title',
+    'start_date': 'start_date',
+}
+
+def _sort_value(value):
+    return value.lower() if isinstance(value, str) else value
+
+def arrange_watchlist(entries, fields, min_rating, sort_field, order):
+    """Hydrate every entry, then apply the rating filter and metadata sort.
+
+    Sorting or rating filters need metadata for every candidate; the detail
+    cache keeps this cheap after the first request. Returns ``(entries, details)``.
+    """
+    hydrate_fields = fields
+    for needed in (sort_field, 'mean' if min_rating is not None else None):
+        if needed and needed not in fields.split(','):
+            hydrate_fields += ',' + needed
+    details, _ = fetch_anime_details_many([entry['id'] for entry in entries], hydrate_fields)
+    entries = [entry for entry in entries if str(entry['id']) in details]
+    if min_rating is not None:
+        entries = [entry for entry in entries
+                   if (details[str(entry['id'])].get('mean') or 0) >= min_rating]
+    if sort_field is not None:
+        # Entries missing the sort field always go last
+        present = [entry for entry in entries if details[str(entry['id'])].get(sort_field) is not None]
+        missing = [entry for entry in entries if details[str(entry['id'])].get(sort_field) is None]
+        present.sort(key=lambda entry: _sort_value(details[str(entry['id'])][sort_field]),
+                     reverse=(order == 'desc'))
+        entries = present + missing
+    return entries, details
+
+def watchlist_items(entries, details):
+    items = []
+    for entry in entries:
+        anime = details.get(str(entry['id']))
+        if anime is None:
+            continue
+        items.append({**anime, "watched": entry.get('watched', False)})
+    return items
+
+def render_watchlist(entries, fields, status='all', min_rating=None, sort='added', order='asc', offset=0, limit=None):
+    """Filter, sort and hydrate a watchlist as GET /user/<id>/watchlist orders it.
+
+    Returns ``(items, total)``: `limit` items from `offset` (all of them when
+    `limit` is None) and the number of entries that passed the filters.
+    """
+    if status != 'all':
+        entries = [entry for entry in entries if bool(entry.get('watched')) == (status == 'watched')]
+    sort_field = WATCHLIST_SORT_FIELDS[sort]
+    if sort_field is None and order == 'desc':
+        entries = entries[::-1]
+    end = None if limit is None else offset + limit
+    if sort_field is None and min_rating is None:
+        # List order needs no metadata, so only the requested page is hydrated
+        total = len(entries)
+        entries = entries[offset:end]
+        details, _ = fetch_anime_details_many([entry['id'] for entry in entries], fields)
+    else:
+        entries, details = arrange_watchlist(entries, fields, min_rating, sort_field, order)
+        total = len(entries)
+        entries = entries[offset:end]
+    return watchlist_items(entries, details), total
+
+@bp.route('/user/<user_id>/watchlist', methods=['GET'])
+@swag_from({
+    'tags': ['Anime'],
+    'parameters': [
+        {
+            'name': 'user_id',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'User ID'
+        },
+        {
+            'name': 'page',
+            'in': 'query',
+            'type': 'integer',
+            'default': 1,
+            'description': 'Page number, starting at 1'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'default': 18,
+            'description': 'Number of entries per page (max 100)'
+        },
+        {
+            'name': 'status',
+            'in': 'query',
+            'type': 'string',
+            'default': 'all',
+            'description': 'Filter by watched status (all, watched, unwatched)'
+        },
+        {
+            'name': 'min_rating',
+            'in': 'query',
+            'type': 'number',
+            'format': 'float',
+            'description': 'Only include anime with a mean score of at least this value'
+        },
+        {
+            'name': 'sort',
+            'in': 'query',
+            'type': 'string',
+            'default': 'added',
+            'description': 'Sort by (added, mean, title, start_date)'
+        },
+        {
+            'name': 'order',
+            'in': 'query',
+            'type': 'string',
+            'default': 'asc',
+            'description': 'Sort order (asc or desc)'
+        },
+        {
+            'name': 'fields',
+            'in': 'query',
+            'type': 'string',
+            'default': 'id,title,mean,num_episodes,genres,synopsis,start_date,end_date,status',
+            'description': 'Comma-separated list of anime fields to include in each entry'
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'One page of the watchlist, hydrated with anime details',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'data': {'type': 'array', 'items': {'type': 'object'}},
+                    'paging': {
+                        'type': 'object',
+                        'properties': {
+                            'page': {'type': 'integer'},
+                            'limit': {'type': 'integer'},
+                            'total': {'type': 'integer'},
+                            'total_pages': {'type': 'integer'}
+                        }
+                    }
+                }
+            }
+        },
+        '400': {
+            'description': 'Bad request',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        },
+        '404': {
+            'description': 'User not found',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        }
+    }
+})
+def get_user_watchlist(user_id):
+    if not ObjectId.is_valid(user_id):
         return jsonify({"message": "User not found"}), 404
+    page = request.args.get('page', 1, type=int)
+    limit = request.args.get('limit', 18, type=int)
+    status = request.args.get('status', 'all')
+    min_rating = request.args.get('min_rating', type=float)
+    sort = request.args.get('sort', 'added')
+    order = request.args.get('order', 'asc')
+    fields = request.args.get('fields', 'id,title,mean,num_episodes,genres,synopsis,start_date,end_date,status')
 
-    mongo.db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$pull": {"savedList": {"id": anime_id}}}
-    )
+    if page < 1 or not 1 <= limit <= 100:
+        return jsonify({"message": "page must be >= 1 and limit between 1 and 100"}), 400
+    if status not in ('all', 'watched', 'unwatched'):
+        return jsonify({"message": "status must be all, watched or unwatched"}), 400
+    if sort not in WATCHLIST_SORT_FIELDS:
+        return jsonify({"message": "sort must be one of " + ", ".join(WATCHLIST_SORT_FIELDS)}), 400
 
-    return jsonify({"message": "Anime removed from watchlist"}), 200
+    # The page only changes with the watchlist version and the query, so a
+    # current client copy costs one projected lookup and a 304. The anime
+    # cache period is part of the tag so hydrated metadata still refreshes.
+    owner = get_mongo().db.users.find_one({"_id": ObjectId(user_id)}, user_projections.WATCHLIST_VERSION)
+    if owner is None:
+        return jsonify({"message": "User not found"}), 404
+    metadata_period = int(time.time() // config.ANIME_CACHE_TTL)
+    etag = version_etag(user_id, owner.get(VERSION_FIELD, 0), metadata_period, sorted(request.args.items()))
+    if is_fresh(request.if_none_match, etag):
+        return not_modified(Response, 'private', etag)
+
+    entries = get_watchlist().entries(user_id)
+    if entries is None:
+        return jsonify({"message": "User not found"}), 404
+
+    items, total = render_watchlist(entries, fields, status, min_rating, sort, order, (page - 1) * limit, limit)
+    response = jsonify({
+        "data": items,
+        "paging": {
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "total_pages": (total + limit - 1) // limit
+        }
+    })
+    return finalize(response, 'private', request.if_none_match, etag=etag)
+
+@bp.route('/user/<user_id>/watchlist/bulk', methods=['POST'])
+@swag_from({
+    'tags': ['Anime'],
+    'consumes': ['application/json', 'application/xml', 'multipart/form-data'],
+    'parameters': [
+        {
+            'name': 'user_id',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'User ID'
+        },
+        {
+            'name': 'body',
+            'in': 'body',
+            'description': 'JSON changes, or a MyAnimeList XML list export sent as application/xml or as a "file" upload',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'add': {'type': 'array', 'items': {'type': 'object', 'properties': {
+                        'anime_id': {'type': 'integer'},
+                        'watched': {'type': 'boolean'}
+                    }}},
+                    'remove': {'type': 'array', 'items': {'type': 'integer'}},
+                    'watched': {'type': 'object', 'additionalProperties': {'type': 'boolean'}}
+                }
+            }
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'Changes applied: removes first, then adds (existing entries are kept), then watched toggles',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'message': {'type': 'string'},
+                    'added': {'type': 'integer'},
+                    'removed': {'type': 'integer'},
+                    'toggled': {'type': 'integer'}
+                }
+            }
+        },
+        '400': {
+            'description': 'Bad request',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        },
+        '404': {
+            'description': 'User not found',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        }
+    }
+})
+def bulk_update_watchlist(user_id):
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"message": "User not found"}), 404
+    max_items = config.WATCHLIST_BULK_MAX_ITEMS
+    try:
+        if request.mimetype in ('application/xml', 'text/xml'):
+            adds, removes, toggles = parse_mal_xml(request.stream, max_items), [], {}
+        elif 'file' in request.files:
+            adds, removes, toggles = parse_mal_xml(request.files['file'].stream, max_items), [], {}
+        else:
+            adds, removes, toggles = parse_bulk_request(request.get_json(silent=True), max_items)
+    except BulkError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not (adds or removes or toggles):
+        return jsonify({"message": "No watchlist changes provided"}), 400
+
+    added = get_watchlist().bulk(user_id, adds, removes, toggles)
+    if added is None:
+        return jsonify({"message": "User not found"}), 404
+
+    return jsonify({
+        "message": "Watchlist updated",
+        "added": added,
+        "removed": len(removes),
+        "toggled": len(toggles)
+    }), 200
+
+@bp.route('/user/<user_id>/watchlist/export', methods=['GET'])
+@swag_from({
+    'tags': ['Anime'],
+    'produces': ['application/x-ndjson', 'text/csv'],
+    'parameters': [
+        {
+            'name': 'user_id',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'User ID'
+        },
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'default': 'ndjson',
+            'description': 'Export format (ndjson or csv)'
+        },
+        {
+            'name': 'fields',
+            'in': 'query',
+            'type': 'string',
+            'description': 'Optional comma-separated anime fields to add to each entry (e.g. title,mean)'
+        }
+    ],
+    'responses': {
+        '200': {
+            'description': 'The watchlist, one entry per line'
+        },
+        '400': {
+            'description': 'Bad request',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        },
+        '404': {
+            'description': 'User not found',
+            'schema': {'type': 'object', 'properties': {'message': {'type': 'string'}}}
+        }
+    }
+})
+def export_watchlist(user_id):
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"message": "User not found"}), 404
+    export_format = request.args.get('format', 'ndjson')
+    fields = request.args.get('fields')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"message": "format must be ndjson or csv"}), 400
+
+    entries = get_watchlist().entries(user_id)
+    if entries is None:
+        return jsonify({"message": "User not found"}), 404
+
+    def rows():
+        # Details are fetched one batch at a time as the response is written
+        for start in range(0, len(entries), config.ANIME_BATCH_MAX_IDS):
+            chunk = entries[start:start + config.ANIME_BATCH_MAX_IDS]
+            details = {}
+            if fields:
+                details, _ = fetch_anime_details_many([entry['id'] for entry in chunk], fields)
+            for entry in chunk:
+                yield {**details.get(str(entry['id']), {}), **entry, "watched": entry.get('watched', False)}
+
+    if export_format == 'csv':
+        columns = list(EXPORT_COLUMNS)
+        if fields:
+            columns += [name for name in sorted({field_name(token) for token in parse_fields(fields)})
+                        if name not in columns]
+        body, mimetype = export_csv(rows(), columns), 'text/csv'
+    else:
+        body, mimetype = export_ndjson(rows()), 'application/x-ndjson'
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=watchlist.{export_format}'
+    return response
@@ -0,0 +1,159 @@
+# services/anime_cache.py
+import threading
+
+import config
+from services.cache import TTLCache, FRESH, MISS, STALE
+from services.shared_cache import SharedNamespace, format_key, shared_store
+
+# MAL returns these on every detail lookup whatever `fields` asks for.
+BASE_FIELDS = frozenset(['id', 'title', 'main_picture'])
+
+
+def parse_fields(fields):
+    """Split a MAL `fields` string into a frozenset of top-level field tokens.
+
+    Commas inside `{...}` sub-selections (e.g. ``my_list_status{status}``)
+    do not split the token.
+    """
+    tokens = []
+    depth = 0
+    current = ''
+    for char in fields or '':
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        if char == ',' and depth == 0:
+            tokens.append(current.strip())
+            current = ''
+        else:
+            current += char
+    tokens.append(current.strip())
+    return frozenset(token for token in tokens if token)
+
+
+def format_fields(fields):
+    return ','.join(sorted(fields))
+
+
+def field_name(token):
+    return token.split('{', 1)[0]
+
+
+def project(doc, fields):
+    """Trim a cached detail document down to what a request for `fields` returns."""
+    keep = {field_name(token) for token in fields} | BASE_FIELDS
+    return {key: value for key, value in doc.items() if key in keep}
+
+
+class AnimeDetailCache:
+    """Detail cache keyed on (anime_id, normalized fields).
+
+    A request for a subset of fields is answered from any cached entry for the
+    same anime whose field set is a superset of it. With a `shared` tier, a
+    local miss is looked up there (exact field set only) before going to MAL,
+    and every stored document is written through to it.
+    """
+
+    def __init__(self, max_entries, ttl, stale_ttl, shared=None):
+        self.cache = TTLCache(max_entries, ttl, stale_ttl, on_evict=self._forget)
+        self.shared = shared
+        self._index = {}
+        self._index_lock = threading.Lock()
+
+    def _forget(self, key):
+        anime_id, fields = key
+        with self._index_lock:
+            cached = self._index.get(anime_id)
+            if cached is not None:
+                cached.discard(fields)
+                if not cached:
+                    del self._index[anime_id]
+
+    def _candidates(self, anime_id, fields):
+        with self._index_lock:
+            cached = list(self._index.get(anime_id, ()))
+        # Exact match first, then the smallest superset.
+        supersets = sorted((f for f in cached if f != fields and fields <= f), key=len)
+        return [fields] + supersets
+
+    def lookup(self, anime_id, fields):
+        """Return ``(doc, state, key)`` for the best cached entry, projected to `fields`."""
+        anime_id = str(anime_id)
+        for candidate in self._candidates(anime_id, fields):
+            key = (anime_id, candidate)
+            value, state = self.cache.lookup(key, record=False)
+            if state != MISS:
+                self.cache.record(state)
+                return project(value, fields), state, key
+        key = (anime_id, fields)
+        doc = self.shared.get(format_key(key)) if self.shared is not None else None
+        if doc is not None:
+            self._store_local(anime_id, fields, doc)
+            self.cache.record(FRESH)
+            return project(doc, fields), FRESH, key
+        self.cache.record(MISS)
+        return None, MISS, key
+
+    def _store_local(self, anime_id, fields, doc):
+        with self._index_lock:
+            self._index.setdefault(anime_id, set()).add(fields)
+        self.cache.set((anime_id, fields), doc)
+
+    def store(self, anime_id, fields, doc):
+        anime_id = str(anime_id)
+        self._store_local(anime_id, fields, doc)
+        if self.shared is not None:
+            self.shared.set(format_key((anime_id, fields)), doc)
+
+    def get_cached(self, anime_id, fields, fetch):
+        """Return cached `fields` of `anime_id`, or None on a miss.
+
+        Stale entries are returned immediately and refreshed in the background
+        through ``fetch(fields_str)``.
+        """
+        doc, state, key = self.lookup(anime_id, parse_fields(fields))
+        if state == STALE:
+            self.cache.revalidate(key, lambda: self._refresh(key, fetch))
+        return doc
+
+    def fetch_and_store(self, anime_id, fields, fetch):
+        """Call ``fetch(fields_str)`` and cache the result. Upstream errors are passed through and never cached."""
+        fields = parse_fields(fields)
+        result = fetch(format_fields(fields))
+        if _ok(result) is not None:
+            self.store(anime_id, fields, result)
+        return result
+
+    def get_or_fetch(self, anime_id, fields, fetch):
+        doc = self.get_cached(anime_id, fields, fetch)
+        if doc is not None:
+            return doc
+        return self.fetch_and_store(anime_id, fields, fetch)
+
+    def _refresh(self, key, fetch):
+        anime_id, fields = key
+        result = _ok(fetch(format_fields(fields)))
+        if result is not None:
+            self.store(anime_id, fields, result)
+
+    def stats(self):
+        stats = self.cache.stats()
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+
+def _ok(result):
+    # make_mal_request signals failure with a (body, status, headers) tuple
+    if isinstance(result, dict) and 'error' not in result:
+        return result
+    return None
+
+
+anime_detail_cache = AnimeDetailCache(
+    config.ANIME_CACHE_MAX_ENTRIES,
+    config.ANIME_CACHE_TTL,
+    config.ANIME_CACHE_STALE_TTL,
+    shared=SharedNamespace('anime', config.ANIME_CACHE_TTL, store=shared_store()),
+)
@@ -0,0 +1,80 @@
+# services/auth_tokens.py
+"""Signed, stateless session tokens.
+
+Access tokens carry the user ID and admin flag and are checked with a
+signature verification only. Refresh tokens re-read the role claim (through
+a short-TTL cache) so admin changes are picked up within one access TTL.
+"""
+import secrets
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+import config
+from services.shared_cache import TwoLevelCache
+
+if not config.AUTH_SECRET_KEY:
+    # A per-process random key would make tokens from one worker fail on the others
+    if not config.AUTH_DEV_MODE:
+        raise RuntimeError('AUTH_SECRET_KEY is not set (set AUTH_DEV_MODE=true to use a random key locally)')
+    SECRET_KEY = secrets.token_urlsafe(32)
+else:
+    SECRET_KEY = config.AUTH_SECRET_KEY
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+TOKEN_TTLS = {
+    ACCESS: config.ACCESS_TOKEN_TTL,
+    REFRESH: config.REFRESH_TOKEN_TTL,
+}
+
+# Cached admin flags, keyed by ('id', user_id) or ('email', email). Shared by all
+# workers when a shared cache tier is configured; deletes reach every worker.
+role_cache = TwoLevelCache('roles', config.ROLE_CACHE_MAX_ENTRIES, config.ROLE_CACHE_TTL)
+
+
+class TokenError(Exception):
+    pass
+
+
+def _serializer(kind):
+    # A distinct salt per kind keeps a refresh token from passing as an access token
+    return URLSafeTimedSerializer(SECRET_KEY, salt=f'animesaver-{kind}')
+
+
+def issue_tokens(user_id, is_admin):
+    user_id = str(user_id)
+    claims = {'sub': user_id, 'adm': bool(is_admin)}
+    return {
+        'access_token': _serializer(ACCESS).dumps(claims),
+        'refresh_token': _serializer(REFRESH).dumps({'sub': user_id}),
+        'token_type': 'Bearer',
+        'expires_in': TOKEN_TTLS[ACCESS],
+    }
+
+
+def verify(token, kind=ACCESS):
+    """Return the token's claims, or raise TokenError."""
+    try:
+        return _serializer(kind).loads(token, max_age=TOKEN_TTLS[kind])
+    except SignatureExpired:
+        raise TokenError('Token expired')
+    except BadSignature:
+        raise TokenError('Invalid token')
+
+
+def bearer_token(headers):
+    scheme, _, token = headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+
+def cached_is_admin(key, load):
+    """Admin flag for `key`; ``load()`` returns it (or None for an unknown user) on a miss."""
+    is_admin = role_cache.get(key)
+    if is_admin is None:
+        is_admin = load()
+        if is_admin is not None:
+            role_cache.set(key, is_admin)
+    return is_admin
@@ -0,0 +1,128 @@
+# services/cache.py
+import threading
+import time
+from collections import OrderedDict
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    Expired entries are kept for a further ``stale_ttl`` seconds so callers
+    can serve them while a refresh runs in the background.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, stale_ttl=0, on_evict=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key, record=True):
+        """Return ``(value, state)`` where state is FRESH, STALE or MISS.
+
+        Pass ``record=False`` to probe without touching the hit/miss counters.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                state, value = MISS, None
+            else:
+                value, stored_at = entry
+                age = now - stored_at
+                if age <= self.ttl:
+                    state = FRESH
+                elif age <= self.ttl + self.stale_ttl:
+                    state = STALE
+                else:
+                    self._evict(key)
+                    state, value = MISS, None
+                if state != MISS:
+                    self._data.move_to_end(key)
+            if record:
+                self._record(state)
+            return value, state
+
+    def record(self, state):
+        with self._lock:
+            self._record(state)
+
+    def _record(self, state):
+        if state == FRESH:
+            self.hits += 1
+        elif state == STALE:
+            self.stale_hits += 1
+        else:
+            self.misses += 1
+
+    def _evict(self, key):
+        del self._data[key]
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    def get(self, key, default=None):
+        value, state = self.lookup(key)
+        return default if state == MISS else value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._evict(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._evict(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._data):
+                self._evict(key)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def revalidate(self, key, loader):
+        """Refresh ``key`` in a background thread unless a refresh is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(key, value)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,312 @@
+# services/catalog.py
+import datetime
+import logging
+import time
+from urllib.parse import urlencode
+
+import pymongo
+from pymongo import UpdateOne
+
+import config
+from services.anime_cache import parse_fields, project, field_name
+
+logger = logging.getLogger(__name__)
+
+# Every field the mirror stores for an anime; requests for anything else go upstream.
+CATALOG_FIELDS = (
+    'id', 'title', 'main_picture', 'alternative_titles', 'start_date', 'end_date', 'synopsis',
+    'mean', 'rank', 'popularity', 'num_list_users', 'num_scoring_users', 'num_favorites',
+    'nsfw', 'media_type', 'status', 'genres', 'num_episodes', 'start_season', 'broadcast',
+    'source', 'average_episode_duration', 'rating', 'studios', 'created_at', 'updated_at',
+)
+CATALOG_FIELDS_PARAM = ','.join(CATALOG_FIELDS)
+
+# How the mirror reproduces each MAL ranking: (filter, sort)
+RANKING_QUERIES = {
+    'all': ({'rank': {'$ne': None}}, [('rank', pymongo.ASCENDING)]),
+    'airing': ({'status': 'currently_airing', 'rank': {'$ne': None}}, [('rank', pymongo.ASCENDING)]),
+    'upcoming': ({'status': 'not_yet_aired'}, [('popularity', pymongo.ASCENDING)]),
+    'tv': ({'media_type': 'tv', 'rank': {'$ne': None}}, [('rank', pymongo.ASCENDING)]),
+    'ova': ({'media_type': 'ova', 'rank': {'$ne': None}}, [('rank', pymongo.ASCENDING)]),
+    'movie': ({'media_type': 'movie', 'rank': {'$ne': None}}, [('rank', pymongo.ASCENDING)]),
+    'special': ({'media_type': 'special', 'rank': {'$ne': None}}, [('rank', pymongo.ASCENDING)]),
+    'bypopularity': ({'popularity': {'$ne': None}}, [('popularity', pymongo.ASCENDING)]),
+    'favorite': ({}, [('num_favorites', pymongo.DESCENDING)]),
+}
+
+SEASON_SORTS = {
+    'anime_score': [('mean', pymongo.DESCENDING)],
+    'anime_num_list_users': [('num_list_users', pymongo.DESCENDING)],
+}
+
+SEASONS = ('winter', 'spring', 'summer', 'fall')
+
+
+def current_season(today=None):
+    today = today or datetime.date.today()
+    return today.year, SEASONS[(today.month - 1) // 3]
+
+
+def next_season(today=None):
+    year, season = current_season(today)
+    index = SEASONS.index(season) + 1
+    if index == len(SEASONS):
+        return year + 1, SEASONS[0]
+    return year, SEASONS[index]
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _strip(doc):
+    doc.pop('_id', None)
+    doc.pop('synced_at', None)
+    return doc
+
+
+class AnimeCatalog:
+    """Local MongoDB mirror of the MAL fields AnimeSaver uses.
+
+    Reads return MAL-shaped payloads, or None when the mirror cannot answer
+    the query completely so the caller can fall back to upstream.
+    """
+
+    def __init__(self, db, max_age=config.CATALOG_MAX_AGE):
+        self.anime = db['anime']
+        self.sync_state = db['anime_sync_state']
+        self.max_age = max_age
+
+    def ensure_indexes(self):
+        self.anime.create_index('id', unique=True)
+        self.anime.create_index('title')
+        self.anime.create_index('mean')
+        self.anime.create_index('rank')
+        self.anime.create_index('popularity')
+        self.anime.create_index('status')
+        self.anime.create_index('genres.name')
+        self.anime.create_index('synced_at')
+        self.anime.create_index([('start_season.year', pymongo.ASCENDING), ('start_season.season', pymongo.ASCENDING)])
+        self.anime.create_index([
+            ('title', pymongo.TEXT),
+            ('alternative_titles.en', pymongo.TEXT),
+            ('alternative_titles.ja', pymongo.TEXT),
+            ('alternative_titles.synonyms', pymongo.TEXT),
+        ], name='title_text')
+
+    # -- writes ---------------------------------------------------------
+
+    def upsert_many(self, nodes):
+        """Store MAL nodes, skipping any whose `updated_at` has not changed. Returns the number written."""
+        nodes = [node for node in nodes if node.get('id') is not None]
+        if not nodes:
+            return 0
+        known = {
+            doc['id']: doc.get('updated_at')
+            for doc in self.anime.find({'id': {'$in': [node['id'] for node in nodes]}}, {'id': 1, 'updated_at': 1})
+        }
+        now = _now()
+        operations = []
+        written = 0
+        for node in nodes:
+            if node['id'] in known and node.get('updated_at') and known[node['id']] == node['updated_at']:
+                # Unchanged upstream: only record that we checked it
+                operations.append(UpdateOne({'id': node['id']}, {'$set': {'synced_at': now}}))
+                continue
+            operations.append(UpdateOne({'id': node['id']}, {'$set': {**node, 'synced_at': now}}, upsert=True))
+            written += 1
+        self.anime.bulk_write(operations, ordered=False)
+        return written
+
+    def mark_synced(self, listing, count):
+        self.sync_state.update_one(
+            {'_id': listing},
+            {'$set': {'synced_at': _now(), 'count': count}},
+            upsert=True,
+        )
+
+    def stale_ids(self, limit):
+        cutoff = _now() - datetime.timedelta(seconds=self.max_age)
+        cursor = self.anime.find({'synced_at': {'$lt': cutoff}}, {'id': 1}).sort('synced_at', pymongo.ASCENDING).limit(limit)
+        return [doc['id'] for doc in cursor]
+
+    # -- reads ----------------------------------------------------------
+
+    def _covers(self, fields):
+        return all(field_name(token) in CATALOG_FIELDS for token in fields)
+
+    def _listing_count(self, listing):
+        """Number of entries synced for `listing`, or None if it is missing or stale."""
+        state = self.sync_state.find_one({'_id': listing})
+        if not state:
+            return None
+        synced_at = state['synced_at']
+        if synced_at.tzinfo is None:
+            synced_at = synced_at.replace(tzinfo=datetime.timezone.utc)
+        if (_now() - synced_at).total_seconds() > self.max_age:
+            return None
+        return state.get('count', 0)
+
+    def _projection(self, fields):
+        names = {field_name(token) for token in fields} | {'id', 'title', 'main_picture'}
+        return {name: 1 for name in names} | {'_id': 0}
+
+    def get(self, anime_id, fields):
+        fields = parse_fields(fields)
+        if not self._covers(fields):
+            return None
+        try:
+            anime_id = int(anime_id)
+        except (TypeError, ValueError):
+            return None
+        cutoff = _now() - datetime.timedelta(seconds=self.max_age)
+        doc = self.anime.find_one({'id': anime_id, 'synced_at': {'$gte': cutoff}}, self._projection(fields))
+        return project(_strip(doc), fields) if doc else None
+
+    def get_many(self, anime_ids, fields):
+        """Return ``{str(id): doc}`` for every requested anime the mirror holds fresh."""
+        fields = parse_fields(fields)
+        if not self._covers(fields):
+            return {}
+        ids = [int(anime_id) for anime_id in anime_ids if str(anime_id).isdigit()]
+        cutoff = _now() - datetime.timedelta(seconds=self.max_age)
+        cursor = self.anime.find({'id': {'$in': ids}, 'synced_at': {'$gte': cutoff}}, self._projection(fields))
+        return {str(doc['id']): project(_strip(doc), fields) for doc in cursor}
+
+    def search_documents(self):
+        """Names, thumbnails and ranking signals of every mirrored anime, for the in-process search index."""
+        projection = {
+            '_id': 0, 'id': 1, 'title': 1, 'alternative_titles': 1, 'main_picture': 1, 'popularity': 1, 'mean': 1,
+        }
+        return self.anime.find({}, projection)
+
+    def _page(self, query, sort, fields, limit, offset, base_url, params):
+        cursor = self.anime.find(query, self._projection(fields)).sort(sort).skip(offset).limit(limit + 1)
+        docs = [_strip(doc) for doc in cursor]
+        paging = {}
+        if len(docs) > limit:
+            paging['next'] = f'{base_url}?{urlencode({**params, "offset": offset + limit})}'
+        if offset > 0:
+            paging['previous'] = f'{base_url}?{urlencode({**params, "offset": max(offset - limit, 0)})}'
+        return docs[:limit], paging
+
+    def ranking(self, ranking_type, limit, offset, fields, base_url):
+        limit, offset = int(limit), int(offset)
+        fields = parse_fields(fields)
+        if ranking_type not in RANKING_QUERIES or not self._covers(fields):
+            return None
+        count = self._listing_count(f'ranking:{ranking_type}')
+        if count is None or offset + limit > count:
+            return None
+        query, sort = RANKING_QUERIES[ranking_type]
+        params = {'ranking_type': ranking_type, 'limit': limit, 'fields': ','.join(sorted(fields))}
+        docs, paging = self._page(query, sort, fields, limit, offset, base_url, params)
+        data = [
+            {'node': project(doc, fields), 'ranking': {'rank': offset + position + 1}}
+            for position, doc in enumerate(docs)
+        ]
+        return {'data': data, 'paging': paging}
+
+    def season(self, year, season, sort, limit, offset, fields, base_url):
+        limit, offset = int(limit), int(offset)
+        fields = parse_fields(fields)
+        if not self._covers(fields) or self._listing_count(f'season:{year}:{season}') is None:
+            return None
+        query = {'start_season.year': int(year), 'start_season.season': season}
+        order = SEASON_SORTS.get(sort, SEASON_SORTS['anime_score'])
+        params = {'sort': sort, 'limit': limit, 'fields': ','.join(sorted(fields))}
+        docs, paging = self._page(query, order + [('id', pymongo.ASCENDING)], fields, limit, offset, base_url, params)
+        return {
+            'data': [{'node': project(doc, fields)} for doc in docs],
+            'paging': paging,
+            'season': {'year': int(year), 'season': season},
+        }
+
+    def search(self, query, limit, offset, fields, base_url):
+        """Full-text title search. Returns None unless the mirror has a full page of matches."""
+        limit, offset = int(limit), int(offset)
+        fields = parse_fields(fields)
+        if not query or not self._covers(fields):
+            return None
+        projection = self._projection(fields) | {'score': {'$meta': 'textScore'}}
+        cursor = (self.anime.find({'$text': {'$search': query}}, projection)
+                  .sort([('score', {'$meta': 'textScore'}), ('popularity', pymongo.ASCENDING)])
+                  .skip(offset).limit(limit + 1))
+        docs = [_strip(doc) for doc in cursor]
+        if len(docs) <= limit:
+            # Could be a genuine short result or a gap in the mirror; let MAL decide.
+            return None
+        params = {'q': query, 'limit': limit, 'fields': ','.join(sorted(fields))}
+        paging = {'next': f'{base_url}?{urlencode({**params, "offset": offset + limit})}'}
+        if offset > 0:
+            paging['previous'] = f'{base_url}?{urlencode({**params, "offset": max(offset - limit, 0)})}'
+        for doc in docs:
+            doc.pop('score', None)
+        return {'data': [{'node': project(doc, fields)} for doc in docs[:limit]], 'paging': paging}
+
+
+class CatalogSync:
+    """Fills the catalog from MAL rankings and seasonal listings and refreshes stale entries.
+
+    ``request(endpoint, params)`` is the MAL request helper; it returns the
+    decoded body, or a ``(body, status, headers)`` tuple on failure.
+    """
+
+    def __init__(self, catalog, request, base_url, page_size=config.CATALOG_SYNC_PAGE_SIZE):
+        self.catalog = catalog
+        self.request = request
+        self.base_url = base_url
+        self.page_size = page_size
+
+    def _listing(self, endpoint, params, max_items):
+        offset = 0
+        nodes = []
+        while offset < max_items:
+            page_params = {**params, 'limit': min(self.page_size, max_items - offset),
+                           'offset': offset, 'fields': CATALOG_FIELDS_PARAM}
+            result = self.request(endpoint, page_params)
+            if isinstance(result, tuple):
+                raise RuntimeError(f'MAL request to {endpoint} failed: {result[0].get("error")}')
+            page = [item['node'] for item in result.get('data', [])]
+            nodes.extend(page)
+            offset += len(page)
+            if not page or 'next' not in result.get('paging', {}):
+                break
+        return nodes
+
+    def sync_ranking(self, ranking_type, max_items=config.CATALOG_RANKING_DEPTH):
+        nodes = self._listing(f'{self.base_url}/ranking', {'ranking_type': ranking_type}, max_items)
+        written = self.catalog.upsert_many(nodes)
+        self.catalog.mark_synced(f'ranking:{ranking_type}', len(nodes))
+        return written
+
+    def sync_season(self, year, season, max_items=config.CATALOG_SEASON_DEPTH):
+        nodes = self._listing(f'{self.base_url}/season/{year}/{season}', {'sort': 'anime_score'}, max_items)
+        written = self.catalog.upsert_many(nodes)
+        self.catalog.mark_synced(f'season:{year}:{season}', len(nodes))
+        return written
+
+    def refresh_stale(self, limit=config.CATALOG_REFRESH_BATCH):
+        nodes = []
+        for anime_id in self.catalog.stale_ids(limit):
+            result = self.request(f'{self.base_url}/{anime_id}', {'fields': CATALOG_FIELDS_PARAM})
+            if not isinstance(result, tuple):
+                nodes.append(result)
+        return self.catalog.upsert_many(nodes)
+
+    def run_once(self):
+        summary = {}
+        for ranking_type in config.CATALOG_RANKING_TYPES:
+            summary[f'ranking:{ranking_type}'] = self.sync_ranking(ranking_type)
+        for year, season in (current_season(), next_season()):
+            summary[f'season:{year}:{season}'] = self.sync_season(year, season)
+        summary['stale'] = self.refresh_stale()
+        return summary
+
+    def run_forever(self, interval=config.CATALOG_SYNC_INTERVAL):
+        while True:
+            try:
+                logger.info('catalog sync: %s', self.run_once())
+            except Exception:
+                logger.exception('catalog sync failed')
+            time.sleep(interval)
@@ -0,0 +1,69 @@
+# services/http_caching.py
+"""ETags, Cache-Control policies and conditional GETs.
+
+Routes either know their validator up front (a snapshot generation, a
+user's watchlist version) and can answer 304 before building a body, or
+hash the body they built. Both work with Flask and Quart responses; the
+caller passes in the request's If-None-Match set.
+"""
+import hashlib
+import json
+
+import config
+
+# Cache-Control per route group. Public anime data may be served stale while a
+# CDN or browser revalidates; per-user data is private and always revalidated,
+# which is cheap because unchanged data costs a 304.
+POLICIES = {
+    'listing': (f'public, max-age={config.HTTP_CACHE_LISTING_MAX_AGE}, '
+                f'stale-while-revalidate={config.HTTP_CACHE_STALE_WHILE_REVALIDATE}'),
+    'search': (f'public, max-age={config.HTTP_CACHE_SEARCH_MAX_AGE}, '
+               f'stale-while-revalidate={config.HTTP_CACHE_STALE_WHILE_REVALIDATE}'),
+    'detail': (f'public, max-age={config.HTTP_CACHE_DETAIL_MAX_AGE}, '
+               f'stale-while-revalidate={config.HTTP_CACHE_STALE_WHILE_REVALIDATE}'),
+    'private': 'private, no-cache',
+}
+
+
+def content_etag(data):
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+def version_etag(*parts):
+    """ETag for a body fully determined by `parts` (IDs, version counters, query arguments)."""
+    body = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return content_etag(body.encode('utf-8'))
+
+
+def is_fresh(if_none_match, etag):
+    # Weak comparison, so copies stored from a compressed (weak-ETag) response still match
+    return bool(etag) and if_none_match.contains_weak(etag)
+
+
+def not_modified(response_class, policy, etag):
+    response = response_class(status=304)
+    response.headers['Cache-Control'] = POLICIES[policy]
+    response.set_etag(etag)
+    return response
+
+
+def finalize(response, policy, if_none_match, data=None, etag=None):
+    """Add Cache-Control and an ETag to a 200 response; answer 304 if the client's copy matches.
+
+    The ETag is `etag`, else the one already on the response, else a hash of `data`.
+    Error responses are passed through untouched.
+    """
+    if response.status_code != 200:
+        return response
+    response.headers['Cache-Control'] = POLICIES[policy]
+    if etag is None:
+        etag, _ = response.get_etag()
+    if etag is None:
+        etag = content_etag(data)
+    response.set_etag(etag)
+    if is_fresh(if_none_match, etag):
+        response.status_code = 304
+        response.set_data(b'')
+        for header in ('Content-Type', 'Content-Length'):
+            response.headers.pop(header, None)
+    return response
@@ -0,0 +1,75 @@
+# services/indexes.py
+import logging
+
+import pymongo
+from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+
+from services import user_projections
+from services.share_store import share_store
+from services.watchlist_store import watchlist_store
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_user_indexes(db):
+    db['users'].create_index('userEmail', unique=True, name='userEmail_unique')
+    db['users'].create_index('userName', unique=True, name='userName_unique')
+
+
+def ensure_indexes(db):
+    """Create the users, watchlist and shared list indexes. Safe to run on every start."""
+    ensure_user_indexes(db)
+    watchlist_store(db).ensure_indexes()
+    share_store(db).ensure_indexes()
+
+
+def bootstrap_indexes(db):
+    # Startup must not fail because of an index, e.g. when existing users
+    # already hold duplicate emails; bootstrap_indexes.py reports the details.
+    try:
+        ensure_indexes(db)
+    except PyMongoError:
+        logger.exception('index bootstrap failed')
+
+
+def route_queries(backend):
+    """Representative ``(route, collection, filter, projection, sort)`` for every indexed route query."""
+    some_id = ObjectId()
+    queries = [
+        ('login', 'users', {"userEmail": "user@example.com"}, user_projections.LOGIN, None),
+        ('admin_required', 'users', {"userEmail": "user@example.com"}, user_projections.ADMIN_CHECK, None),
+        ('get_user', 'users', {"_id": some_id}, None, None),
+        ('share_list', 'shared_lists', {"contentHash": "0" * 64}, None, None),
+    ]
+    if backend == 'collection':
+        queries += [
+            ('watchlist', 'watchlist', {"userId": some_id}, None, [('added_at', pymongo.ASCENDING)]),
+            ('update_anime', 'watchlist', {"userId": some_id, "animeId": 1}, None, None),
+            ('get_all_users', 'watchlist', {"userId": {"$in": [some_id]}}, None, [('added_at', pymongo.ASCENDING)]),
+        ]
+    return queries
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+def check_query_plans(db, backend):
+    """Explain every route query; returns ``[{"route", "stages", "collscan"}]``."""
+    report = []
+    for route, collection, query, projection, sort in route_queries(backend):
+        cursor = db[collection].find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = cursor.explain()
+        stages = sorted(set(_stages(explain.get('queryPlanner', {}).get('winningPlan', {}))))
+        report.append({'route': route, 'stages': stages, 'collscan': 'COLLSCAN' in stages})
+    return report
@@ -0,0 +1,56 @@
+# services/mal_async_client.py
+import httpx
+
+import config
+from services.resilience import mal_breaker, classify_response, upstream_error
+
+
+class AsyncMALClient:
+    """Shared asyncio HTTP client for MAL traffic from the ASGI app.
+
+    Must be started and closed on the event loop that serves requests
+    (see the before/after serving hooks in asgi.py).
+    """
+
+    def __init__(self):
+        self._client = None
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.MAL_POOL_MAXSIZE,
+                    max_keepalive_connections=config.MAL_POOL_MAXSIZE if config.MAL_KEEP_ALIVE else 0,
+                ),
+                timeout=httpx.Timeout(config.MAL_READ_TIMEOUT, connect=config.MAL_CONNECT_TIMEOUT),
+                transport=httpx.AsyncHTTPTransport(retries=config.MAL_MAX_RETRIES),
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_json(self, endpoint, headers=None, params=None):
+        """Return the decoded body, or a ``(body, status, headers)`` tuple like make_mal_request."""
+        if self._client is None:
+            await self.start()
+        try:
+            response = await self._client.get(endpoint, headers=headers, params=params)
+        except httpx.TimeoutException as e:
+            mal_breaker.record_failure()
+            return upstream_error(str(e), 504)
+        except httpx.HTTPError as e:
+            mal_breaker.record_failure()
+            return upstream_error(str(e), 502)
+
+        error = classify_response(response.status_code, response.headers, mal_breaker)
+        if error:
+            return error
+        try:
+            return response.json()
+        except ValueError:
+            return upstream_error('MyAnimeList returned an invalid response', 502)
+
+
+mal_async_client = AsyncMALClient()
@@ -0,0 +1,57 @@
+# services/mal_client.py
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+# One pooled session per worker process, created lazily so that forked
+# gunicorn workers never share sockets with their parent.
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = requests.Session()
+    retries = Retry(
+        total=config.MAL_MAX_RETRIES,
+        connect=config.MAL_MAX_RETRIES,
+        read=0,  # never replay a request that may already have reached MAL
+        backoff_factor=0.2,
+        allowed_methods=frozenset(['GET']),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config.MAL_POOL_CONNECTIONS,
+        pool_maxsize=config.MAL_POOL_MAXSIZE,
+        pool_block=config.MAL_POOL_BLOCK,
+        max_retries=retries,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive' if config.MAL_KEEP_ALIVE else 'close'
+    return session
+
+
+def get_session():
+    """Return the shared, connection-pooled session for MAL traffic."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_timeout():
+    """(connect, read) timeout tuple applied to every upstream call."""
+    return (config.MAL_CONNECT_TIMEOUT, config.MAL_READ_TIMEOUT)
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
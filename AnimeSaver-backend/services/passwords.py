@@ -0,0 +1,125 @@
+# services/passwords.py
+"""bcrypt hashing on a bounded process pool.
+
+Hashes run in PASSWORD_HASH_WORKERS worker processes so a login burst
+cannot starve the request threads. At most PASSWORD_HASH_QUEUE further
+requests may wait; beyond that PasswordHasherBusy is raised and the route
+answers 503. With PASSWORD_HASH_WORKERS=0 hashing runs inline on the
+request thread, bounded the same way.
+"""
+import logging
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+
+import bcrypt
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_COST = re.compile(rb'^\$2[abxy]?\$(\d{2})\$')
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+    retry_after = 1
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def _as_bytes(value):
+    return value.encode('utf-8') if isinstance(value, str) else bytes(value)
+
+
+class PasswordHasher:
+    def __init__(self, workers, queue_size, rounds, timeout):
+        self.workers = workers
+        self.rounds = rounds
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _pool(self):
+        # Created on first use so each server worker process gets its own pool
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy('Too many password operations in progress, please retry')
+
+    def _call(self, fn, *args):
+        """Run `fn` on a slot already taken by the caller; the slot is freed when the job ends.
+
+        A job that times out keeps running in the pool, so it keeps its slot
+        until it actually finishes and the queue bound stays accurate.
+        """
+        if self.workers == 0:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            raise PasswordHasherBusy('Password hashing timed out, please retry')
+
+    def _run(self, fn, *args):
+        self._acquire()
+        return self._call(fn, *args)
+
+    def hash(self, password):
+        return self._run(_hashpw, _as_bytes(password), self.rounds)
+
+    def check(self, password, hashed):
+        return self._run(_checkpw, _as_bytes(password), _as_bytes(hashed))
+
+    def needs_rehash(self, hashed):
+        match = _COST.match(_as_bytes(hashed))
+        return match is None or int(match.group(1)) != self.rounds
+
+    def rehash_later(self, password, save):
+        """Hash `password` at the current cost in the background and pass it to ``save(new_hash)``.
+
+        Best effort: skipped when the pool is busy, so upgrades never delay logins.
+        """
+        if not self._slots.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                save(self._call(_hashpw, _as_bytes(password), self.rounds))
+            except Exception:
+                logger.exception('password rehash failed')
+
+        threading.Thread(target=run, name='password-rehash', daemon=True).start()
+
+    def stats(self):
+        return {'workers': self.workers, 'rounds': self.rounds, 'rejected': self.rejected}
+
+
+password_hasher = PasswordHasher(
+    config.PASSWORD_HASH_WORKERS,
+    config.PASSWORD_HASH_QUEUE,
+    config.BCRYPT_ROUNDS,
+    config.PASSWORD_HASH_TIMEOUT,
+)
@@ -0,0 +1,186 @@
+# services/resilience.py
+import email.utils
+import itertools
+import threading
+import time
+
+import config
+
+# Priority lanes for outbound MAL calls; lower values are served first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when a MAL call is refused locally (circuit open or rate limit queue timed out)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def upstream_error(message, status, retry_after=None):
+    """Build the ``(body, status, headers)`` error tuple returned by make_mal_request."""
+    headers = {}
+    if retry_after is not None:
+        headers['Retry-After'] = str(max(1, int(round(retry_after))))
+    return {"error": message}, status, headers
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def classify_response(status_code, headers, breaker):
+    """Record a MAL response on the breaker; return an error tuple for failures, else None.
+
+    A 429 opens the circuit straight away; 5xx count against the failure
+    threshold. They map to 503/502. Other 4xx (e.g. an unknown anime ID) are
+    passed through with their own status.
+    """
+    if status_code == 429 or status_code >= 500:
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        breaker.record_failure(retry_after, trip=status_code == 429)
+        if status_code == 429:
+            return upstream_error('MyAnimeList is rate limiting requests', 503, retry_after or breaker.reset_timeout)
+        return upstream_error(f'MyAnimeList returned {status_code}', 502, retry_after)
+    breaker.record_success()
+    if status_code >= 400:
+        return upstream_error(f'MyAnimeList returned {status_code}', status_code)
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose waiters are served by (priority, arrival)."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self.granted = 0
+        self.rejected = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token without waiting; only succeeds when nobody is queued."""
+        with self._cond:
+            self._refill()
+            if not self._queue and self._tokens >= 1:
+                self._tokens -= 1
+                self.granted += 1
+                return True
+            return False
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        if timeout is None:
+            timeout = config.MAL_RATE_MAX_WAIT[priority]
+        deadline = time.monotonic() + timeout
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            self._queue.append(ticket)
+            self._queue.sort()
+            try:
+                while True:
+                    self._refill()
+                    if self._queue[0] == ticket and self._tokens >= 1:
+                        self._tokens -= 1
+                        self.granted += 1
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise UpstreamUnavailable('Too many pending MyAnimeList requests', retry_after=1 / self.rate)
+                    wait = (1 - self._tokens) / self.rate if self._tokens < 1 else remaining
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            self._refill()
+            return {
+                'tokens': round(self._tokens, 2),
+                'waiting': len(self._queue),
+                'granted': self.granted,
+                'rejected': self.rejected,
+            }
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive upstream failures.
+
+    While open, calls fail fast until `reset_timeout` (or a longer
+    upstream Retry-After) has passed; then a single trial call is let
+    through and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_until = 0.0
+        self._lock = threading.Lock()
+        self.short_circuited = 0
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if now >= self._opened_until:
+                # Open period over, or a half-open trial never reported back: let one trial through
+                self.state = self.HALF_OPEN
+                self._opened_until = now + self.reset_timeout
+                return
+            self.short_circuited += 1
+            retry_after = max(self._opened_until - now, 1)
+        raise UpstreamUnavailable('MyAnimeList is temporarily unavailable', retry_after=retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self, retry_after=None, trip=False):
+        """Count a failure; `trip` (or an upstream Retry-After) opens the circuit at once."""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold or retry_after or trip:
+                self.state = self.OPEN
+                self._opened_until = time.monotonic() + max(self.reset_timeout, retry_after or 0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'short_circuited': self.short_circuited,
+                'retry_in': max(0.0, round(self._opened_until - time.monotonic(), 1)) if self.state != self.CLOSED else 0,
+            }
+
+
+mal_limiter = TokenBucket(config.MAL_RATE_PER_SECOND, config.MAL_RATE_BURST)
+mal_breaker = CircuitBreaker(config.MAL_BREAKER_FAILURES, config.MAL_BREAKER_RESET)
@@ -0,0 +1,153 @@
+# services/response_shaping.py
+"""Named field profiles, compact JSON and gzip/brotli for the anime proxy routes.
+
+A request with ``profile=card|list|detail`` asks MAL (or the mirror) only
+for that profile's fields and gets a flattened body back: each anime is a
+plain object, ``main_picture`` becomes a single ``picture`` URL, genres and
+studios become name lists, a ranking's ``rank`` moves onto the item, empty
+values are dropped and paging links shrink to ``next_offset`` /
+``previous_offset``. Without a profile the MAL-shaped body is returned as
+before.
+"""
+import gzip
+from urllib.parse import parse_qs, urlsplit
+
+import brotli
+import orjson
+
+import config
+
+
+class Profile:
+    __slots__ = ('name', 'fields', 'picture')
+
+    def __init__(self, name, fields, picture):
+        self.name = name
+        self.fields = fields
+        self.picture = picture  # which main_picture size becomes `picture`
+
+
+PROFILES = {
+    # Poster grids: ranking, season, search and upcoming pages
+    'card': Profile('card', 'id,title,main_picture,mean,num_episodes', 'large'),
+    # Compact rows with enough metadata to filter on
+    'list': Profile('list', 'id,title,main_picture,mean,num_episodes,genres,status,start_date,media_type', 'medium'),
+    'detail': Profile(
+        'detail',
+        'id,title,main_picture,alternative_titles,mean,rank,popularity,num_episodes,genres,synopsis,'
+        'start_date,end_date,status,media_type,source,studios',
+        'large',
+    ),
+}
+
+# Response types worth compressing
+COMPRESSIBLE = frozenset(['application/json', 'application/x-ndjson', 'text/csv', 'text/html', 'text/plain'])
+
+
+def get_profile(name):
+    """Return ``(profile, error)``; both are None when no profile was asked for."""
+    if not name:
+        return None, None
+    if name not in PROFILES:
+        return None, f"profile must be one of {', '.join(PROFILES)}"
+    return PROFILES[name], None
+
+
+# -- shaping ---------------------------------------------------------------
+
+def shape_item(node, profile, wrapper=None):
+    item = {}
+    for key, value in node.items():
+        if key == 'main_picture':
+            key, value = 'picture', (value or {}).get(profile.picture)
+        elif key in ('genres', 'studios'):
+            value = [entry['name'] for entry in value or () if entry.get('name')]
+        if value not in (None, '', [], {}):
+            item[key] = value
+    rank = ((wrapper or {}).get('ranking') or {}).get('rank')
+    if rank is not None:
+        item['rank'] = rank
+    return item
+
+
+def _offset(url):
+    values = parse_qs(urlsplit(url).query).get('offset')
+    return int(values[0]) if values and values[0].isdigit() else 0
+
+
+def compact_paging(paging):
+    compact = {}
+    for key, value in (paging or {}).items():
+        if key in ('next', 'previous'):
+            compact[f'{key}_offset'] = _offset(value)
+        else:
+            # Season cursors and totals are already compact
+            compact[key] = value
+    return compact
+
+
+def shape_listing(body, profile):
+    """Flatten a MAL listing (``{"data": [{"node": ...}], "paging": ...}``)."""
+    shaped = {
+        'data': [shape_item(entry.get('node', entry), profile, entry) for entry in body.get('data', [])],
+        'paging': compact_paging(body.get('paging')),
+    }
+    if 'season' in body:
+        shaped['season'] = body['season']
+    return shaped
+
+
+# -- serialization ---------------------------------------------------------
+
+def dumps(body):
+    # orjson writes compact UTF-8 directly, several times faster than the stdlib encoder
+    return orjson.dumps(body, option=orjson.OPT_NON_STR_KEYS)
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick ``'br'``, ``'gzip'`` or None from an Accept-Encoding header."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    for coding in ('br', 'gzip'):
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=config.GZIP_LEVEL)
+
+
+def compressible(response):
+    return (
+        config.RESPONSE_COMPRESSION
+        and response.status_code == 200
+        and response.mimetype in COMPRESSIBLE
+        and 'Content-Encoding' not in response.headers
+    )
+
+
+def encode_response(response, data, accept_encoding):
+    """Compress `data` into `response` when it is big enough and the client accepts it."""
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or len(data) < config.COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # The encoded body differs byte for byte, so a strong ETag would be wrong
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
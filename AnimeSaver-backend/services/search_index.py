@@ -0,0 +1,286 @@
+# services/search_index.py
+"""In-process title search over the local anime catalog.
+
+Every title, English/Japanese title and synonym is split into normalized
+terms. A query matches an anime when each of its terms matches one of the
+anime's terms exactly, the last query term matches as a prefix (so the
+index doubles as autocomplete), or a term of three or more characters is
+close enough by trigram similarity to catch typos. Matches rank by text
+score, then MAL popularity, then mean score.
+
+The same index answers typeahead suggestions from a sorted array of every
+name suffix that starts at a word boundary. Prefixes of up to
+SUGGEST_PRECOMPUTED characters, whose ranges are too wide to rank per
+request, get their best SUGGEST_MAX_RESULTS anime precomputed at build time.
+
+An index is immutable once built; SearchIndexer rebuilds it from the
+catalog in a daemon thread and swaps it in whole.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+
+# Per-term scores: an exact hit outranks a prefix hit, which outranks a typo
+EXACT = 1.0
+PREFIX = 0.75
+FUZZY = 0.6
+# Added when the whole query equals, or starts, one of the anime's names
+NAME_EXACT = 2.0
+NAME_PREFIX = 1.0
+
+# Caps keep a one-letter prefix or a very common trigram from scanning the whole vocabulary
+MAX_PREFIX_TERMS = 500
+MAX_FUZZY_TERMS = 50
+
+SUGGEST_PRECOMPUTED = 3
+SUGGEST_MAX_RESULTS = 20
+# Longer prefixes rank at most this many name suffixes per request
+SUGGEST_MAX_SCAN = 2000
+
+
+def _fold(char):
+    # Strip accents from Latin letters only; decomposing kana would drop dakuten
+    base = unicodedata.normalize('NFKD', char)[0]
+    return base if base.isascii() else char
+
+
+def normalize(text):
+    """Lowercase, accent-folded text with runs of punctuation collapsed to one space."""
+    text = ''.join(_fold(char) for char in unicodedata.normalize('NFKC', text).lower())
+    return ' '.join(_WORD.findall(text))
+
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def anime_names(doc):
+    """Every name MAL lists for an anime: title, English, Japanese and synonyms."""
+    alternative = doc.get('alternative_titles') or {}
+    names = [doc.get('title'), alternative.get('en'), alternative.get('ja')]
+    names.extend(alternative.get('synonyms') or [])
+    return [name for name in names if isinstance(name, str) and name.strip()]
+
+
+class SearchResult:
+    __slots__ = ('ids', 'total', 'fuzzy')
+
+    def __init__(self, ids, total, fuzzy):
+        # Ranked anime IDs, the number of matches, and whether any query term only matched as a typo
+        self.ids = ids
+        self.total = total
+        self.fuzzy = fuzzy
+
+
+class SearchIndex:
+    def __init__(self, docs=()):
+        self.ids = []
+        self.popularity = []
+        self.mean = []
+        self.titles = []
+        self.thumbnails = []
+        suffixes = []                      # (name suffix, doc number)
+        self.names = defaultdict(set)      # normalized full name -> doc numbers
+        self.postings = defaultdict(set)   # term -> doc numbers
+        for doc in docs:
+            self._add(doc, suffixes)
+        self.terms = sorted(self.postings)
+        self.sorted_names = sorted(self.names)
+        self.trigram_terms = defaultdict(list)
+        self.trigram_counts = {}
+        for term in self.terms:
+            grams = trigrams(term)
+            self.trigram_counts[term] = len(grams)
+            for gram in grams:
+                self.trigram_terms[gram].append(term)
+        self._build_suggestions(suffixes)
+        self.built_at = time.time()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _add(self, doc, suffixes):
+        if doc.get('id') is None:
+            return
+        number = len(self.ids)
+        self.ids.append(doc['id'])
+        self.popularity.append(doc.get('popularity') or float('inf'))
+        self.mean.append(doc.get('mean') or 0)
+        self.titles.append(doc.get('title'))
+        self.thumbnails.append((doc.get('main_picture') or {}).get('medium'))
+        for name in anime_names(doc):
+            name = normalize(name)
+            self.names[name].add(number)
+            for term in name.split():
+                self.postings[term].add(number)
+            for match in _WORD.finditer(name):
+                suffixes.append((name[match.start():], number))
+
+    def _build_suggestions(self, suffixes):
+        suffixes = sorted(set(suffixes))
+        self.suffix_keys = [key for key, _ in suffixes]
+        self.suffix_numbers = [number for _, number in suffixes]
+        # Walk suffixes most popular anime first so each short prefix keeps its best results
+        self.top_prefixes = {}
+        for key, number in sorted(suffixes, key=lambda suffix: self._suggest_rank(suffix[1])):
+            for length in range(1, min(len(key), SUGGEST_PRECOMPUTED) + 1):
+                top = self.top_prefixes.setdefault(key[:length], [])
+                if len(top) < SUGGEST_MAX_RESULTS and number not in top:
+                    top.append(number)
+
+    # -- term matching --------------------------------------------------
+
+    @staticmethod
+    def _prefix_range(values, prefix, cap):
+        start = bisect.bisect_left(values, prefix)
+        end = bisect.bisect_left(values, prefix + '\U0010ffff', start)
+        return values[start:min(end, start + cap)]
+
+    def _prefix_terms(self, prefix):
+        return self._prefix_range(self.terms, prefix, MAX_PREFIX_TERMS)
+
+    def _fuzzy_terms(self, term, threshold):
+        """``[(term, similarity)]`` for vocabulary terms within `threshold` Dice similarity."""
+        grams = trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigram_terms.get(gram, ()))
+        matches = []
+        for candidate, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.trigram_counts[candidate])
+            if similarity >= threshold:
+                matches.append((candidate, similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches[:MAX_FUZZY_TERMS]
+
+    def _term_scores(self, term, prefix, threshold):
+        """``({doc number: score}, fuzzy)`` for one query term."""
+        scores = {}
+        for number in self.postings.get(term, ()):
+            scores[number] = EXACT
+        if prefix:
+            for candidate in self._prefix_terms(term):
+                for number in self.postings[candidate]:
+                    scores.setdefault(number, PREFIX)
+        if scores or len(term) < 3:
+            return scores, False
+        # Only fall back to typo matching when nothing matches as typed
+        for candidate, similarity in self._fuzzy_terms(term, threshold):
+            for number in self.postings[candidate]:
+                scores[number] = max(scores.get(number, 0), FUZZY * similarity)
+        return scores, bool(scores)
+
+    # -- queries --------------------------------------------------------
+
+    def search(self, query, limit=None, fuzzy_threshold=0.5):
+        """Rank the anime matching `query`; only the best `limit` IDs are returned when it is given."""
+        query = normalize(query or '')
+        terms = query.split()
+        if not terms:
+            return SearchResult([], 0, False)
+
+        totals = None
+        fuzzy = False
+        for position, term in enumerate(terms):
+            scores, term_fuzzy = self._term_scores(term, position == len(terms) - 1, fuzzy_threshold)
+            fuzzy = fuzzy or term_fuzzy
+            if totals is None:
+                totals = scores
+            else:
+                totals = {number: totals[number] + score for number, score in scores.items() if number in totals}
+            if not totals:
+                return SearchResult([], 0, False)
+
+        for number in self.names.get(query, ()):
+            if number in totals:
+                totals[number] += NAME_EXACT
+        for name in self._prefix_range(self.sorted_names, query, MAX_PREFIX_TERMS):
+            if name == query:
+                continue
+            for number in self.names[name]:
+                if number in totals:
+                    totals[number] += NAME_PREFIX
+
+        def rank(number):
+            return -round(totals[number], 3), self.popularity[number], -self.mean[number], self.ids[number]
+
+        if limit is None:
+            ranked = sorted(totals, key=rank)
+        else:
+            ranked = heapq.nsmallest(limit, totals, key=rank)
+        return SearchResult([self.ids[number] for number in ranked], len(totals), fuzzy)
+
+    # -- suggestions ----------------------------------------------------
+
+    def _suggest_rank(self, number):
+        return self.popularity[number], -self.mean[number], self.ids[number]
+
+    def suggest(self, prefix, limit=10):
+        """``[{id, title, main_picture}]`` for the most popular anime with a name word starting with `prefix`."""
+        prefix = normalize(prefix or '')
+        if not prefix:
+            return []
+        limit = min(limit, SUGGEST_MAX_RESULTS)
+        if len(prefix) <= SUGGEST_PRECOMPUTED:
+            numbers = self.top_prefixes.get(prefix, [])[:limit]
+        else:
+            start = bisect.bisect_left(self.suffix_keys, prefix)
+            end = bisect.bisect_left(self.suffix_keys, prefix + '\U0010ffff', start)
+            candidates = set(self.suffix_numbers[start:min(end, start + SUGGEST_MAX_SCAN)])
+            numbers = heapq.nsmallest(limit, candidates, key=self._suggest_rank)
+        return [
+            {'id': self.ids[number], 'title': self.titles[number], 'main_picture': {'medium': self.thumbnails[number]}}
+            for number in numbers
+        ]
+
+    def stats(self):
+        return {
+            'anime': len(self.ids),
+            'terms': len(self.terms),
+            'age': round(time.time() - self.built_at, 1),
+        }
+
+
+class SearchIndexer:
+    """Holds the current SearchIndex and rebuilds it from ``load()`` every `interval` seconds."""
+
+    def __init__(self, load, interval):
+        self.load = load
+        self.interval = interval
+        self.index = SearchIndex()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run_once(self):
+        try:
+            index = SearchIndex(self.load())
+        except Exception:
+            logger.exception('search index rebuild failed')
+            return
+        # Keep serving the old index if the catalog came back empty
+        if len(index) or not len(self.index):
+            self.index = index
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='search-indexer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
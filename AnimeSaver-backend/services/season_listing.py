@@ -0,0 +1,131 @@
+# services/season_listing.py
+import base64
+import hashlib
+import json
+
+import config
+from services.anime_cache import parse_fields, format_fields, project
+from services.cache import TTLCache, MISS, STALE
+from services.shared_cache import SharedNamespace, format_key, shared_store
+
+
+class CursorError(ValueError):
+    pass
+
+
+def _signature(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def encode_cursor(offset, *query):
+    payload = json.dumps({'o': offset, 's': _signature(*query)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, *query):
+    """Return the offset stored in `cursor`, which must have been issued for the same query."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        offset = int(payload['o'])
+    except (ValueError, KeyError, TypeError):
+        raise CursorError('Malformed cursor')
+    if payload.get('s') != _signature(*query) or offset < 0:
+        raise CursorError('Cursor does not match this query')
+    return offset
+
+
+def filter_and_sort(items, min_rating=None, max_rating=None, sort=None, sort_order='desc'):
+    """Apply rating filters and the optional `mean` re-sort over a whole season."""
+    if min_rating is not None or max_rating is not None:
+        filtered = []
+        for item in items:
+            rating = item.get('node', {}).get('mean') or 0
+            if (min_rating is None or rating >= min_rating) and (max_rating is None or rating <= max_rating):
+                filtered.append(item)
+        items = filtered
+    if sort == 'mean':
+        items = sorted(items, key=lambda item: item['node'].get('mean') or 0, reverse=(sort_order == 'desc'))
+    return items
+
+
+class SeasonListings:
+    """Caches complete seasonal listings so filters and sorts run over the whole season.
+
+    With a `shared` tier, a local miss is looked up there before loading from
+    MAL, and every loaded season is written through to it.
+    """
+
+    def __init__(self, max_entries, ttl, stale_ttl, shared=None):
+        self.cache = TTLCache(max_entries, ttl, stale_ttl)
+        self.shared = shared
+
+    def get_cached(self, year, season, upstream_sort, fields, load):
+        """Return the cached season, or None on a miss.
+
+        Stale entries are returned immediately and refreshed in the background
+        through ``load(fields_str)``.
+        """
+        fields = parse_fields(fields)
+        key = (int(year), season, upstream_sort, fields)
+        items, state = self.cache.lookup(key)
+        if state == STALE:
+            self.cache.revalidate(key, lambda: self._refresh(key, load))
+        elif state == MISS and self.shared is not None:
+            items = self.shared.get(format_key(key))
+            if items is not None:
+                self.cache.set(key, items)
+        return items
+
+    def store(self, year, season, upstream_sort, fields, items):
+        if _ok(items) is not None:
+            key = (int(year), season, upstream_sort, parse_fields(fields))
+            self.cache.set(key, items)
+            if self.shared is not None:
+                self.shared.set(format_key(key), items)
+
+    def _refresh(self, key, load):
+        items = _ok(load(format_fields(key[3])))
+        if items is not None and self.shared is not None:
+            self.shared.set(format_key(key), items)
+        return items
+
+    def get(self, year, season, upstream_sort, fields, load):
+        """Return every item of a season, calling ``load(fields_str)`` on a miss.
+
+        `load` returns the list of MAL items, or a ``(body, status, headers)`` error
+        tuple which is passed straight through and not cached.
+        """
+        items = self.get_cached(year, season, upstream_sort, fields, load)
+        if items is not None:
+            return items
+        items = load(format_fields(parse_fields(fields)))
+        self.store(year, season, upstream_sort, fields, items)
+        return items
+
+    def stats(self):
+        stats = self.cache.stats()
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+
+def _ok(items):
+    return items if isinstance(items, list) else None
+
+
+def page(items, fields, limit, offset):
+    """Slice one page out of the filtered season and trim nodes to the requested fields."""
+    fields = parse_fields(fields)
+    return [
+        {**item, 'node': project(item['node'], fields)}
+        for item in items[offset:offset + limit]
+    ]
+
+
+season_listings = SeasonListings(
+    config.SEASON_CACHE_MAX_ENTRIES,
+    config.SEASON_CACHE_TTL,
+    config.SEASON_CACHE_STALE_TTL,
+    shared=SharedNamespace('seasons', config.SEASON_CACHE_TTL, store=shared_store()),
+)
@@ -0,0 +1,149 @@
+# services/share_store.py
+"""Shared watchlists.
+
+A snapshot share stores a copy of the list the client sent; a live share
+stores only the owner's userId and a filter/sort spec and is rendered from
+the current watchlist at read time. Either kind is stored once per
+distinct content hash, so sharing the same thing again returns the same
+link and only pushes its expiry forward. Reads go through a two-level cache
+(services/shared_cache.py).
+"""
+import hashlib
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+import config
+from services.cache import TTLCache
+from services.shared_cache import TwoLevelCache
+
+
+SNAPSHOT = 'snapshot'
+LIVE = 'live'
+
+
+def content_hash(content):
+    body = json.dumps(content, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def share_content(user_id, anime_list=None, spec=None):
+    """The stored body of a share: a copied list, or a live reference when `spec` is given."""
+    if spec is not None:
+        return {'kind': LIVE, 'userId': user_id, 'spec': spec}
+    return {'userId': user_id, 'animeList': anime_list}
+
+
+def _public(doc):
+    if doc.get('kind') == LIVE:
+        return {'kind': LIVE, 'userId': doc['userId'], 'spec': doc['spec']}
+    return {'kind': SNAPSHOT, 'userId': doc['userId'], 'animeList': doc['animeList']}
+
+
+class MongoShareStore:
+    """Shares live in the `shared_lists` collection; a TTL index removes expired ones."""
+
+    def __init__(self, db, ttl=config.SHARE_TTL, cache=None):
+        self.shares = db['shared_lists']
+        self.ttl = ttl
+        self.cache = cache
+
+    def ensure_indexes(self):
+        # Link IDs are the _id, so lookups by link already use the _id index
+        self.shares.create_index('contentHash', unique=True)
+        self.shares.create_index('expires_at', expireAfterSeconds=0)
+
+    def create(self, content):
+        """Return the link ID for `content`, reusing an existing share of identical content."""
+        digest = content_hash(content)
+        now = datetime.now(timezone.utc)
+        for _ in range(2):
+            try:
+                doc = self.shares.find_one_and_update(
+                    {'contentHash': digest},
+                    {
+                        '$setOnInsert': {
+                            **content,
+                            '_id': str(uuid.uuid4()),
+                            'created_at': now,
+                        },
+                        '$set': {'expires_at': now + timedelta(seconds=self.ttl)},
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return doc['_id']
+            except DuplicateKeyError:
+                # A concurrent share of the same content won the upsert; the retry finds it
+                continue
+        raise RuntimeError('could not store shared list')
+
+    def get(self, link_id):
+        if self.cache is not None:
+            cached = self.cache.get(link_id)
+            if cached is not None:
+                return cached
+        # The TTL monitor only runs once a minute, so filter out expired shares explicitly
+        doc = self.shares.find_one({'_id': link_id, 'expires_at': {'$gt': datetime.now(timezone.utc)}})
+        if doc is None:
+            return None
+        shared = _public(doc)
+        if self.cache is not None:
+            self.cache.set(link_id, shared)
+        return shared
+
+
+class MemoryShareStore:
+    """Single-process store for local development; shares are lost on restart."""
+
+    def __init__(self, ttl=config.SHARE_TTL):
+        self.ttl = ttl
+        # Holds link_id -> share and ('hash', digest) -> link_id, expiring together
+        self._shares = TTLCache(config.SHARE_MEMORY_MAX_ENTRIES, ttl)
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        pass
+
+    def create(self, content):
+        digest = content_hash(content)
+        with self._lock:
+            link_id = self._shares.get(('hash', digest))
+            if link_id is None or self._shares.get(link_id) is None:
+                link_id = str(uuid.uuid4())
+            self._shares.set(('hash', digest), link_id)
+            self._shares.set(link_id, _public(content))
+        return link_id
+
+    def get(self, link_id):
+        return self._shares.get(link_id)
+
+
+# Hot shared lists, shared by every request in this process (and every worker
+# when a shared cache tier is configured)
+shared_list_cache = TwoLevelCache('shares', config.SHARE_CACHE_MAX_ENTRIES, config.SHARE_CACHE_TTL)
+# Hydrated renderings of live shares, keyed by (link_id, owner's watchlist
+# version): a watchlist change moves readers to a new key, and the TTL
+# bounds how stale the anime metadata can get.
+rendered_share_cache = TwoLevelCache('share-renders', config.SHARE_RENDER_MAX_ENTRIES, config.SHARE_RENDER_TTL)
+
+_memory_store = None
+_indexed = False
+
+
+def share_store(db):
+    """Return the configured share store, creating its indexes once per process."""
+    global _memory_store, _indexed
+    if config.SHARE_STORE == 'memory':
+        if _memory_store is None:
+            _memory_store = MemoryShareStore()
+        return _memory_store
+    store = MongoShareStore(db, cache=shared_list_cache)
+    if not _indexed:
+        store.ensure_indexes()
+        _indexed = True
+    return store
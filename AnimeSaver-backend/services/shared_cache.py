@@ -0,0 +1,244 @@
+# services/shared_cache.py
+"""Two-level cache: a per-process LRU in front of a store shared by every worker.
+
+CACHE_BACKEND picks the shared tier:
+
+- ``local`` (default): no shared tier; caches behave like a plain TTLCache.
+- ``redis``: any Redis-protocol server at REDIS_URL.
+- ``memory``: an in-process fake with the same interface, for tests and
+  single-process development.
+
+Shared keys are ``<CACHE_KEY_PREFIX>:<namespace>:v<version>:<key>``; bump a
+cache's version when the shape of its values changes so old entries are
+simply never read again. Values are stored as orjson, zlib-compressed above
+CACHE_COMPRESS_MIN_BYTES. Deleting a key publishes it on
+CACHE_INVALIDATION_CHANNEL so every other process drops its local copy.
+If the shared store fails, reads fall back to the local tier.
+"""
+import logging
+import threading
+import time
+import zlib
+
+import orjson
+
+import config
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_RAW = b'j'
+_COMPRESSED = b'z'
+
+
+def format_key(key):
+    """Stable string form of a cache key (strings, numbers, tuples and frozensets)."""
+    if isinstance(key, (tuple, list)):
+        return ':'.join(format_key(part) for part in key)
+    if isinstance(key, frozenset):
+        return ','.join(sorted(format_key(part) for part in key))
+    return str(key)
+
+
+def encode(value):
+    data = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    if len(data) >= config.CACHE_COMPRESS_MIN_BYTES:
+        return _COMPRESSED + zlib.compress(data, 6)
+    return _RAW + data
+
+
+def decode(data):
+    marker, body = data[:1], data[1:]
+    if marker == _COMPRESSED:
+        body = zlib.decompress(body)
+    return orjson.loads(body)
+
+
+# -- stores ----------------------------------------------------------------
+
+class RedisStore:
+    def __init__(self, url):
+        # Imported here so the local and memory backends do not need redis-py
+        import redis
+
+        self.redis = redis
+        self.client = redis.Redis.from_url(url, socket_timeout=config.CACHE_STORE_TIMEOUT)
+        # Failures that SharedNamespace treats as a store outage
+        self.errors = (redis.RedisError, OSError)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+    def listen(self, channel, callback):
+        """Call ``callback(message)`` for every message on `channel`, reconnecting on errors."""
+        def run():
+            while True:
+                try:
+                    pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(channel)
+                    for message in pubsub.listen():
+                        callback(message['data'])
+                except self.redis.RedisError:
+                    logger.warning('cache invalidation listener lost its connection; retrying')
+                    time.sleep(1)
+
+        threading.Thread(target=run, name='cache-invalidation', daemon=True).start()
+
+
+class MemoryStore:
+    """Dict-backed stand-in for Redis; publish() delivers to listeners synchronously."""
+
+    errors = (OSError,)
+
+    def __init__(self):
+        self._data = {}
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def publish(self, channel, message):
+        for callback in list(self._listeners.get(channel, ())):
+            callback(message)
+
+    def listen(self, channel, callback):
+        self._listeners.setdefault(channel, []).append(callback)
+
+
+_store = None
+_store_lock = threading.Lock()
+# namespace -> TwoLevelCaches, for routing invalidation messages
+_caches = {}
+
+
+def _on_invalidate(message):
+    try:
+        namespace, key = orjson.loads(message)
+    except (orjson.JSONDecodeError, TypeError, ValueError):
+        return
+    for cache in _caches.get(namespace, ()):
+        cache.local.delete(key)
+
+
+def shared_store():
+    """Return the configured shared store, or None when CACHE_BACKEND is local."""
+    global _store
+    if config.CACHE_BACKEND == 'local':
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = RedisStore(config.REDIS_URL) if config.CACHE_BACKEND == 'redis' else MemoryStore()
+            _store.listen(config.CACHE_INVALIDATION_CHANNEL, _on_invalidate)
+        return _store
+
+
+# -- caches ----------------------------------------------------------------
+
+class SharedNamespace:
+    """The shared tier alone: namespaced, versioned, serialized access to the store."""
+
+    def __init__(self, namespace, ttl, version=1, store=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.prefix = f'{config.CACHE_KEY_PREFIX}:{namespace}:v{version}:'
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _call(self, method, *args):
+        try:
+            return getattr(self.store, method)(*args)
+        except self.store.errors:
+            # A shared tier outage must never fail the request
+            self.errors += 1
+            logger.warning('shared cache %s failed for %s', method, self.namespace, exc_info=True)
+            return None
+
+    def get(self, key):
+        """Return the stored value, or None on a miss (or when the store is unavailable)."""
+        if self.store is None:
+            return None
+        data = self._call('get', self.prefix + key)
+        if data is None:
+            self.misses += 1
+            return None
+        try:
+            value = decode(data)
+        except (orjson.JSONDecodeError, zlib.error):
+            self.errors += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.store is not None:
+            self._call('set', self.prefix + key, encode(value), self.ttl)
+
+    def delete(self, key):
+        if self.store is not None:
+            self._call('delete', self.prefix + key)
+            self._call('publish', config.CACHE_INVALIDATION_CHANNEL, orjson.dumps([self.namespace, key]))
+
+    def stats(self):
+        return {'enabled': self.store is not None, 'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
+
+
+class TwoLevelCache:
+    """Local TTLCache in front of a SharedNamespace, with the get/set/delete interface of TTLCache."""
+
+    def __init__(self, namespace, max_entries, ttl, version=1, local_ttl=None):
+        self.local = TTLCache(max_entries, local_ttl or ttl)
+        self.shared = SharedNamespace(namespace, ttl, version, shared_store())
+        _caches.setdefault(namespace, []).append(self)
+
+    def get(self, key, default=None):
+        key = format_key(key)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        value = self.shared.get(key)
+        if value is None:
+            return default
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        key = format_key(key)
+        self.local.set(key, value)
+        self.shared.set(key, value)
+
+    def delete(self, key):
+        """Drop `key` here, in the shared store and, through the broadcast, in every other process."""
+        key = format_key(key)
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def stats(self):
+        return {'local': self.local.stats(), 'shared': self.shared.stats()}
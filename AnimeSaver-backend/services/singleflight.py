@@ -0,0 +1,106 @@
+# services/singleflight.py
+import asyncio
+import threading
+
+from services.anime_cache import parse_fields, format_fields
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive the same result (or exception). Results
+    are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.collapsed = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.collapsed += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+        else:
+            call.event.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            'executed': self.executed,
+            'collapsed': self.collapsed,
+            'in_flight': in_flight,
+        }
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for coroutine functions.
+
+    The shared call runs as its own task, so a caller that is cancelled
+    (e.g. a client disconnect) does not cancel it for everyone else.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.executed = 0
+        self.collapsed = 0
+
+    async def do(self, key, fn):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.executed += 1
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            'executed': self.executed,
+            'collapsed': self.collapsed,
+            'in_flight': len(self._tasks),
+        }
+
+
+def request_key(endpoint, params=None):
+    """Normalize (endpoint, params) so equivalent upstream requests share a key."""
+    normalized = []
+    for name, value in (params or {}).items():
+        value = str(value)
+        if name == 'fields':
+            value = format_fields(parse_fields(value))
+        normalized.append((name, value))
+    return endpoint, tuple(sorted(normalized))
@@ -0,0 +1,256 @@
+# services/snapshots.py
+"""Precomputed ranking and season listings.
+
+With a shared cache configured, one worker per deployment builds the
+snapshots: whichever holds the Mongo lease. It publishes each snapshot to
+the shared store and every other worker installs it from there. Without a
+shared cache each worker builds its own.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from services.anime_cache import parse_fields, field_name, project
+from services.shared_cache import format_key
+
+logger = logging.getLogger(__name__)
+
+# Fields captured in every snapshot; covers what the ranking and season pages ask for.
+SNAPSHOT_FIELDS = 'id,title,main_picture,mean,rank,popularity,num_list_users,num_episodes,genres,status,start_date,media_type'
+SNAPSHOT_FIELD_NAMES = frozenset(SNAPSHOT_FIELDS.split(','))
+
+
+class Snapshot:
+    """An immutable, fully built listing served by offset slicing."""
+
+    __slots__ = ('key', 'items', 'generation', 'etag', 'built_at')
+
+    def __init__(self, key, items, generation, built_at=None):
+        self.key = key
+        self.items = tuple(items)
+        self.generation = generation
+        body = json.dumps(self.items, sort_keys=True, separators=(',', ':'))
+        self.etag = hashlib.sha1(body.encode('utf-8')).hexdigest()[:16]
+        self.built_at = built_at or time.time()
+
+    def covers(self, fields):
+        return all(field_name(token) in SNAPSHOT_FIELD_NAMES for token in parse_fields(fields))
+
+    def page(self, fields, limit, offset):
+        fields = parse_fields(fields)
+        return [{**item, 'node': project(item['node'], fields)} for item in self.items[offset:offset + limit]]
+
+    def etag_for(self, *params):
+        """ETag for one page/projection of this snapshot."""
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:8]
+        return f'{self.etag}-{digest}'
+
+
+class SnapshotStore:
+    def __init__(self):
+        self._snapshots = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._snapshots.get(key)
+
+    def rebuild(self, key, load, next_generation=None):
+        """Build a new snapshot for `key` from ``load()``; keep the old one if loading fails.
+
+        ``next_generation(key)`` numbers a changed snapshot; by default the
+        generations are counted in this process.
+        """
+        items = load()
+        if not isinstance(items, list):
+            raise RuntimeError(f'snapshot {key} failed to load: {items!r}')
+        with self._lock:
+            current = self._snapshots.get(key)
+            if current is not None and current.items == tuple(items):
+                return current
+            if next_generation is None:
+                generation = self._generations.get(key, 0) + 1
+            else:
+                generation = next_generation(key)
+            snapshot = Snapshot(key, items, generation)
+            self._generations[key] = generation
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def install(self, snapshot):
+        """Serve a snapshot built elsewhere, unless it is the generation already served."""
+        with self._lock:
+            current = self._snapshots.get(snapshot.key)
+            if current is not None and current.generation == snapshot.generation:
+                return current
+            self._generations[snapshot.key] = snapshot.generation
+            self._snapshots[snapshot.key] = snapshot
+        return snapshot
+
+    def retain(self, keys):
+        """Drop snapshots that are no longer scheduled (e.g. last season)."""
+        with self._lock:
+            for key in list(self._snapshots):
+                if key not in keys:
+                    del self._snapshots[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                ':'.join(str(part) for part in key): {
+                    'generation': snapshot.generation,
+                    'etag': snapshot.etag,
+                    'items': len(snapshot.items),
+                    'age': round(time.time() - snapshot.built_at, 1),
+                }
+                for key, snapshot in self._snapshots.items()
+            }
+
+
+class SnapshotLease:
+    """A Mongo document naming the one process that builds snapshots.
+
+    The holder renews it on every cycle; once it has lapsed for `ttl`
+    seconds any other process can take it over.
+    """
+
+    def __init__(self, collection, ttl, name='builder', holder=None):
+        self.collection = collection
+        self.ttl = ttl
+        self.name = name
+        self._holder = holder
+
+    @property
+    def holder(self):
+        # Resolved on use: workers forked from a preloaded app share the import-time pid
+        return self._holder or f'{socket.gethostname()}:{os.getpid()}'
+
+    def acquire(self):
+        """Take or renew the lease; False while another process holds it."""
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.update_one(
+                {"_id": self.name, "$or": [{"holder": self.holder}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": self.holder, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The lease exists and is held by someone else, so the upsert collided with it
+            return False
+        return True
+
+
+class SharedSnapshots:
+    """Snapshots published to the shared cache by the lease holder.
+
+    Generations are counted per key in Mongo, so they keep increasing when
+    the lease moves to another process.
+    """
+
+    def __init__(self, shared, state):
+        self.shared = shared
+        self.state = state
+
+    def next_generation(self, key):
+        doc = self.state.find_one_and_update(
+            {"_id": format_key(key)}, {"$inc": {"generation": 1}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        return doc['generation']
+
+    def publish(self, snapshot):
+        self.shared.set(format_key(snapshot.key), {
+            'items': list(snapshot.items), 'generation': snapshot.generation, 'built_at': snapshot.built_at,
+        })
+
+    def fetch(self, key):
+        value = self.shared.get(format_key(key))
+        if value is None:
+            return None
+        return Snapshot(key, value['items'], value['generation'], value['built_at'])
+
+
+class SnapshotScheduler:
+    """Rebuilds every target snapshot on a fixed interval in a daemon thread.
+
+    ``targets()`` returns ``{key: load}`` and is re-evaluated every cycle so
+    that seasonal keys roll over on their own.
+
+    Given a `lease` and `shared` snapshots, only the lease holder builds,
+    every `interval` seconds, and publishes what it built; the other
+    workers install the published snapshots every `poll_interval` seconds.
+    """
+
+    def __init__(self, store, targets, interval, lease=None, shared=None, poll_interval=None):
+        self.store = store
+        self.targets = targets
+        self.interval = interval
+        self.lease = lease
+        self.shared = shared
+        self.poll_interval = poll_interval or interval
+        self.leader = False
+        self._built_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run_once(self):
+        targets = self.targets()
+        if self.shared is None:
+            self._build(targets)
+        else:
+            self.leader = self.lease.acquire()
+            if not self.leader:
+                self._built_at = None
+                self._follow(targets)
+            elif self._built_at is None or time.monotonic() - self._built_at >= self.interval:
+                # Start from what was last published, so unchanged listings keep their generation
+                self._follow([key for key in targets if self.store.get(key) is None])
+                self._build(targets)
+        self.store.retain(set(targets))
+
+    def _build(self, targets):
+        next_generation = self.shared.next_generation if self.shared else None
+        for key, load in targets.items():
+            if self.shared is not None and not self.lease.acquire():
+                # Lost the lease mid-cycle (e.g. a very slow build); the new holder finishes
+                self.leader = False
+                return
+            try:
+                snapshot = self.store.rebuild(key, load, next_generation)
+            except Exception:
+                logger.exception('snapshot rebuild failed for %s', key)
+                continue
+            if self.shared is not None:
+                self.shared.publish(snapshot)
+        self._built_at = time.monotonic()
+
+    def _follow(self, keys):
+        for key in keys:
+            snapshot = self.shared.fetch(key)
+            if snapshot is not None:
+                self.store.install(snapshot)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval if self.shared is None else self.poll_interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='snapshot-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,26 @@
+# services/user_projections.py
+"""Projections for queries on the users collection.
+
+Each route asks only for the fields it reads, so auth checks and profile
+lookups never pull an embedded watchlist over the wire.
+"""
+
+# login: verify the password hash and put the admin flag in the token
+LOGIN = {"userPassword": 1, "isAdmin": 1}
+# admin_required (legacy User-Email header) and token refresh: check the admin flag
+ADMIN_CHECK = {"isAdmin": 1}
+# role cache eviction: the email key used by the legacy User-Email header path
+EMAIL = {"userEmail": 1}
+# get_user and get_all_users response fields
+PROFILE_FIELDS = ("userName", "userEmail", "userPassword", "isAdmin")
+LISTING_FIELDS = ("userName", "userEmail")
+# live shared lists: owner name and watchlist version
+SHARE_OWNER = {"userName": 1, "watchlistVersion": 1}
+# conditional GETs on per-user routes: the ETag is built from these before any watchlist is read
+WATCHLIST_VERSION = {"watchlistVersion": 1}
+PROFILE_VERSION = {field: 1 for field in (*PROFILE_FIELDS, "watchlistVersion")}
+
+
+def with_watchlist(fields, store):
+    """Projection for `fields` plus whatever the watchlist backend reads from the user document."""
+    return {field: 1 for field in (*fields, *store.user_fields)}
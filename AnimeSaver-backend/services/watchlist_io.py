@@ -0,0 +1,95 @@
+# services/watchlist_io.py
+import csv
+import io
+import json
+import xml.etree.ElementTree as ET
+
+# MAL list export statuses that count as watched
+MAL_WATCHED_STATUSES = frozenset({'completed'})
+
+
+class BulkError(ValueError):
+    pass
+
+
+def normalize_id(anime_id):
+    """Bulk IDs are stored as integers, the way the frontend saves MAL IDs."""
+    value = str(anime_id).strip()
+    if not value.isdigit():
+        raise BulkError(f'Invalid anime ID: {anime_id!r}')
+    return int(value)
+
+
+def parse_bulk_request(data, max_items):
+    """Turn a JSON bulk body into ``(adds, removes, watched)``.
+
+    ``add`` takes IDs or ``{"anime_id", "watched"}`` objects, ``remove`` takes
+    IDs and ``watched`` maps IDs to booleans. Later duplicates win.
+    """
+    if not isinstance(data, dict):
+        raise BulkError('Request body must be a JSON object')
+    add = data.get('add') or []
+    remove = data.get('remove') or []
+    watched = data.get('watched') or {}
+    if not isinstance(add, list) or not isinstance(remove, list) or not isinstance(watched, dict):
+        raise BulkError("'add' and 'remove' must be lists and 'watched' an object")
+    if len(add) + len(remove) + len(watched) > max_items:
+        raise BulkError(f'At most {max_items} changes can be applied at once')
+
+    adds = {}
+    for item in add:
+        if isinstance(item, dict):
+            adds[normalize_id(item.get('anime_id'))] = bool(item.get('watched', False))
+        else:
+            adds[normalize_id(item)] = False
+    removes = list(dict.fromkeys(normalize_id(anime_id) for anime_id in remove))
+    toggles = {normalize_id(anime_id): bool(value) for anime_id, value in watched.items()}
+    return adds, removes, toggles
+
+
+def parse_mal_xml(stream, max_items):
+    """Stream-parse a MyAnimeList XML list export into ``{anime_id: watched}``.
+
+    Each ``<anime>`` element is dropped as soon as it is read, so memory stays
+    flat however large the export is.
+    """
+    adds = {}
+    try:
+        context = ET.iterparse(stream, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event != 'end' or elem.tag != 'anime':
+                continue
+            anime_id = elem.findtext('series_animedb_id')
+            status = (elem.findtext('my_status') or '').strip().lower()
+            if anime_id:
+                adds[normalize_id(anime_id)] = status in MAL_WATCHED_STATUSES
+                if len(adds) > max_items:
+                    raise BulkError(f'At most {max_items} changes can be applied at once')
+            root.clear()
+    except (ET.ParseError, StopIteration):
+        raise BulkError('Malformed MyAnimeList XML export')
+    return adds
+
+
+EXPORT_COLUMNS = ('id', 'watched', 'progress', 'added_at')
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')) + '\n'
+
+
+def export_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            key: json.dumps(value) if isinstance(value, (dict, list)) else value
+            for key, value in row.items()
+        })
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
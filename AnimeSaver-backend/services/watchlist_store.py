@@ -0,0 +1,290 @@
+# services/watchlist_store.py
+"""Watchlist storage backends.
+
+``embedded`` keeps entries in ``users.savedList`` (the original layout);
+``collection`` keeps one document per entry in the ``watchlist`` collection,
+keyed by a unique (userId, animeId) index. Both return entries shaped like
+the embedded ones: ``{"id": ..., "watched": ...}`` plus any extra fields.
+"""
+from datetime import datetime, timezone
+
+import pymongo
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+import config
+
+# Results of single-entry mutations
+ADDED = 'added'
+UPDATED = 'updated'
+REMOVED = 'removed'
+DUPLICATE = 'duplicate'
+NOT_IN_LIST = 'not_in_list'
+NO_USER = 'no_user'
+
+DUPLICATE_KEY = 11000
+
+# Counter on the user document bumped by every watchlist change; caches of
+# anything rendered from a watchlist key on it instead of being purged.
+VERSION_FIELD = 'watchlistVersion'
+BUMP_VERSION = {"$inc": {VERSION_FIELD: 1}}
+
+
+def anime_key(anime_id):
+    """MAL IDs are stored as integers; anything else is kept as sent."""
+    if isinstance(anime_id, str) and anime_id.strip().isdigit():
+        return int(anime_id)
+    return anime_id
+
+
+def _id_forms(ids):
+    # Older entries may hold the ID as a string, bulk entries as an integer
+    forms = []
+    for anime_id in ids:
+        for form in (anime_key(anime_id), str(anime_id)):
+            if form not in forms:
+                forms.append(form)
+    return forms
+
+
+class EmbeddedWatchlist:
+    """Entries live in the user document's `savedList` array."""
+
+    # Fields saved_lists() reads from the user documents it is given
+    user_fields = ('savedList',)
+
+    def __init__(self, db):
+        self.users = db['users']
+
+    def ensure_indexes(self):
+        pass
+
+    def _user_exists(self, user_id):
+        return self.users.count_documents({"_id": ObjectId(user_id)}, limit=1) > 0
+
+    def entries(self, user_id):
+        user = self.users.find_one({"_id": ObjectId(user_id)}, {"savedList": 1})
+        if user is None:
+            return None
+        return user.get('savedList', [])
+
+    def saved_lists(self, users):
+        """Map each user document's string ID to its entries."""
+        return {str(user['_id']): user.get('savedList', []) for user in users}
+
+    def add(self, user_id, anime_id, watched):
+        # The $nin guard makes the duplicate check and the push a single atomic
+        # update; it matches both ID forms, like bulk() does
+        result = self.users.update_one(
+            {"_id": ObjectId(user_id), "savedList.id": {"$nin": _id_forms([anime_id])}},
+            {"$push": {"savedList": {"id": anime_key(anime_id), "watched": watched}}, **BUMP_VERSION}
+        )
+        if result.matched_count:
+            return ADDED
+        return DUPLICATE if self._user_exists(user_id) else NO_USER
+
+    def update(self, user_id, anime_id, changes):
+        forms = _id_forms([anime_id])
+        result = self.users.update_one(
+            {"_id": ObjectId(user_id), "savedList.id": {"$in": forms}},
+            {"$set": {f"savedList.$[entry].{key}": value for key, value in changes.items()}, **BUMP_VERSION},
+            array_filters=[{"entry.id": {"$in": forms}}],
+        )
+        if result.matched_count:
+            return UPDATED
+        return NOT_IN_LIST if self._user_exists(user_id) else NO_USER
+
+    def remove(self, user_id, anime_id):
+        result = self.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$pull": {"savedList": {"id": {"$in": _id_forms([anime_id])}}}, **BUMP_VERSION}
+        )
+        return REMOVED if result.matched_count else NO_USER
+
+    def bulk(self, user_id, adds, removes, toggles):
+        """Apply removes, then adds, then watched toggles in one atomic pipeline update.
+
+        Returns the number of entries actually added (anime already saved are
+        not counted), or None when the user does not exist. The count comes
+        from the document as it was just before this update.
+        """
+        entries = {'$ifNull': ['$savedList', []]}
+        pipeline = []
+        if removes:
+            pipeline.append({'$set': {'savedList': {'$filter': {
+                'input': entries,
+                'cond': {'$not': [{'$in': ['$$this.id', _id_forms(removes)]}]},
+            }}}})
+        if adds:
+            new_entries = [{'id': anime_id, 'watched': watched} for anime_id, watched in adds.items()]
+            saved_ids = {'$ifNull': ['$savedList.id', []]}
+            # Append only entries whose ID is not saved yet
+            pipeline.append({'$set': {'savedList': {'$concatArrays': [
+                entries,
+                {'$filter': {
+                    'input': {'$literal': new_entries},
+                    'cond': {'$not': [{'$or': [
+                        {'$in': ['$$this.id', saved_ids]},
+                        {'$in': [{'$toString': '$$this.id'}, saved_ids]},
+                    ]}]},
+                }},
+            ]}}})
+        branches = []
+        for value in (True, False):
+            ids = [anime_id for anime_id, watched in toggles.items() if watched is value]
+            if ids:
+                branches.append({
+                    'case': {'$in': ['$$this.id', _id_forms(ids)]},
+                    'then': {'$mergeObjects': ['$$this', {'watched': value}]},
+                })
+        if branches:
+            pipeline.append({'$set': {'savedList': {'$map': {
+                'input': entries,
+                'in': {'$switch': {'branches': branches, 'default': '$$this'}},
+            }}}})
+        pipeline.append({'$set': {VERSION_FIELD: {'$add': [{'$ifNull': [f'${VERSION_FIELD}', 0]}, 1]}}})
+
+        before = self.users.find_one_and_update(
+            {"_id": ObjectId(user_id)}, pipeline,
+            projection={"savedList.id": 1}, return_document=ReturnDocument.BEFORE,
+        )
+        if before is None:
+            return None
+        saved = {str(entry.get('id')) for entry in before.get('savedList', [])}
+        saved -= {str(anime_id) for anime_id in removes}
+        return sum(1 for anime_id in adds if str(anime_id) not in saved)
+
+    def delete_user(self, user_id):
+        # Entries go away with the user document
+        pass
+
+
+class CollectionWatchlist:
+    """One document per entry in the `watchlist` collection."""
+
+    user_fields = ()
+    ENTRY_FIELDS = {"_id": 0, "userId": 1, "animeId": 1, "watched": 1, "progress": 1, "added_at": 1}
+
+    def __init__(self, db):
+        self.users = db['users']
+        self.watchlist = db['watchlist']
+
+    def ensure_indexes(self):
+        self.watchlist.create_index(
+            [('userId', pymongo.ASCENDING), ('animeId', pymongo.ASCENDING)], unique=True, name='user_anime'
+        )
+        self.watchlist.create_index([('userId', pymongo.ASCENDING), ('added_at', pymongo.ASCENDING)])
+
+    def _user_exists(self, user_id):
+        return self.users.count_documents({"_id": ObjectId(user_id)}, limit=1) > 0
+
+    def _bump_version(self, user_id):
+        self.users.update_one({"_id": ObjectId(user_id)}, BUMP_VERSION)
+
+    @staticmethod
+    def _entry(doc):
+        entry = {"id": doc['animeId'], "watched": doc.get('watched', False), "progress": doc.get('progress', 0)}
+        if doc.get('added_at'):
+            entry['added_at'] = doc['added_at'].isoformat()
+        return entry
+
+    def _find(self, query):
+        return self.watchlist.find(query, self.ENTRY_FIELDS).sort([('added_at', pymongo.ASCENDING), ('_id', pymongo.ASCENDING)])
+
+    def entries(self, user_id):
+        docs = [self._entry(doc) for doc in self._find({"userId": ObjectId(user_id)})]
+        if not docs and not self._user_exists(user_id):
+            return None
+        return docs
+
+    def saved_lists(self, users):
+        lists = {str(user['_id']): [] for user in users}
+        if lists:
+            for doc in self._find({"userId": {"$in": [ObjectId(user_id) for user_id in lists]}}):
+                lists[str(doc['userId'])].append(self._entry(doc))
+        return lists
+
+    def _new_entry(self, user_id, anime_id, watched, added_at=None):
+        return {
+            "userId": ObjectId(user_id),
+            "animeId": anime_key(anime_id),
+            "watched": watched,
+            "progress": 0,
+            "added_at": added_at or datetime.now(timezone.utc),
+        }
+
+    def add(self, user_id, anime_id, watched):
+        if not self._user_exists(user_id):
+            return NO_USER
+        try:
+            self.watchlist.insert_one(self._new_entry(user_id, anime_id, watched))
+        except DuplicateKeyError:
+            return DUPLICATE
+        self._bump_version(user_id)
+        return ADDED
+
+    def update(self, user_id, anime_id, changes):
+        result = self.watchlist.update_one(
+            {"userId": ObjectId(user_id), "animeId": anime_key(anime_id)}, {"$set": changes}
+        )
+        if result.matched_count:
+            self._bump_version(user_id)
+            return UPDATED
+        return NOT_IN_LIST if self._user_exists(user_id) else NO_USER
+
+    def remove(self, user_id, anime_id):
+        result = self.watchlist.delete_one({"userId": ObjectId(user_id), "animeId": anime_key(anime_id)})
+        if result.deleted_count:
+            self._bump_version(user_id)
+            return REMOVED
+        return REMOVED if self._user_exists(user_id) else NO_USER
+
+    def bulk(self, user_id, adds, removes, toggles):
+        """Like EmbeddedWatchlist.bulk; the added count comes from the upserts."""
+        if not self._user_exists(user_id):
+            return None
+        user = ObjectId(user_id)
+        added = 0
+        if removes:
+            self.watchlist.delete_many({"userId": user, "animeId": {"$in": [anime_key(a) for a in removes]}})
+        if adds:
+            operations = [
+                UpdateOne({"userId": user, "animeId": anime_key(anime_id)},
+                          {"$setOnInsert": self._new_entry(user_id, anime_id, watched)}, upsert=True)
+                for anime_id, watched in adds.items()
+            ]
+            try:
+                added = self.watchlist.bulk_write(operations, ordered=False).upserted_count
+            except BulkWriteError as e:
+                # A concurrent add of the same entry won the upsert race; that entry exists either way
+                if any(error['code'] != DUPLICATE_KEY for error in e.details['writeErrors']):
+                    raise
+                added = e.details['nUpserted']
+        for value in (True, False):
+            ids = [anime_key(anime_id) for anime_id, watched in toggles.items() if watched is value]
+            if ids:
+                self.watchlist.update_many({"userId": user, "animeId": {"$in": ids}}, {"$set": {"watched": value}})
+        self._bump_version(user_id)
+        return added
+
+    def delete_user(self, user_id):
+        self.watchlist.delete_many({"userId": ObjectId(user_id)})
+
+
+BACKENDS = {
+    'embedded': EmbeddedWatchlist,
+    'collection': CollectionWatchlist,
+}
+
+_indexed = set()
+
+
+def watchlist_store(db, backend=None):
+    """Return the configured watchlist backend for `db`, creating its indexes once per process."""
+    backend = backend or config.WATCHLIST_BACKEND
+    store = BACKENDS[backend](db)
+    if backend not in _indexed:
+        store.ensure_indexes()
+        _indexed.add(backend)
+    return store
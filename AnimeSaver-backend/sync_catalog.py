@@ -0,0 +1,37 @@
+# sync_catalog.py
+"""Fill and refresh the local anime catalog mirror from MyAnimeList.
+
+Usage:
+    python sync_catalog.py            # run one sync pass and exit
+    python sync_catalog.py --forever  # keep syncing every CATALOG_SYNC_INTERVAL seconds
+
+Point MYANIMELIST_API_URL at a stub server to sync against fake data.
+"""
+import argparse
+import functools
+import logging
+
+import config
+from routes.anime_routes import anime_catalog, make_mal_request, MYANIMELIST_API_URL
+from services.catalog import CatalogSync
+from services.resilience import BACKGROUND
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync the local anime catalog from MyAnimeList.')
+    parser.add_argument('--forever', action='store_true', help='keep running on an interval')
+    parser.add_argument('--interval', type=int, default=config.CATALOG_SYNC_INTERVAL,
+                        help='seconds between passes when running with --forever')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    anime_catalog.ensure_indexes()
+    sync = CatalogSync(anime_catalog, functools.partial(make_mal_request, priority=BACKGROUND), MYANIMELIST_API_URL)
+    if args.forever:
+        sync.run_forever(args.interval)
+    else:
+        print(sync.run_once())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+# tests/conftest.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing the routes needs a signing key and must not touch a real database
+os.environ.setdefault('AUTH_DEV_MODE', 'true')
+os.environ.setdefault('INDEX_BOOTSTRAP_ON_STARTUP', 'false')
+os.environ.setdefault('SNAPSHOT_SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('CATALOG_READS_ENABLED', 'false')
+os.environ.setdefault('MONGO_URL_ONLINE_ANIMESAVER', 'mongodb://localhost:27017/animesaver_test')
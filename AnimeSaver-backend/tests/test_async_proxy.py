@@ -0,0 +1,132 @@
+# tests/test_async_proxy.py
+"""The async MAL client and proxy routes against a stubbed MAL transport."""
+import itertools
+
+import httpx
+import pytest
+from quart import Quart
+
+import config
+from routes import anime_async_routes
+from services import mal_async_client as client_module
+from services.mal_async_client import AsyncMALClient
+from services.resilience import CircuitBreaker
+
+# Fresh IDs per test so the shared detail cache never answers for the stub
+anime_ids = itertools.count(900000)
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(config.MAL_BREAKER_FAILURES, config.MAL_BREAKER_RESET)
+    monkeypatch.setattr(client_module, 'mal_breaker', breaker)
+    monkeypatch.setattr(anime_async_routes, 'mal_breaker', breaker)
+    return breaker
+
+
+def stub_client(handler):
+    client = AsyncMALClient()
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.fixture
+def app():
+    app = Quart(__name__)
+    app.register_blueprint(anime_async_routes.anime_async_bp, url_prefix='/api')
+    return app
+
+
+def use_stub(monkeypatch, handler):
+    client = stub_client(handler)
+    monkeypatch.setattr(anime_async_routes, 'mal_async_client', client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_success_returns_body(breaker):
+    client = stub_client(lambda request: httpx.Response(200, json={'id': 1, 'title': 'Monster'}))
+    assert await client.get_json('https://mal.test/anime/1') == {'id': 1, 'title': 'Monster'}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_timeout_maps_to_504(breaker):
+    def handler(request):
+        raise httpx.ReadTimeout('timed out', request=request)
+
+    body, status, _ = await stub_client(handler).get_json('https://mal.test/anime/1')
+    assert status == 504 and 'timed out' in body['error']
+    assert breaker.stats()['consecutive_failures'] == 1
+
+
+@pytest.mark.asyncio
+async def test_transport_error_maps_to_502(breaker):
+    def handler(request):
+        raise httpx.ConnectError('connection refused', request=request)
+
+    _, status, _ = await stub_client(handler).get_json('https://mal.test/anime/1')
+    assert status == 502
+    assert breaker.stats()['consecutive_failures'] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_maps_to_502(breaker):
+    client = stub_client(lambda request: httpx.Response(200, content=b'<html>maintenance</html>'))
+    body, status, _ = await client.get_json('https://mal.test/anime/1')
+    assert status == 502
+    assert body == {'error': 'MyAnimeList returned an invalid response'}
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_opens_circuit(breaker):
+    client = stub_client(lambda request: httpx.Response(429))
+    _, status, headers = await client.get_json('https://mal.test/anime/1')
+    assert status == 503 and 'Retry-After' in headers
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_route_proxies_detail(app, monkeypatch, breaker):
+    anime_id = next(anime_ids)
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(200, json={'id': anime_id, 'title': 'Monster', 'mean': 8.9})
+
+    use_stub(monkeypatch, handler)
+    response = await app.test_client().get(f'/api/anime/{anime_id}?fields=title,mean')
+    assert response.status_code == 200
+    assert (await response.get_json())['title'] == 'Monster'
+    assert seen == [f'/v2/anime/{anime_id}']
+
+
+@pytest.mark.asyncio
+async def test_route_upstream_timeout_is_504(app, monkeypatch, breaker):
+    def handler(request):
+        raise httpx.ReadTimeout('timed out', request=request)
+
+    use_stub(monkeypatch, handler)
+    response = await app.test_client().get(f'/api/anime/{next(anime_ids)}')
+    assert response.status_code == 504
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast(app, monkeypatch, breaker):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={})
+
+    use_stub(monkeypatch, handler)
+    breaker.record_failure(trip=True)
+    tokens = anime_async_routes.mal_limiter.stats()['granted']
+
+    response = await app.test_client().get(f'/api/anime/{next(anime_ids)}')
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+    assert calls == []
+    # The breaker refused the call before a rate-limit token was taken
+    assert anime_async_routes.mal_limiter.stats()['granted'] == tokens
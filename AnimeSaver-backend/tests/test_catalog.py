@@ -0,0 +1,190 @@
+# tests/test_catalog.py
+"""Catalog mirror: incremental sync from a stub MAL, and when reads fall back upstream.
+
+Runs on mongomock, or on the MongoDB at TEST_MONGO_URI when it is set
+(needed for the $text search cases).
+"""
+import datetime
+import os
+import uuid
+
+import pytest
+
+from services.catalog import AnimeCatalog, CatalogSync
+
+REAL_MONGO = os.getenv('TEST_MONGO_URI')
+BASE_URL = 'https://mal.test/v2/anime'
+MAX_AGE = 60 * 60
+
+
+def node(anime_id, updated_at='2024-01-01T00:00:00+00:00', **fields):
+    return {'id': anime_id, 'title': f'Anime {anime_id}', 'mean': 9 - anime_id / 100, 'rank': anime_id,
+            'updated_at': updated_at, 'start_season': {'year': 2024, 'season': 'fall'}, **fields}
+
+
+class StubMAL:
+    """Serves listings and details from dicts, paging the way MAL does, and records every call."""
+
+    def __init__(self, listings=None, details=None):
+        self.listings = listings or {}
+        self.details = details or {}
+        self.calls = []
+
+    def __call__(self, endpoint, params=None):
+        self.calls.append((endpoint, params))
+        path = endpoint[len(BASE_URL):]
+        if path in self.listings:
+            items = self.listings[path]
+            offset, limit = params['offset'], params['limit']
+            body = {'data': [{'node': item} for item in items[offset:offset + limit]], 'paging': {}}
+            if offset + limit < len(items):
+                body['paging']['next'] = f'{endpoint}?offset={offset + limit}'
+            return body
+        anime_id = path.lstrip('/')
+        if anime_id in self.details:
+            return self.details[anime_id]
+        return {'error': 'not found'}, 404, {}
+
+
+@pytest.fixture
+def db():
+    if REAL_MONGO:
+        import pymongo
+
+        client = pymongo.MongoClient(REAL_MONGO, tz_aware=True)
+        name = f'animesaver_test_{uuid.uuid4().hex[:8]}'
+        yield client[name]
+        client.drop_database(name)
+    else:
+        mongomock = pytest.importorskip('mongomock')
+        yield mongomock.MongoClient(tz_aware=True).db
+
+
+@pytest.fixture
+def catalog(db):
+    return AnimeCatalog(db, max_age=MAX_AGE)
+
+
+def age(catalog, seconds, **query):
+    """Pretend the matching entries were last synced `seconds` ago."""
+    past = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=seconds)
+    catalog.anime.update_many(query, {'$set': {'synced_at': past}})
+    catalog.sync_state.update_many({}, {'$set': {'synced_at': past}})
+
+
+# -- sync -------------------------------------------------------------------
+
+def test_sync_ranking_pages_through_listing(catalog):
+    mal = StubMAL({'/ranking': [node(i) for i in range(1, 6)]})
+    sync = CatalogSync(catalog, mal, BASE_URL, page_size=2)
+    assert sync.sync_ranking('all', max_items=10) == 5
+    assert len(mal.calls) == 3
+    assert catalog.sync_state.find_one({'_id': 'ranking:all'})['count'] == 5
+
+
+def test_sync_skips_unchanged_entries(catalog):
+    mal = StubMAL({'/ranking': [node(1), node(2)]})
+    sync = CatalogSync(catalog, mal, BASE_URL)
+    assert sync.sync_ranking('all', max_items=10) == 2
+    # Same updated_at upstream: nothing is rewritten
+    assert sync.sync_ranking('all', max_items=10) == 0
+
+    mal.listings['/ranking'] = [node(1), node(2, updated_at='2024-02-01T00:00:00+00:00', title='Renamed')]
+    assert sync.sync_ranking('all', max_items=10) == 1
+    assert catalog.anime.find_one({'id': 2})['title'] == 'Renamed'
+
+
+def test_refresh_stale_only_after_max_age(catalog):
+    mal = StubMAL({'/ranking': [node(1), node(2)]}, {'1': node(1, updated_at='2024-03-01T00:00:00+00:00')})
+    sync = CatalogSync(catalog, mal, BASE_URL)
+    sync.sync_ranking('all', max_items=10)
+    assert catalog.stale_ids(10) == []
+    assert sync.refresh_stale() == 0
+
+    age(catalog, MAX_AGE + 60, id=1)
+    assert catalog.stale_ids(10) == [1]
+    mal.calls.clear()
+    assert sync.refresh_stale() == 1
+    assert mal.calls == [(f'{BASE_URL}/1', {'fields': mal.calls[0][1]['fields']})]
+    assert catalog.stale_ids(10) == []
+
+
+def test_failed_listing_is_not_marked_synced(catalog):
+    sync = CatalogSync(catalog, StubMAL(), BASE_URL)
+    with pytest.raises(RuntimeError):
+        sync.sync_ranking('all', max_items=10)
+    assert catalog.sync_state.find_one({'_id': 'ranking:all'}) is None
+
+
+# -- mirror or fallback -----------------------------------------------------
+
+@pytest.fixture
+def synced(catalog):
+    mal = StubMAL({'/ranking': [node(i) for i in range(1, 6)], '/season/2024/fall': [node(i) for i in range(1, 6)]})
+    sync = CatalogSync(catalog, mal, BASE_URL)
+    sync.sync_ranking('all', max_items=5)
+    sync.sync_season(2024, 'fall', max_items=5)
+    return catalog
+
+
+def test_get_serves_fresh_covered_entries(synced):
+    assert synced.get('3', 'title,mean') == {'id': 3, 'title': 'Anime 3', 'mean': 8.97}
+
+
+@pytest.mark.parametrize('anime_id, fields', [
+    ('99', 'title'),                    # not mirrored
+    ('3', 'title,my_list_status'),      # field the mirror does not store
+    ('abc', 'title'),                   # not a MAL ID
+])
+def test_get_falls_back(synced, anime_id, fields):
+    assert synced.get(anime_id, fields) is None
+
+
+def test_get_falls_back_when_stale(synced):
+    age(synced, MAX_AGE + 60)
+    assert synced.get('3', 'title') is None
+
+
+def test_ranking_serves_synced_depth(synced):
+    page = synced.ranking('all', 2, 2, 'title', f'{BASE_URL}/ranking')
+    assert [(item['node']['id'], item['ranking']['rank']) for item in page['data']] == [(3, 3), (4, 4)]
+    assert 'offset=4' in page['paging']['next']
+
+
+@pytest.mark.parametrize('ranking_type, limit, offset, fields', [
+    ('all', 5, 2, 'title'),             # beyond the synced depth
+    ('airing', 2, 0, 'title'),          # listing never synced
+    ('all', 2, 0, 'my_list_status'),    # uncovered field
+    ('nonsense', 2, 0, 'title'),
+])
+def test_ranking_falls_back(synced, ranking_type, limit, offset, fields):
+    assert synced.ranking(ranking_type, limit, offset, fields, f'{BASE_URL}/ranking') is None
+
+
+def test_ranking_falls_back_when_listing_is_stale(synced):
+    age(synced, MAX_AGE + 60)
+    assert synced.ranking('all', 2, 0, 'title', f'{BASE_URL}/ranking') is None
+
+
+def test_season_serves_synced_season(synced):
+    page = synced.season(2024, 'fall', 'anime_score', 3, 0, 'title,mean', f'{BASE_URL}/season/2024/fall')
+    assert [item['node']['id'] for item in page['data']] == [1, 2, 3]
+    assert page['season'] == {'year': 2024, 'season': 'fall'}
+
+
+def test_season_falls_back_when_not_synced(synced):
+    assert synced.season(2025, 'winter', 'anime_score', 3, 0, 'title', f'{BASE_URL}/season/2025/winter') is None
+
+
+@pytest.mark.parametrize('query, fields', [('', 'title'), ('anime', 'my_list_status')])
+def test_search_falls_back_without_query_or_coverage(synced, query, fields):
+    assert synced.search(query, 2, 0, fields, BASE_URL) is None
+
+
+@pytest.mark.skipif(not REAL_MONGO, reason='$text search needs a real MongoDB (set TEST_MONGO_URI)')
+def test_search_serves_only_full_pages(synced):
+    synced.ensure_indexes()
+    page = synced.search('anime', 2, 0, 'title', BASE_URL)
+    assert len(page['data']) == 2 and 'next' in page['paging']
+    # Fewer matches than the page could be a gap in the mirror: MAL decides
+    assert synced.search('anime', 10, 0, 'title', BASE_URL) is None
@@ -0,0 +1,43 @@
+# tests/test_migrate_watchlist.py
+import sys
+
+import pytest
+
+import config
+import migrate_watchlist
+from migrate_watchlist import migrate
+
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip('mongomock')
+    return mongomock.MongoClient().db
+
+
+def test_copies_and_unsets(db):
+    user_id = db['users'].insert_one({'savedList': [{'id': '5', 'watched': True}, {'id': 6}]}).inserted_id
+    assert migrate(db, unset=True) == {'users': 1, 'entries_copied': 2, 'unset_skipped': []}
+    assert 'savedList' not in db['users'].find_one({'_id': user_id})
+    assert sorted(doc['animeId'] for doc in db['watchlist'].find()) == [5, 6]
+
+
+def test_list_changed_during_copy_is_kept(db, monkeypatch):
+    user_id = db['users'].insert_one({'savedList': [{'id': 5}]}).inserted_id
+    watchlist = db['watchlist']
+    bulk_write = watchlist.bulk_write
+
+    def add_while_copying(operations, **kwargs):
+        db['users'].update_one({'_id': user_id}, {'$push': {'savedList': {'id': 7}}})
+        return bulk_write(operations, **kwargs)
+
+    monkeypatch.setattr(watchlist, 'bulk_write', add_while_copying)
+    assert migrate(db, unset=True)['unset_skipped'] == [str(user_id)]
+    assert db['users'].find_one({'_id': user_id})['savedList'] == [{'id': 5}, {'id': 7}]
+
+
+def test_unset_refused_on_embedded_backend(monkeypatch):
+    monkeypatch.setattr(config, 'WATCHLIST_BACKEND', 'embedded')
+    monkeypatch.setattr(sys, 'argv', ['migrate_watchlist.py', '--unset'])
+    with pytest.raises(SystemExit) as exc:
+        migrate_watchlist.main()
+    assert exc.value.code == 2
@@ -0,0 +1,24 @@
+# tests/test_passwords.py
+import time
+
+import pytest
+
+from services.passwords import PasswordHasher, PasswordHasherBusy
+
+
+def test_timed_out_job_keeps_its_slot():
+    hasher = PasswordHasher(workers=1, queue_size=0, rounds=4, timeout=0.1)
+    with pytest.raises(PasswordHasherBusy, match='timed out'):
+        hasher._run(time.sleep, 0.5)
+    # The sleep is still running in the pool, so there is no free slot yet
+    with pytest.raises(PasswordHasherBusy, match='Too many'):
+        hasher._run(time.sleep, 0)
+    time.sleep(0.6)
+    assert hasher._run(time.sleep, 0) is None
+
+
+def test_hash_and_check_release_their_slots():
+    hasher = PasswordHasher(workers=0, queue_size=0, rounds=4, timeout=5)
+    hashed = hasher.hash('secret')
+    assert hasher.check('secret', hashed)
+    assert not hasher.check('wrong', hashed)
@@ -0,0 +1,66 @@
+# tests/test_search_index.py
+import pytest
+
+import config
+from routes import anime_routes
+from services.search_index import SearchIndex
+
+CATALOG = [
+    {'id': 19, 'title': 'Monster', 'popularity': 150, 'mean': 8.9},
+    {'id': 5114, 'title': 'Fullmetal Alchemist: Brotherhood', 'popularity': 3, 'mean': 9.1,
+     'alternative_titles': {'en': 'Fullmetal Alchemist: Brotherhood', 'synonyms': ['FMA:B']}},
+    {'id': 121, 'title': 'Fullmetal Alchemist', 'popularity': 90, 'mean': 8.1},
+    {'id': 1535, 'title': 'Death Note', 'popularity': 1, 'mean': 8.6},
+]
+
+
+@pytest.fixture
+def local_search(monkeypatch):
+    """search_index_page over CATALOG, with the mirror returning each anime's id and title."""
+    docs = {str(doc['id']): {'id': doc['id'], 'title': doc['title']} for doc in CATALOG}
+    monkeypatch.setattr(config, 'SEARCH_INDEX_ENABLED', True)
+    monkeypatch.setattr(anime_routes.search_indexer, 'index', SearchIndex(CATALOG))
+    monkeypatch.setattr(anime_routes.anime_catalog, 'get_many',
+                        lambda ids, fields: {str(anime_id): docs[str(anime_id)] for anime_id in ids})
+
+    def search(query, limit=10, offset=0):
+        return anime_routes.search_index_page(query, limit, offset, 'id,title', 'https://mal.test/anime')
+    return search
+
+
+def page_ids(page):
+    return [item['node']['id'] for item in page['data']]
+
+
+def test_ranks_exact_name_then_popularity():
+    index = SearchIndex(CATALOG)
+    result = index.search('fullmetal alchemist')
+    assert result.ids == [121, 5114] and not result.fuzzy
+
+
+def test_misspelled_title_is_answered_locally(local_search):
+    page = local_search('fullmetle alchemist')
+    assert page_ids(page) == [5114, 121]
+    assert page['paging'] == {}
+
+
+def test_short_result_set_is_answered_locally(local_search):
+    # Two hits for a page of ten
+    page = local_search('alchemist', limit=10)
+    assert page_ids(page) == [5114, 121]
+    assert 'next' not in page['paging']
+
+
+def test_paging_links(local_search):
+    page = local_search('alchemist', limit=1)
+    assert page_ids(page) == [5114]
+    assert 'offset=1' in page['paging']['next']
+
+
+def test_no_local_hit_falls_back(local_search):
+    assert local_search('cowboy bebop') is None
+
+
+def test_disabled_index_falls_back(local_search, monkeypatch):
+    monkeypatch.setattr(config, 'SEARCH_INDEX_ENABLED', False)
+    assert local_search('monster') is None
@@ -0,0 +1,133 @@
+# tests/test_shared_cache.py
+"""TwoLevelCache and friends against the in-memory fake store."""
+import pytest
+
+import config
+from services import shared_cache
+from services.anime_cache import AnimeDetailCache, parse_fields
+from services.season_listing import SeasonListings
+from services.shared_cache import MemoryStore, SharedNamespace, TwoLevelCache, decode, encode, format_key
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_BACKEND', 'memory')
+    monkeypatch.setattr(shared_cache, '_store', None)
+    monkeypatch.setattr(shared_cache, '_caches', {})
+    return shared_cache.shared_store()
+
+
+class FailingStore(MemoryStore):
+    def get(self, key):
+        raise OSError('connection refused')
+
+    def set(self, key, value, ttl):
+        raise OSError('connection refused')
+
+
+def test_format_key_is_stable():
+    assert format_key(('id', 42)) == 'id:42'
+    assert format_key(('1', frozenset(['title', 'mean']))) == '1:mean,title'
+
+
+@pytest.mark.parametrize('value', [True, 0, 'text', [1, 2], {'id': 1, 'title': 'Monster'}])
+def test_codec_round_trip(value):
+    assert decode(encode(value)) == value
+
+
+def test_codec_compresses_large_values(monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_COMPRESS_MIN_BYTES', 64)
+    value = {'synopsis': 'a' * 1000}
+    data = encode(value)
+    assert data[:1] == b'z' and len(data) < 200
+    assert decode(data) == value
+
+
+def test_local_backend_has_no_shared_tier(monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_BACKEND', 'local')
+    cache = TwoLevelCache('test', 10, 60)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert cache.stats()['shared']['enabled'] is False
+
+
+def test_read_falls_through_to_shared_tier(store):
+    cache = TwoLevelCache('test', 10, 60)
+    cache.set(('id', 'u1'), False)
+    assert store.get(f'{config.CACHE_KEY_PREFIX}:test:v1:id:u1') is not None
+
+    cache.local.clear()
+    assert cache.get(('id', 'u1')) is False
+    # The shared hit was copied back into the local tier
+    assert cache.local.get('id:u1') is False
+    assert cache.get(('id', 'missing'), 'default') == 'default'
+
+
+def test_workers_share_values(store):
+    worker_a = TwoLevelCache('test', 10, 60)
+    worker_b = TwoLevelCache('test', 10, 60)
+    worker_a.set('link', {'kind': 'snapshot', 'animeList': [1, 2]})
+    assert worker_b.get('link') == {'kind': 'snapshot', 'animeList': [1, 2]}
+
+
+def test_delete_broadcasts_invalidation(store):
+    worker_a = TwoLevelCache('test', 10, 60)
+    worker_b = TwoLevelCache('test', 10, 60)
+    worker_a.set(('id', 'u1'), True)
+    assert worker_b.get(('id', 'u1')) is True
+
+    worker_a.delete(('id', 'u1'))
+    assert worker_b.local.get('id:u1') is None
+    assert worker_b.get(('id', 'u1')) is None
+
+
+def test_invalidation_only_reaches_its_namespace(store):
+    roles = TwoLevelCache('roles', 10, 60)
+    shares = TwoLevelCache('shares', 10, 60)
+    roles.set('k', 1)
+    shares.set('k', 2)
+    roles.delete('k')
+    assert shares.local.get('k') == 2
+
+
+def test_version_isolates_entries(store):
+    TwoLevelCache('test', 10, 60, version=1).set('k', 'old shape')
+    assert TwoLevelCache('test', 10, 60, version=2).get('k') is None
+
+
+def test_store_failure_degrades_to_local():
+    shared = SharedNamespace('test', 60, store=FailingStore())
+    assert shared.get('k') is None
+    shared.set('k', 1)
+    assert shared.stats()['errors'] == 2
+
+
+def test_corrupt_entry_is_a_miss(store):
+    shared = SharedNamespace('test', 60, store=store)
+    store.set(shared.prefix + 'k', b'z-not-zlib', 60)
+    assert shared.get('k') is None
+    assert shared.stats()['errors'] == 1
+
+
+def test_anime_detail_cache_shares_between_workers(store):
+    tier = SharedNamespace('anime', 60, store=store)
+    worker_a = AnimeDetailCache(10, 60, 60, shared=tier)
+    worker_b = AnimeDetailCache(10, 60, 60, shared=tier)
+    worker_a.store(19, parse_fields('title,mean'), {'id': 19, 'title': 'Monster', 'mean': 8.9})
+
+    assert worker_b.get_cached(19, 'title,mean', fetch=None) == {'id': 19, 'title': 'Monster', 'mean': 8.9}
+    # Now local to worker_b, so a subset is answered from it too
+    assert worker_b.get_cached(19, 'title', fetch=None) == {'id': 19, 'title': 'Monster'}
+
+
+def test_season_listings_share_between_workers(store):
+    tier = SharedNamespace('seasons', 60, store=store)
+    worker_a = SeasonListings(10, 60, 60, shared=tier)
+    worker_b = SeasonListings(10, 60, 60, shared=tier)
+    items = [{'node': {'id': 1, 'title': 'A', 'mean': 7.5}}]
+    worker_a.store(2024, 'fall', 'anime_score', 'id,title,mean', items)
+
+    def load(fields):
+        raise AssertionError('worker_b should not load from MAL')
+
+    assert worker_b.get(2024, 'fall', 'anime_score', 'mean,title,id', load) == items
@@ -0,0 +1,100 @@
+# tests/test_snapshots.py
+"""Snapshot scheduling across workers: one lease holder builds, the rest install what it publishes."""
+import datetime
+
+import pytest
+
+from services.shared_cache import MemoryStore, SharedNamespace
+from services.snapshots import SharedSnapshots, SnapshotLease, SnapshotScheduler, SnapshotStore
+
+KEY = ('ranking', 'all')
+
+
+@pytest.fixture
+def state():
+    mongomock = pytest.importorskip('mongomock')
+    return mongomock.MongoClient().db['snapshot_state']
+
+
+@pytest.fixture
+def listing():
+    """The upstream listing, and how many times each worker loaded it."""
+    return {'items': [{'node': {'id': 1}}], 'loads': {}}
+
+
+@pytest.fixture
+def worker(state, listing):
+    store = MemoryStore()
+
+    def make(name):
+        def load():
+            listing['loads'][name] = listing['loads'].get(name, 0) + 1
+            return list(listing['items'])
+
+        snapshots = SnapshotStore()
+        scheduler = SnapshotScheduler(
+            snapshots, lambda: {KEY: load}, interval=0,
+            lease=SnapshotLease(state, ttl=60, holder=name),
+            shared=SharedSnapshots(SharedNamespace('snapshots', 60, store=store), state),
+        )
+        return scheduler, snapshots
+    return make
+
+
+def expire_lease(state):
+    state.update_one({'_id': 'builder'}, {'$set': {'expires_at': datetime.datetime(2000, 1, 1)}})
+
+
+def test_only_the_lease_holder_builds(worker, listing):
+    (a, a_store), (b, b_store) = worker('a'), worker('b')
+    a.run_once()
+    b.run_once()
+    assert a.leader and not b.leader
+    assert listing['loads'] == {'a': 1}
+    assert b_store.get(KEY).generation == a_store.get(KEY).generation == 1
+    assert b_store.get(KEY).etag == a_store.get(KEY).etag
+
+
+def test_generation_follows_content(worker, listing):
+    (a, a_store), (b, b_store) = worker('a'), worker('b')
+    a.run_once()
+    a.run_once()
+    b.run_once()
+    # Unchanged content keeps its generation
+    assert b_store.get(KEY).generation == 1
+
+    listing['items'] = [{'node': {'id': 2}}]
+    a.run_once()
+    b.run_once()
+    assert a_store.get(KEY).generation == b_store.get(KEY).generation == 2
+    assert b_store.get(KEY).items == ({'node': {'id': 2}},)
+
+
+def test_generations_continue_after_failover(worker, listing, state):
+    (a, a_store), (b, b_store) = worker('a'), worker('b')
+    a.run_once()
+    b.run_once()
+
+    expire_lease(state)
+    listing['items'] = [{'node': {'id': 3}}]
+    b.run_once()
+    a.run_once()
+    assert b.leader and not a.leader
+    assert b_store.get(KEY).generation == a_store.get(KEY).generation == 2
+
+
+def test_new_holder_keeps_unchanged_generation(worker, listing, state):
+    (a, _), (b, b_store) = worker('a'), worker('b')
+    a.run_once()
+    expire_lease(state)
+    # b never followed, but starts from the published snapshot
+    b.run_once()
+    assert b.leader and b_store.get(KEY).generation == 1
+
+
+def test_without_shared_store_every_worker_builds(listing):
+    loads = []
+    snapshots = SnapshotStore()
+    scheduler = SnapshotScheduler(snapshots, lambda: {KEY: lambda: loads.append(1) or listing['items']}, interval=0)
+    scheduler.run_once()
+    assert loads == [1] and snapshots.get(KEY).generation == 1
@@ -0,0 +1,23 @@
+# tests/test_user_routes.py
+import pytest
+from flask import Flask
+
+from routes import user_routes
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(user_routes.bp, url_prefix='/api')
+    return app.test_client()
+
+
+@pytest.mark.parametrize('method, path', [
+    ('get', '/api/user/not-an-id/watchlist'),
+    ('post', '/api/user/not-an-id/watchlist/bulk'),
+    ('get', '/api/user/not-an-id/watchlist/export'),
+])
+def test_malformed_user_id_is_404(client, method, path):
+    response = getattr(client, method)(path, json={'add': [{'anime_id': 1}]})
+    assert response.status_code == 404
+    assert response.get_json() == {'message': 'User not found'}
@@ -0,0 +1,87 @@
+# tests/test_watchlist_store.py
+"""Watchlist backends: bulk and single-entry calls on the same list.
+
+Runs against the MongoDB at TEST_MONGO_URI when it is set. Without it the
+collection backend runs on mongomock; the embedded backend relies on
+pipeline updates and array filters that mongomock does not implement, so
+it is skipped.
+"""
+import os
+import uuid
+
+import pytest
+from bson.objectid import ObjectId
+
+from services.watchlist_store import (
+    ADDED, DUPLICATE, NOT_IN_LIST, REMOVED, UPDATED, CollectionWatchlist, EmbeddedWatchlist,
+)
+
+REAL_MONGO = os.getenv('TEST_MONGO_URI')
+
+
+@pytest.fixture
+def db():
+    if REAL_MONGO:
+        import pymongo
+
+        client = pymongo.MongoClient(REAL_MONGO)
+        name = f'animesaver_test_{uuid.uuid4().hex[:8]}'
+        yield client[name]
+        client.drop_database(name)
+    else:
+        mongomock = pytest.importorskip('mongomock')
+        yield mongomock.MongoClient().db
+
+
+@pytest.fixture(params=[EmbeddedWatchlist, CollectionWatchlist])
+def store(request, db):
+    if request.param is EmbeddedWatchlist and not REAL_MONGO:
+        pytest.skip('the embedded backend needs a real MongoDB (set TEST_MONGO_URI)')
+    store = request.param(db)
+    store.ensure_indexes()
+    return store
+
+
+@pytest.fixture
+def user_id(db):
+    return str(db['users'].insert_one({'userName': 'tester'}).inserted_id)
+
+
+def ids(store, user_id):
+    return sorted(str(entry['id']) for entry in store.entries(user_id))
+
+
+def test_single_calls_see_bulk_entries(store, user_id):
+    assert store.bulk(user_id, {5: False, 6: True}, [], {}) == 2
+
+    # The frontend sends IDs as strings; bulk stored them as integers
+    assert store.add(user_id, '5', True) == DUPLICATE
+    assert store.update(user_id, '5', {'watched': True}) == UPDATED
+    assert {str(entry['id']): entry['watched'] for entry in store.entries(user_id)}['5'] is True
+    assert store.remove(user_id, '6') == REMOVED
+    assert ids(store, user_id) == ['5']
+
+
+def test_bulk_sees_single_entries(store, user_id):
+    assert store.add(user_id, '7', False) == ADDED
+    # 7 is already saved, so only 8 counts as added
+    assert store.bulk(user_id, {7: True, 8: False}, [], {7: True}) == 1
+    assert ids(store, user_id) == ['7', '8']
+    assert store.bulk(user_id, {}, [7], {}) == 0
+    assert ids(store, user_id) == ['8']
+
+
+def test_bulk_readds_removed_entries(store, user_id):
+    store.bulk(user_id, {1: False}, [], {})
+    assert store.bulk(user_id, {1: True}, [1], {}) == 1
+    assert ids(store, user_id) == ['1']
+
+
+def test_missing_user(store):
+    missing = str(ObjectId())
+    assert store.bulk(missing, {1: False}, [], {}) is None
+    assert store.update(missing, '1', {'watched': True}) != UPDATED
+
+
+def test_update_of_unsaved_entry(store, user_id):
+    assert store.update(user_id, '99', {'watched': True}) == NOT_IN_LIST
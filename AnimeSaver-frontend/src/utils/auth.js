@@ -2,10 +2,58 @@ import axios from "axios";
 
 axios.defaults.baseURL = "https://animesaver-backend.onrender.com";
 
+// Send the access token with every request
+axios.interceptors.request.use((config) => {
+  const accessToken = localStorage.getItem("accessToken");
+  if (accessToken && !config.headers.Authorization) {
+    config.headers.Authorization = `Bearer ${accessToken}`;
+  }
+  return config;
+});
+
 const auth = {
   /**
-   * Check if the user is logged in by verifying the userId in localStorage
-   * and validating it against the server.
+   * Store the tokens returned by /login or /token/refresh.
+   * @param {Object} session - The response body with access_token, refresh_token and expires_in.
+   */
+  saveSession(session) {
+    if (session.userId) {
+      localStorage.setItem("userId", session.userId);
+    }
+    localStorage.setItem("accessToken", session.access_token);
+    localStorage.setItem("refreshToken", session.refresh_token);
+    localStorage.setItem(
+      "accessTokenExpiresAt",
+      String(Date.now() + session.expires_in * 1000)
+    );
+  },
+
+  /**
+   * Exchange the refresh token for a new token pair.
+   * @returns {Promise<boolean>} - Resolves to true if the session was renewed.
+   */
+  async refreshSession() {
+    const refreshToken = localStorage.getItem("refreshToken");
+    if (!refreshToken) {
+      return false;
+    }
+
+    try {
+      const response = await axios.post("/token/refresh", {
+        refresh_token: refreshToken,
+      });
+      this.saveSession(response.data);
+      return true;
+    } catch (error) {
+      this.logout();
+      return false;
+    }
+  },
+
+  /**
+   * Check if the user is logged in. A valid access token is checked locally;
+   * an expired one is renewed with the refresh token. Sessions from before
+   * tokens existed are validated against the server by userId.
    * @returns {Promise<boolean>} - Returns a promise that resolves to true if the user is logged in, false otherwise.
    */
   async isLoggedIn() {
@@ -15,6 +63,14 @@ const auth = {
       return false;
     }
 
+    if (localStorage.getItem("accessToken")) {
+      const expiresAt = Number(localStorage.getItem("accessTokenExpiresAt"));
+      if (Date.now() < expiresAt - 30 * 1000) {
+        return true;
+      }
+      return this.refreshSession();
+    }
+
     try {
       const response = await axios.get(`/user/${userId}`);
       return response.status === 200 && response.data._id === userId;
@@ -25,10 +81,13 @@ const auth = {
   },
 
   /**
-   * Log the user out by removing their userId from localStorage.
+   * Log the user out by removing their userId and tokens from localStorage.
    */
   logout() {
     localStorage.removeItem("userId");
+    localStorage.removeItem("accessToken");
+    localStorage.removeItem("refreshToken");
+    localStorage.removeItem("accessTokenExpiresAt");
   },
 
   /**